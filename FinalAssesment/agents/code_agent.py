@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from utils.llm_gateway import chat
 
 load_dotenv()
 
@@ -22,8 +22,6 @@ def code_agent(state: dict) -> dict:
         state["agent_log"].append("Code Agent: Missing API key in config or environment.")
         return state
 
-    client = OpenAI(api_key=api_key)
-
     results = []
 
     for fpath in state.get("file_list", []):
@@ -42,12 +40,12 @@ def code_agent(state: dict) -> dict:
                 )
 
                 # Send to OpenAI model
-                response = client.chat.completions.create(
+                analysis = chat(
                     model="gpt-4o",
                     messages=[{"role": "user", "content": prompt}],
+                    api_key=api_key,
+                    priority="batch",
                 )
-
-                analysis = response.choices[0].message["content"]
                 results.append({"file": fpath, "analysis": analysis})
 
                 state["agent_log"].append(f"Code Agent: LLM-analyzed {fpath}.")
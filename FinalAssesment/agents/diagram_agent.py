@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from utils.llm_gateway import chat
 
 load_dotenv()
 
@@ -37,14 +37,11 @@ def diagram_agent(state: dict) -> dict:
     )
 
     try:
-        client = OpenAI(api_key=api_key)
-
-        response = client.chat.completions.create(
+        diagram_description = chat(
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
+            api_key=api_key,
         )
-
-        diagram_description = response.choices[0].message["content"]
         state["diagrams"] = diagram_description
 
         state["agent_log"].append("Diagram Agent: LLM described system diagram.")
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from utils.llm_gateway import chat
 
 load_dotenv()
 
@@ -18,8 +18,6 @@ def documentation_agent(state: dict) -> dict:
         state.setdefault("agent_log", []).append("❌ Documentation Agent: Missing API key.")
         return state
 
-    client = OpenAI(api_key=api_key)
-
     # Collect all previously generated insights
     repo_overview = state.get("analysis_overview", "")
     code_analysis = state.get("code_analysis_results", "")
@@ -63,7 +61,7 @@ def documentation_agent(state: dict) -> dict:
     prompt = f"{role_prompt}\n\nHere is the analysis context:\n{full_context}\n\nNow generate documentation for the role: {role.upper()}."
 
     try:
-        response = client.chat.completions.create(
+        documentation = chat(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an expert technical documentation generator."},
@@ -71,9 +69,8 @@ def documentation_agent(state: dict) -> dict:
             ],
             temperature=0.6,
             max_tokens=800,
-        )
-
-        documentation = response.choices[0].message.content.strip()
+            api_key=api_key,
+        ).strip()
         state["documentation"] = documentation
         state.setdefault("agent_log", []).append(f"📘 Documentation Agent: Generated {role.upper()} documentation.")
     except Exception as e:
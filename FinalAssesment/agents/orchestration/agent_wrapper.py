@@ -1,6 +1,8 @@
 from agents.orchestration.state import checkpoint_state
 import datetime
 
+from utils.tracing import span
+
 
 class PauseException(Exception):
     """Raised when a pause is requested."""
@@ -30,9 +32,10 @@ def agent_wrapper(agent_fn, agent_name):
             checkpoint_state(state)
             raise PauseException(f"Paused at {agent_name}")
 
-        # Execute the actual agent function
+        # Execute the actual agent function (its LLM calls are accounted to it)
         try:
-            result_state = agent_fn(state)
+            with span(agent_name, kind="node"):
+                result_state = agent_fn(state)
         except Exception as e:
             state["agent_log"].append(f"Error in {agent_name}: {str(e)}")
             checkpoint_state(state)
@@ -5,6 +5,10 @@ import requests
 from pygments.lexers import guess_lexer_for_filename
 from pygments.util import ClassNotFound
 import ast
+from utils.cassette import http_get
+
+# Archive host for repository downloads; point at loadtest/fixture_web.py to run offline
+GITHUB_BASE_URL = os.getenv("GITHUB_BASE_URL", "https://github.com").rstrip("/")
 
 
 def extract_zip(zip_path, extract_to=None):
@@ -60,12 +64,12 @@ def download_and_extract_github(github_url, extract_to=None):
 
     parts = github_url.rstrip("/").split("/")
     repo = "/".join(parts[-2:])  # e.g. "username/repo"
-    zip_url = f"https://github.com/{repo}/archive/refs/heads/main.zip"
+    zip_url = f"{GITHUB_BASE_URL}/{repo}/archive/refs/heads/main.zip"
 
     local_zip = os.path.join(extract_to, "repo.zip")
 
     try:
-        r = requests.get(zip_url, timeout=15)
+        r = http_get(zip_url, timeout=15)
         r.raise_for_status()
         with open(local_zip, "wb") as f:
             f.write(r.content)
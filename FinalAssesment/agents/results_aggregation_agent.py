@@ -1,3 +1,6 @@
+from utils import accounting
+
+
 def results_aggregation_agent(state: dict) -> dict:
     """
     Aggregates all outputs from previous agents into a single
@@ -12,7 +15,9 @@ def results_aggregation_agent(state: dict) -> dict:
         "agent_log": state.get("agent_log", []),
         "code_analysis": state.get("code_analysis_results", []),
         "security_findings": state.get("security_findings", []),
-        "web_aug_results": state.get("web_aug_results", "")
+        "web_aug_results": state.get("web_aug_results", ""),
+        # Tokens, latency and cost per agent so far (None outside a traced run)
+        "accounting": accounting.report(),
     }
 
     state["final_output"] = final
@@ -1,7 +1,7 @@
 import os
 import time
-from openai import OpenAI
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
 import streamlit as st
 
 load_dotenv()
@@ -20,8 +20,6 @@ def security_agent(state: dict) -> dict:
         st.warning("⚠️ Missing API key for security agent.")
         return state
 
-    client = OpenAI(api_key=api_key)
-
     file_list = [f for f in state.get("file_list", []) if f.endswith(".py")]
     total_files = len(file_list)
 
@@ -50,13 +48,13 @@ def security_agent(state: dict) -> dict:
                 f"{code[:3500]}"
             )
 
-            response = client.chat.completions.create(
+            result = chat(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
+                api_key=api_key,
+                priority="batch",
             )
-
-            result = response.choices[0].message.content
             results.append({"file": fpath, "security_review": result})
             state["agent_log"].append(f"Security Agent: ✅ Scanned {fpath}")
 
@@ -1,8 +1,8 @@
 import os
 import time
 import requests
-from openai import OpenAI
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
 import streamlit as st
 
 load_dotenv()
@@ -21,8 +21,6 @@ def web_augmentation_agent(state: dict) -> dict:
         st.warning("⚠️ Missing API key for web augmentation agent.")
         return state
 
-    client = OpenAI(api_key=api_key)
-
     repo_path = state.get("repo_path") or state.get("unzipped_path") or "."
     deps = []
 
@@ -58,13 +56,13 @@ def web_augmentation_agent(state: dict) -> dict:
                 "4. Modern alternatives if outdated"
             )
 
-            response = client.chat.completions.create(
+            result = chat(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.5,
-            )
-
-            result = response.choices[0].message.content.strip()
+                api_key=api_key,
+                priority="batch",
+            ).strip()
             summaries.append({dep_name: result})
             state["agent_log"].append(f"Web Augmentation Agent: ✅ Retrieved info for {dep_name}")
 
@@ -0,0 +1,6 @@
+# Shared modules (utils.*) are the repo-root package: run with the repo root on
+# PYTHONPATH. FinalAssesment/utils has no __init__, so it never shadows them.
+# Configure logging once for the API process, before any router or service logs
+from utils.logger import configure_logging
+
+configure_logging()
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from utils import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus scrape endpoint: tool, LLM, fetch and DB metrics for this process.
+    """
+    return metrics.metrics_response()
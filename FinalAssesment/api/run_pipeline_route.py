@@ -4,6 +4,8 @@ import os
 import uuid
 
 from agents.orchestration.work_flow import run_full_pipeline
+from utils import accounting
+from utils.tracing import start_trace
 
 router = APIRouter()
 
@@ -55,15 +57,22 @@ async def run_pipeline_route(
         "agent_log": [],
     }
 
-    # Run the full multi-agent pipeline
+    # Run the full multi-agent pipeline; the run id tags its logs and trace spans
+    run_id = uuid.uuid4().hex[:12]
     try:
-        final_state = run_full_pipeline(state)
+        with start_trace("run_pipeline", run_id=run_id):
+            final_state = run_full_pipeline(state)
+        result = final_state.get("final_output")
+        if isinstance(result, dict):
+            # Refresh now that the run has finished, so the wall time covers all of it
+            result["accounting"] = accounting.report(run_id)
         return JSONResponse({
-            "result": final_state.get("final_output"),
+            "run_id": run_id,
+            "result": result,
             "agent_log": final_state.get("agent_log", [])
         })
     except Exception as e:
         return JSONResponse(
-            {"error": str(e), "message": "Pipeline execution failed."},
+            {"run_id": run_id, "error": str(e), "message": "Pipeline execution failed."},
             status_code=500
         )
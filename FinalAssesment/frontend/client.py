@@ -4,7 +4,7 @@ import time
 import tempfile
 import os
 from typing import Optional
-from openai import OpenAI
+from utils.llm_gateway import chat
 from dotenv import load_dotenv
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -27,7 +27,6 @@ from state_manager import load_state,save_state
 # Setup
 # ---------------------------
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 BACKEND_URL = "http://localhost:8080"
 POLL_INTERVAL = 1.0  # seconds
 
@@ -61,7 +60,7 @@ def ensure_session_state():
 def query_llm(prompt: str) -> str:
     """Query OpenAI GPT model."""
     try:
-        response = client.chat.completions.create(
+        return chat(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You are an expert repository analyst."},
@@ -69,8 +68,7 @@ def query_llm(prompt: str) -> str:
             ],
             temperature=0.7,
             max_tokens=400,
-        )
-        return response.choices[0].message.content.strip()
+        ).strip()
     except Exception as e:
         return f"⚠️ Error querying LLM: {e}"
 
@@ -398,9 +396,8 @@ def summarize_progress_ui(state):
         st.info("No logs yet.")
         return
 
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     prompt = f"Summarize the current analysis progress based on these logs:\n\n{logs}"
-    response = client.chat.completions.create(
+    summary = chat(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a repository progress summarizer."},
@@ -408,7 +405,7 @@ def summarize_progress_ui(state):
         ]
     )
     st.markdown("### 🧾 Current Summary")
-    st.write(response.choices[0].message.content)
+    st.write(summary)
 
 
 def progress_ui():
@@ -1,12 +1,10 @@
 import os
 import json
 import time
-from openai import OpenAI
 from state_manager import save_state
+from utils.llm_gateway import stream_chat
 import streamlit as st
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 def stream_llm(project_id: int, prompt: str, state: dict, role="analysis_agent", ui_callback=None):
     """
     Stream OpenAI output token-by-token with manual pause/resume support.
@@ -22,31 +20,30 @@ def stream_llm(project_id: int, prompt: str, state: dict, role="analysis_agent",
     })
 
     try:
-        with client.chat.completions.stream(
+        stream = stream_chat(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
-        ) as stream:
+        )
 
-            for event in stream:
-                if state.get("is_paused"):
-                    state["status"] = "paused"
-                    save_state(project_id, state)
-                    st.warning("⏸️ Stream paused.")
-                    return partial_output
+        for token in stream:
+            if state.get("is_paused"):
+                stream.close()
+                state["status"] = "paused"
+                save_state(project_id, state)
+                st.warning("⏸️ Stream paused.")
+                return partial_output
 
-                if hasattr(event, "delta") and event.delta.get("content"):
-                    token = event.delta["content"]
-                    partial_output += token
-                    state["partial_output"] = partial_output
+            partial_output += token
+            state["partial_output"] = partial_output
 
-                    # ✅ Update Streamlit UI instantly
-                    if ui_callback:
-                        ui_callback(partial_output)
-                        st.experimental_rerun()  # 🔥 force live update
+            # ✅ Update Streamlit UI instantly
+            if ui_callback:
+                ui_callback(partial_output)
+                st.experimental_rerun()  # 🔥 force live update
 
-                    time.sleep(0.02)
+            time.sleep(0.02)
 
-            state["status"] = "completed"
+        state["status"] = "completed"
 
     except Exception as e:
         state["status"] = "error"
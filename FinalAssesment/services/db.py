@@ -13,6 +13,7 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
+from utils.tracing import instrument_sqlalchemy
 
 load_dotenv()
 
@@ -24,6 +25,7 @@ if not DATABASE_URL:
     raise ValueError("❌ Missing CONNECTION_URL in environment variables.")
 
 engine = create_engine(DATABASE_URL)
+instrument_sqlalchemy(engine, db="project_files")
 metadata = MetaData()
 
 # ------------------------------------------------------------------
@@ -1,9 +1,8 @@
 # services/llm_analyzer.py
 import os
-from openai import OpenAI
+import asyncio
 from services.event_manager import EventManager
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils.llm_gateway import complete
 
 async def analyze_repo_with_llm(repo_path: str, metadata: dict, event_manager: EventManager, project_id: int):
     await event_manager.send(project_id, "🧠 Running LLM-based repository analysis...")
@@ -36,8 +35,7 @@ async def analyze_repo_with_llm(repo_path: str, metadata: dict, event_manager: E
     """
 
     try:
-        response = client.responses.create(model="gpt-4o-mini", input=prompt)
-        result = response.output[0].content[0].text
+        result = await asyncio.to_thread(complete, prompt, model="gpt-4o-mini")
         await event_manager.send(project_id, "✅ LLM analysis complete.")
         return result
     except Exception as e:
@@ -5,10 +5,13 @@ Edit the AGENT_ENDPOINTS dictionary to point to your other agent MCP servers.
 These URLs are used by the coordinator's http client to call remote tools.
 """
 
-# Example endpoints (update to actual host:port or service addresses)
+import os
+
+# Example endpoints (update to actual host:port or service addresses);
+# the defaults match the ports each agent's server listens on
 AGENT_ENDPOINTS = {
-    "retrieval": "http://localhost:8001",    # Retrieval MCP server base URL
-    "analysis": "http://localhost:8002",     # Analysis MCP server base URL
+    "retrieval": "http://localhost:8002",    # Retrieval MCP server base URL
+    "analysis": "http://localhost:8001",     # Analysis MCP server base URL
     "validation": "http://localhost:8003",   # Validation MCP server base URL
     "output": "http://localhost:8004",       # Output formatting MCP server base URL
 }
@@ -16,7 +19,75 @@ AGENT_ENDPOINTS = {
 # Tool paths used by the http client (convention - customize as needed).
 # The coordinator will POST to: <base_url> + tool_path.format(tool=tool_name)
 # Example default pattern expects endpoints like: http://host:port/tools/<tool>
+# (the retrieval, analysis and validation servers mount it with utils.server.mount_tools)
 TOOL_INVOKE_PATH = "/tools/{tool}"  # customize if your MCP servers expose different routes
 
 # Timeout for HTTP calls (seconds)
 HTTP_TIMEOUT = 30
+
+# Documents the retrieval agent returns per subtask
+RETRIEVAL_TOP_K = 5
+
+# Subtask execution mode for the research graph (main.py) and process_query:
+#   "sequential" - task_prioritizer routes to one agent per pass (original behavior);
+#                  process_query runs its subtasks one at a time
+#   "parallel"   - prioritized subtasks run as a dependency DAG, joined at synthesis
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "sequential")
+
+# Maximum subtasks executing concurrently in parallel mode
+MAX_PARALLEL_TASKS = int(os.getenv("MAX_PARALLEL_TASKS", "4"))
+
+# Semantic prompt cache for rephrased queries (see tools/semantic_cache.py)
+SEMANTIC_CACHE_PATH = "agents/coordinator/storage/semantic_cache.jsonl"
+SEMANTIC_CACHE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))  # cosine similarity
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+
+# Payload encoding for agent RPC calls: "json" or "msgpack" (compact binary,
+# needs the msgpack package on both ends)
+RPC_ENCODING = os.getenv("RPC_ENCODING", "json")
+
+# Streaming result synthesis (see tools/result_synthesizer.py)
+SYNTHESIS_DIGEST_CHARS = 280  # per-section digest fed to the final summary
+# Final summary over section digests: "extractive" (no LLM call) or "llm"
+SYNTHESIS_SUMMARY_MODE = os.getenv("SYNTHESIS_SUMMARY_MODE", "extractive")
+
+# Cost/latency-aware planning (see tools/task_prioritizer.py, tools/task_telemetry.py)
+TASK_TELEMETRY_PATH = "agents/coordinator/storage/task_telemetry.jsonl"
+TASK_TELEMETRY_MAX_RECORDS = 2000  # the log is compacted to this many records once it holds twice as many
+# Prior estimates per agent until enough runs have been recorded
+TASK_DEFAULT_ESTIMATES = {
+    "web_scraper": {"latency_s": 8.0, "tokens": 1500},
+    "deep_analysis": {"latency_s": 12.0, "tokens": 4000},
+    "fact_validation": {"latency_s": 6.0, "tokens": 2000},
+}
+TASK_COST_PER_1K_TOKENS = float(os.getenv("TASK_COST_PER_1K_TOKENS", "0.0006"))  # USD, blended in/out
+# Per-query budgets; 0 disables the limit. Over budget, the lowest-value
+# subtasks (those nothing else depends on) are deferred.
+PLAN_TIME_BUDGET_S = float(os.getenv("PLAN_TIME_BUDGET_S", "0"))
+PLAN_COST_BUDGET_USD = float(os.getenv("PLAN_COST_BUDGET_USD", "0"))
+
+# Speculative retrieval while the query is being decomposed (see tools/speculative_prefetch.py)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_MAX_QUERIES = 4        # raw query + keyword expansions sent to the retrieval agent
+PREFETCH_TOP_K = 5
+PREFETCH_JOIN_TIMEOUT = 2.0     # seconds to wait for matching searches once the plan is ready
+
+# Fast path: simple single-intent queries skip LLM decomposition (see tools/query_decomposer.py)
+FASTPATH_ENABLED = os.getenv("FASTPATH_ENABLED", "1") == "1"
+FASTPATH_MAX_WORDS = 12
+FASTPATH_MAX_ENTITIES = 2
+# Share of fast-path queries also decomposed by the LLM in the background to measure routing accuracy
+FASTPATH_SAMPLE_RATE = float(os.getenv("FASTPATH_SAMPLE_RATE", "0.05"))
+# A sampled LLM subtask agrees with the fast path when this share of its topic words is in one fast subtask (and vice versa)
+FASTPATH_MATCH_MIN_OVERLAP = float(os.getenv("FASTPATH_MATCH_MIN_OVERLAP", "0.5"))
+
+# Session-scoped working set reused by follow-up queries (see tools/session_cache.py)
+SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "1") == "1"
+SESSION_CACHE_MAX_MB = float(os.getenv("SESSION_CACHE_MAX_MB", "256"))   # all sessions together
+SESSION_CACHE_MAX_SESSIONS = int(os.getenv("SESSION_CACHE_MAX_SESSIONS", "100"))
+SESSION_CACHE_TTL_S = float(os.getenv("SESSION_CACHE_TTL_S", "3600"))     # idle sessions are dropped
+# A cached retrieval covers a subtask when it shares this share of the subtask's topic words...
+SESSION_MATCH_MIN_OVERLAP = 0.6
+# ...and at least this many documents/passages match
+SESSION_MATCH_MIN_DOCS = 3
@@ -1,40 +1,201 @@
 # agents/coordinator/coordinator_server.py
 
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 from mcp.server.fastmcp import FastMCP
-from agents.coordinator.tools.query_decomposer import decompose_query
-from agents.coordinator.tools.task_prioritizer import prioritize_tasks
-from agents.coordinator.tools.progress_tracker import ProgressTracker
-from agents.coordinator.tools.result_synthesizer import synthesize_results
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from agents.coordinator.config import EXECUTION_MODE, MAX_PARALLEL_TASKS
+from agents.coordinator.tools.dag_executor import build_dag, execute_dag
+from agents.coordinator.tools.query_decomposer import decompose_query, fastpath_stats
+from agents.coordinator.tools.task_prioritizer import prioritize_tasks, plan_tasks
+from agents.coordinator.tools.progress_tracker import FINAL_STATUSES, ProgressTracker, sse_events
+from agents.coordinator.tools.result_synthesizer import ResultStream, sse_synthesis, stream_synthesis
+from agents.coordinator.tools.semantic_cache import semantic_cache
+from agents.coordinator.tools.session_cache import session_cache
+from agents.coordinator.tools import agent_rpc, speculative_prefetch
+from utils import accounting, metrics, trace_report, tracing
+from utils.logger import configure_logging
+from utils.server import serve
+
+configure_logging()
 
 app = FastMCP("Research Coordinator Agent")
 
 progress_tracker = ProgressTracker()
+metrics.mount(app)
+
+def _without_documents(tasks):
+    """Subtasks with their prefetched documents replaced by a count."""
+    out = []
+    for t in tasks:
+        if isinstance(t, dict) and "prefetched" in t:
+            t = {**{k: v for k, v in t.items() if k != "prefetched"}, "prefetched_docs": len(t["prefetched"])}
+        out.append(t)
+    return out
 
 @app.tool()
 @app.tool()
-def process_query(query: str):
-    sub_tasks = decompose_query(query)
-    prioritized = prioritize_tasks(sub_tasks)
-    progress_tracker.start("Research Workflow")
+def process_query(query: str, session_id: str = ""):
+    run_id = progress_tracker.start("Research Workflow")
+    with tracing.start_trace("process_query", run_id=run_id, query=query, session_id=session_id):
+        # Follow-ups in a session start from what it already retrieved; otherwise
+        # retrieval for the raw query runs while the query is decomposed
+        session_hit = session_cache.lookup(session_id, "web_scraper", query)
+        speculative = speculative_prefetch.start(query) if session_hit is None else None
+        with tracing.span("decompose_query", "node"):
+            sub_tasks = decompose_query(query)
+        if speculative is not None:
+            speculative.attach(sub_tasks)
+        for t in sub_tasks:
+            if not isinstance(t, dict):
+                continue
+            cached = session_cache.lookup(session_id, "web_scraper", t["task"])
+            if cached is not None:
+                t.setdefault("prefetched", []).extend(cached["documents"])
+            elif t.get("prefetched"):
+                session_cache.store(session_id, "web_scraper", t["task"], {"documents": t["prefetched"]})
+        with tracing.span("prioritize_tasks", "node"):
+            prioritized = prioritize_tasks(sub_tasks)
+
+        # Subtasks run on the remote agents as a dependency DAG: independent
+        # branches concurrently in parallel mode, one at a time otherwise
+        handlers = {agent: session_cache.wrap(session_id, agent, fn) for agent, fn in agent_rpc.HANDLERS.items()}
+        finished = ResultStream()
 
-    for task in prioritized:
-        progress_tracker.update(task["task"], "completed")  # extract string
+        def _on_update(task, status, res=None):
+            progress_tracker.update(task, status, run_id=run_id, detail=res)
+            if res is not None:
+                finished.put(res)
 
-    structured_results = [
-        {"task": t, "agent": "Coordinator", "result": f"Completed: {t}"}
-        for t in prioritized
-    ]
-    result = synthesize_results(structured_results)
+        def _execute():
+            try:
+                return execute_dag(
+                    {"query": query, "run_id": run_id, "session_id": session_id},
+                    build_dag(prioritized),
+                    handlers,
+                    max_parallel=MAX_PARALLEL_TASKS if EXECUTION_MODE == "parallel" else 1,
+                    on_update=_on_update,
+                )
+            finally:
+                finished.close()
+
+        # Report sections are synthesized here as each task finishes, while later ones still run
+        with ThreadPoolExecutor(max_workers=1) as pool, tracing.span("execute_dag", "node"):
+            pending = pool.submit(tracing.bind(_execute))
+            sections, summary = [], ""
+            for event in stream_synthesis(finished, {"query": query}):
+                if event["type"] == "summary":
+                    summary = event["text"]
+                else:
+                    sections.append(event["text"])
+            joined = pending.result()
+        progress_tracker.finish(run_id)
+        # Document text stays internal; the report only carries the count
+        sub_tasks, prioritized = _without_documents(sub_tasks), _without_documents(prioritized)
 
     return {
+        "run_id": run_id,
         "query": query,
         "sub_tasks": sub_tasks,
         "prioritized": prioritized,
-        "result": result,
+        "task_results": joined["task_results"],
+        "dag_stats": joined["dag_stats"],
+        "result": "\n".join(sections),
+        "summary": summary,
+        "accounting": accounting.report(run_id),
+        "session": session_cache.get_stats(session_id) if session_id else None,
     }
 
+@app.tool()
+def plan_query(query: str, time_budget: float = 0, cost_budget: float = 0):
+    """Execution plan for a query: estimated latency/cost per subtask, critical path and deferred tasks."""
+    return plan_tasks(decompose_query(query), time_budget=time_budget or None, cost_budget=cost_budget or None)
+
+@app.tool()
+def get_trace(run_id: str):
+    """Spans of one run (LLM, tool, HTTP and DB calls) and a text waterfall of them."""
+    tracing.flush()
+    spans = trace_report.load_trace(run_id)
+    return {"run_id": run_id, "spans": spans, "waterfall": trace_report.waterfall(spans)}
+
+@app.tool()
+def get_accounting(run_id: str):
+    """Prompt/completion tokens, wall time and estimated cost of a run, per agent and tool."""
+    breakdown = accounting.report(run_id)
+    return {"run_id": run_id, "accounting": breakdown, "summary": accounting.summary(breakdown)}
+
+@app.tool()
+def get_session(session_id: str):
+    """Documents and agent outputs held for a research session, with its hit rate."""
+    return session_cache.get_stats(session_id)
+
+@app.tool()
+def clear_session(session_id: str):
+    """Drop a research session's working set."""
+    return {"session_id": session_id, "cleared": session_cache.clear(session_id)}
+
+@app.tool()
+def get_progress(run_id: str):
+    """Status snapshot and per-task timings for one workflow run."""
+    return progress_tracker.get_status(run_id)
+
+@app.custom_route("/runs/{run_id}/events", methods=["GET"])
+async def run_events(request: Request):
+    """Server-Sent Events stream of a run's progress (replays from Last-Event-ID)."""
+    try:
+        since = int(request.headers.get("last-event-id", -1)) + 1
+    except ValueError:
+        # Not one of our ids: replay from the start
+        since = 0
+    return StreamingResponse(
+        sse_events(progress_tracker, request.path_params["run_id"], since),
+        media_type="text/event-stream",
+    )
+
+@app.custom_route("/runs/{run_id}/report", methods=["GET"])
+async def run_report(request: Request):
+    """Server-Sent Events stream of report sections, emitted as each task of the run finishes."""
+    run = progress_tracker.run(request.path_params["run_id"])
+
+    async def _results():
+        if run is None:
+            return
+        async for event in run.subscribe():
+            if event["type"] == "task" and event["status"] in FINAL_STATUSES and event.get("detail"):
+                yield event["detail"]
+
+    return StreamingResponse(
+        sse_synthesis(_results(), {"query": request.query_params.get("query", "")}),
+        media_type="text/event-stream",
+    )
+
+@app.tool()
+def cache_stats():
+    """Hit rates and latency saved by the semantic decomposition cache."""
+    return semantic_cache.get_stats()
+
+@app.tool()
+def rpc_stats():
+    """Circuit breaker state, latency percentiles and hedge win rates per agent endpoint."""
+    return agent_rpc.rpc_stats()
+
+@app.tool()
+def routing_stats():
+    """Share of queries taking the no-LLM decomposition fast path, and its sampled accuracy."""
+    return fastpath_stats()
+
+@app.tool()
+def prefetch_stats():
+    """How many speculative searches were started, used, cancelled or arrived too late."""
+    return speculative_prefetch.get_stats()
+
 if __name__ == "__main__":
-    print("🧪 Running self-test mode...")
-    result = process_query("impact of climate change on agriculture")
-    print(result)
+    if "--self-test" in sys.argv:
+        print("🧪 Running self-test mode...")
+        result = process_query("impact of climate change on agriculture")
+        print(result)
+    else:
+        serve(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,115 @@
+# agents/coordinator/tools/agent_rpc.py
+"""
+Agent RPC
+Calls tools on the remote agents listed in AGENT_ENDPOINTS.
+
+Requests go through the shared async RPC client (pooled keep-alive
+connections per agent), so the coordinator can fan a set of tool calls out
+to several agents at once and wait for all of them under one deadline.
+Each agent server answers at TOOL_INVOKE_PATH (utils.server.mount_tools).
+
+HANDLERS are the DAG executor's per-agent handlers (branch state -> state):
+each runs its subtask on the remote agent and appends what comes back to
+the branch's documents, insights or validated facts.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from agents.coordinator.config import AGENT_ENDPOINTS, TOOL_INVOKE_PATH, HTTP_TIMEOUT, RPC_ENCODING, RETRIEVAL_TOP_K
+from utils.rpc_client import get_client, run_sync
+
+
+def tool_url(agent: str, tool: str) -> str:
+    if agent not in AGENT_ENDPOINTS:
+        raise ValueError(f"Unknown agent '{agent}'. Known: {', '.join(AGENT_ENDPOINTS)}")
+    return AGENT_ENDPOINTS[agent].rstrip("/") + TOOL_INVOKE_PATH.format(tool=tool)
+
+
+def call_agent_tool(agent: str, tool: str, payload: Dict[str, Any], timeout: float = HTTP_TIMEOUT, hedge: bool = False) -> Any:
+    """Blocking call of one remote tool (only hedge idempotent calls)."""
+    return run_sync(get_client().call(tool_url(agent, tool), payload, timeout=timeout, encoding=RPC_ENCODING, hedge=hedge))
+
+
+async def fan_out(calls: List[Dict[str, Any]], deadline: Optional[float] = None, client=None) -> List[Dict[str, Any]]:
+    """
+    Call several remote tools concurrently.
+
+    calls: [{"agent", "tool", "payload", "timeout"?, "id"?, "hedge"?}, ...]
+           (hedge only idempotent calls such as searches)
+    deadline: overall limit in seconds for the whole fan-out
+    Returns per-call {"id", "url", "result" | "error", "elapsed_ms"} in input order.
+    """
+    requests = [
+        {
+            "id": c.get("id", f"{c['agent']}.{c['tool']}"),
+            "url": tool_url(c["agent"], c["tool"]),
+            "payload": c.get("payload") or {},
+            "timeout": c.get("timeout", HTTP_TIMEOUT),
+            "encoding": RPC_ENCODING,
+            "hedge": c.get("hedge", False),
+        }
+        for c in calls
+    ]
+    return await (client or get_client()).gather(requests, deadline=deadline)
+
+
+def rpc_stats() -> Dict[str, dict]:
+    """Circuit breaker state and hedge win rates per agent endpoint."""
+    return get_client().resilience_stats()
+
+
+def fan_out_sync(calls: List[Dict[str, Any]], deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Blocking form of fan_out for synchronous callers."""
+    return run_sync(fan_out(calls, deadline=deadline))
+
+
+def search_payload(query: str, top_k: int = RETRIEVAL_TOP_K) -> Dict[str, Any]:
+    """Retrieval `batch` payload running one fused semantic + keyword search."""
+    return {"calls": [{"tool": "search", "args": {"query": query, "top_k": top_k}, "id": query}]}
+
+
+def search_docs(response) -> List[dict]:
+    """Pull documents out of a retrieval `batch` response."""
+    docs = []
+    for item in (response or {}).get("results", []):
+        docs.extend((item.get("result") or {}).get("results", []))
+    return docs
+
+
+def _doc_text(doc) -> str:
+    return (doc.get("text") or doc.get("snippet") or "") if isinstance(doc, dict) else str(doc)
+
+
+def retrieve(branch: dict) -> dict:
+    """web_scraper handler: search the retrieval agent for the subtask."""
+    out = dict(branch)
+    # Searches are idempotent, so they may be hedged
+    response = call_agent_tool("retrieval", "batch", search_payload(branch["current_task"]), hedge=True)
+    out["documents"] = list(branch.get("documents") or []) + search_docs(response)
+    return out
+
+
+def analyze(branch: dict) -> dict:
+    """deep_analysis handler: analyze the documents the branch has gathered."""
+    out = dict(branch)
+    docs = [t for t in (_doc_text(d) for d in branch.get("documents") or []) if t]
+    response = call_agent_tool("analysis", "run_deep_analysis", {"query": branch["current_task"], "documents": docs})
+    out["insights"] = list(branch.get("insights") or []) + [response]
+    return out
+
+
+def validate(branch: dict) -> dict:
+    """fact_validation handler: fact-check the subtask on the validation agent."""
+    out = dict(branch)
+    response = call_agent_tool("validation", "run_agent", {"query": branch["current_task"]})
+    out["validated_facts"] = list(branch.get("validated_facts") or []) + [response]
+    return out
+
+
+HANDLERS = {"web_scraper": retrieve, "deep_analysis": analyze, "fact_validation": validate}
+
+
+__all__ = [
+    "tool_url", "call_agent_tool", "fan_out", "fan_out_sync", "rpc_stats",
+    "search_payload", "search_docs", "retrieve", "analyze", "validate", "HANDLERS",
+]
@@ -0,0 +1,253 @@
+# agents/coordinator/tools/dag_executor.py
+"""
+DAG Executor
+Runs prioritized subtasks as a dependency graph instead of one at a time.
+
+Each subtask is assigned an agent (retrieval -> analysis -> validation) and
+depends only on earlier-stage subtasks it shares a topic word with, so
+independent retrieval/analysis branches run concurrently under a
+parallelism cap. Branch outputs are joined back into the shared state for
+result synthesis, and wall time tracks the critical path rather than the
+sum of all subtasks.
+"""
+
+import re
+import time
+from utils import accounting, deadline, metrics, tracing
+from agents.coordinator.tools.task_telemetry import task_telemetry
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+STAGE_AGENTS = ["web_scraper", "deep_analysis", "fact_validation"]
+
+# State keys whose list values are produced per branch and concatenated at the join
+MERGE_KEYS = ["documents", "insights", "claims", "validated_facts"]
+
+_STAGE_KEYWORDS = [
+    ["find", "search", "retrieve", "collect", "gather", "scrape"],
+    ["compare", "analyze", "analyse", "trend", "pattern", "cause", "impact", "effect"],
+    ["verify", "validate", "fact-check", "source", "credib"],
+]
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "about", "what", "how", "its", "their",
+    "this", "that", "are", "was", "were", "between", "over", "across", "of", "on", "in",
+}
+
+
+def _task_text(t) -> str:
+    return t["task"] if isinstance(t, dict) else str(t)
+
+
+def _stage(text: str) -> int:
+    tl = text.lower()
+    for stage in (2, 1, 0):
+        if any(k in tl for k in _STAGE_KEYWORDS[stage]):
+            return stage
+    return 0  # plain research topics start with retrieval
+
+
+def _topic_words(text: str) -> set:
+    words = set(re.findall(r"[a-z]{3,}", text.lower())) - _STOPWORDS
+    for kws in _STAGE_KEYWORDS:
+        words -= set(kws)
+    return words
+
+
+def build_dag(subtasks: List) -> List[Dict]:
+    """
+    Compile subtasks into DAG nodes:
+        {"id", "task", "agent", "stage", "depends_on": [ids]}
+
+    Explicit "agent"/"depends_on" keys on a subtask dict are honored
+    ("depends_on" may hold node ids or task strings), and documents under
+    "prefetched" (speculative retrieval) and the planner's "deferred" flag
+    are carried onto the node. Otherwise a subtask
+    depends on earlier-stage subtasks sharing a topic word, or on all
+    subtasks of the nearest earlier stage when none do.
+    """
+    nodes = []
+    for i, t in enumerate(subtasks):
+        text = _task_text(t)
+        explicit_agent = t.get("agent") if isinstance(t, dict) else None
+        stage = STAGE_AGENTS.index(explicit_agent) if explicit_agent in STAGE_AGENTS else _stage(text)
+        nodes.append({
+            "id": i,
+            "task": text,
+            "agent": explicit_agent or STAGE_AGENTS[stage],
+            "stage": stage,
+            "depends_on": [],
+            "_words": _topic_words(text),
+        })
+        if isinstance(t, dict) and t.get("prefetched"):
+            nodes[-1]["prefetched"] = list(t["prefetched"])
+        if isinstance(t, dict) and t.get("deferred"):
+            nodes[-1]["deferred"] = True
+
+    by_text = {n["task"]: n["id"] for n in nodes}
+    for node, t in zip(nodes, subtasks):
+        explicit = t.get("depends_on") if isinstance(t, dict) else None
+        if explicit is not None:
+            node["depends_on"] = [by_text.get(d, d) for d in explicit if by_text.get(d, d) != node["id"]]
+            continue
+        earlier = [n for n in nodes if n["stage"] < node["stage"]]
+        if not earlier:
+            continue
+        related = [n["id"] for n in earlier if n["_words"] & node["_words"]]
+        if not related:
+            nearest = max(n["stage"] for n in earlier)
+            related = [n["id"] for n in earlier if n["stage"] == nearest]
+        node["depends_on"] = related
+
+    for node in nodes:
+        del node["_words"]
+    return nodes
+
+
+def _branch_state(state: dict, node: dict, outputs: Dict[int, dict]) -> dict:
+    """Shallow copy of the shared state plus everything the node's dependencies produced."""
+    branch = dict(state)
+    for key in MERGE_KEYS:
+        merged = list(state.get(key) or [])
+        for dep in node["depends_on"]:
+            merged.extend(outputs.get(dep, {}).get(key, []))
+        branch[key] = merged
+    branch["current_task"] = node["task"]
+    branch["next_agent"] = node["agent"]
+    return branch
+
+
+def execute_dag(
+    state: dict,
+    nodes: List[Dict],
+    handlers: Dict[str, Callable[[dict], dict]],
+    max_parallel: int = 4,
+    on_update: Optional[Callable[..., None]] = None,
+) -> dict:
+    """
+    Run DAG nodes with at most `max_parallel` in flight and join their outputs.
+
+    handlers maps agent name -> graph node callable (state -> state). Each
+    node's new list items under MERGE_KEYS are appended to the joined state;
+    per-task results land in state["task_results"] for result synthesis and
+    timing in state["dag_stats"]. Retrieval nodes carrying "prefetched"
+    documents are answered from them without calling their handler. `on_update(task, status, result=None)`, if
+    given, is called as each task starts running and, with its task result,
+    as soon as it finishes (so results can be streamed in completion order).
+    Nodes flagged "deferred" (over the planner's budget) start only after all
+    other nodes have finished.
+    """
+    outputs: Dict[int, dict] = {}
+    results: Dict[int, dict] = {}
+    remaining = {n["id"]: n for n in nodes}
+    known = set(remaining)
+    done = set()
+    started = time.perf_counter()
+    at = deadline.current()
+
+    def _run(node: dict) -> dict:
+        # Tasks that start after the request deadline are skipped
+        deadline.check(f"subtask '{node['task']}'", at=at)
+        t0 = time.perf_counter()
+        branch = _branch_state(state, node, outputs)
+        base_len = {k: len(branch[k]) for k in MERGE_KEYS}
+        # Speculative results count as this branch's own retrieval output
+        branch["documents"] = branch["documents"] + node.get("prefetched", [])
+        handler = handlers.get(node["agent"])
+        if handler is None:
+            raise ValueError(f"No handler for agent '{node['agent']}'")
+        metrics.dag_inflight.inc()
+        try:
+            with tracing.span(f"task:{node['agent']}", "task", task=node["task"], depends_on=str(node["depends_on"])) as s:
+                if node.get("prefetched") and node["agent"] == STAGE_AGENTS[0]:
+                    # Speculative retrieval already answered this subtask: skip the scraper
+                    s.set(prefetched=len(node["prefetched"]))
+                    out = branch
+                else:
+                    out = handler(branch) or branch
+        finally:
+            metrics.dag_inflight.dec()
+        produced = {k: list(out.get(k) or [])[base_len[k]:] for k in MERGE_KEYS}
+        # Session-cache hits and speculatively served retrieval did not really run the agent
+        measured = s.attributes.get("session_cache") != "hit" and not node.get("prefetched")
+        return {"produced": produced, "state": out, "start": t0 - started, "end": time.perf_counter() - started,
+                # LLM calls made by a remote agent are not seen here: tokens unknown
+                "measured": measured, "tokens": accounting.span_tokens(s) or None}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        running = {}
+        while remaining or running:
+            # Unknown dependency ids are ignored rather than blocking forever
+            ready = [n for n in remaining.values() if all(d in done or d not in known for d in n["depends_on"])]
+            in_budget_left = any(not n.get("deferred") for n in list(remaining.values()) + list(running.values()))
+            if in_budget_left:
+                ready = [n for n in ready if not n.get("deferred")]
+            for node in ready[: max(0, max_parallel - len(running))]:
+                del remaining[node["id"]]
+                running[pool.submit(tracing.bind(_run), node)] = node
+                if on_update:
+                    on_update(node["task"], "running")
+            if not running and not ready:
+                # Unsatisfiable dependencies (cycle): run the rest in order, in-budget nodes first
+                node = remaining.pop(min(remaining, key=lambda i: (bool(remaining[i].get("deferred")), i)))
+                node["depends_on"] = []
+                remaining[node["id"]] = node
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                node = running.pop(future)
+                try:
+                    res = future.result()
+                    outputs[node["id"]] = res["produced"]
+                    results[node["id"]] = {
+                        "task": node["task"], "agent": node["agent"], "status": "completed",
+                        "result": res["produced"] or res["state"].get("result", ""),
+                        "start": round(res["start"], 3), "end": round(res["end"], 3),
+                    }
+                    # Feeds the planner's latency and token estimates for this agent
+                    if res["measured"]:
+                        task_telemetry.record(node["agent"], res["end"] - res["start"], res["tokens"])
+                except Exception as e:
+                    outputs[node["id"]] = {}
+                    status = "skipped" if isinstance(e, deadline.DeadlineExceeded) else "failed"
+                    results[node["id"]] = {
+                        "task": node["task"], "agent": node["agent"], "status": status, "result": f"Error: {e}",
+                    }
+                done.add(node["id"])
+                if on_update:
+                    on_update(node["task"], results[node["id"]]["status"], results[node["id"]])
+
+    joined = dict(state)
+    for key in MERGE_KEYS:
+        joined[key] = list(state.get(key) or [])
+        for node in nodes:
+            joined[key].extend(outputs.get(node["id"], {}).get(key, []))
+
+    task_results = [results[n["id"]] for n in nodes]
+    joined["task_results"] = task_results
+    joined["agent_status"] = {**(state.get("agent_status") or {}), **{r["task"]: r["status"] for r in task_results}}
+    wall = time.perf_counter() - started
+    busy = sum(r["end"] - r["start"] for r in task_results if "end" in r)
+    joined["dag_stats"] = {
+        "tasks": len(nodes),
+        "max_parallel": max_parallel,
+        "wall_seconds": round(wall, 3),
+        "sequential_seconds": round(busy, 3),
+        "speedup": round(busy / wall, 2) if wall else None,
+    }
+    return joined
+
+
+def run_parallel(
+    state: dict,
+    handlers: Dict[str, Callable[[dict], dict]],
+    max_parallel: int = 4,
+    on_update: Optional[Callable[..., None]] = None,
+) -> dict:
+    """Compile state["subtasks"] into a DAG and execute it (graph node helper)."""
+    nodes = build_dag(state.get("subtasks") or [])
+    joined = execute_dag(state, nodes, handlers, max_parallel=max_parallel, on_update=on_update)
+    joined["dag"] = nodes
+    return joined
+
+
+__all__ = ["build_dag", "execute_dag", "run_parallel", "STAGE_AGENTS", "MERGE_KEYS"]
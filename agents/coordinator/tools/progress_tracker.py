@@ -1,42 +1,180 @@
 # agents/coordinator/tools/progress_tracker.py
 """
 Progress Tracker Tool
-Tracks progress of the research workflow.
+Tracks progress of research workflow runs.
+
+Each run has its own id and lock, so concurrent workflows never share
+state. Updates are appended to the run's event log and folded into a
+status table as they arrive, so a status snapshot never replays events.
+Clients can subscribe to a run (async iterator, or SSE via `sse_events`)
+instead of polling. A task moving to "running" and later to a final status gets its
+elapsed time recorded.
 """
 
-from typing import Dict
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+
+from utils.logger import get_logger
+
+FINAL_STATUSES = {"completed", "failed", "skipped"}
+MAX_RUNS = 200  # finished runs kept for late subscribers / status queries
+
+logger = get_logger("progress_tracker")
+
+
+class RunProgress:
+    def __init__(self, run_id: str, workflow_name: str):
+        self.run_id = run_id
+        self.workflow_name = workflow_name
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[dict] = []          # append-only event log
+        self.tasks: Dict[str, dict] = {}      # task -> {"status", "started_at", "ended_at", "elapsed"}
+        self.counts: Dict[str, int] = {}      # status -> number of tasks currently in it
+        self._subscribers = []                # (loop, asyncio.Queue)
+        self._lock = threading.Lock()
+
+    def _publish(self, event: dict):
+        # Called under self._lock, so event order matches status order
+        self.events.append(event)
+        for loop, queue in list(self._subscribers):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:  # subscriber's loop already closed
+                self._subscribers.remove((loop, queue))
+
+    def update(self, task_name: str, status: str, detail: Optional[dict] = None):
+        now = time.time()
+        with self._lock:
+            entry = self.tasks.get(task_name)
+            if entry is None:
+                entry = self.tasks[task_name] = {"status": None, "started_at": None, "ended_at": None, "elapsed": None}
+            else:
+                self.counts[entry["status"]] -= 1
+            entry["status"] = status
+            self.counts[status] = self.counts.get(status, 0) + 1
+            if status == "running" and entry["started_at"] is None:
+                entry["started_at"] = now
+            if status in FINAL_STATUSES:
+                entry["ended_at"] = now
+                if entry["started_at"] is not None:
+                    entry["elapsed"] = round(now - entry["started_at"], 4)
+            event = {"seq": len(self.events), "type": "task", "run_id": self.run_id, "task": task_name,
+                     "status": status, "time": now, "elapsed": entry["elapsed"], **({"detail": detail} if detail else {})}
+            self._publish(event)
+
+    def finish(self, status: str = "completed"):
+        with self._lock:
+            self.finished_at = time.time()
+            self._publish({"seq": len(self.events), "type": "run", "run_id": self.run_id, "status": status,
+                           "time": self.finished_at, "elapsed": round(self.finished_at - self.started_at, 4)})
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "workflow": self.workflow_name,
+                "tasks": {t: e["status"] for t, e in self.tasks.items()},
+                "timings": {t: e["elapsed"] for t, e in self.tasks.items() if e["elapsed"] is not None},
+                "completed": self.counts.get("completed", 0),
+                "total": len(self.tasks),
+                "finished": self.finished_at is not None,
+                "elapsed": round((self.finished_at or time.time()) - self.started_at, 4),
+            }
+
+    async def subscribe(self, since: int = 0) -> AsyncIterator[dict]:
+        """Yield events from `since` onwards, then live ones until the run finishes."""
+        since = max(0, since)
+        queue: asyncio.Queue = asyncio.Queue()
+        sub = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            backlog = self.events[since:]
+            finished = self.finished_at is not None
+            if not finished:
+                self._subscribers.append(sub)
+        try:
+            last = since - 1
+            for event in backlog:
+                last = event["seq"]
+                yield event
+                if event["type"] == "run":
+                    return
+            if finished:
+                # Reconnected after the final event: nothing more will come
+                return
+            while True:
+                event = await queue.get()
+                if event["seq"] <= last:
+                    continue
+                last = event["seq"]
+                yield event
+                if event["type"] == "run":
+                    return
+        finally:
+            # _publish prunes subscribers under the same lock from other threads
+            with self._lock:
+                if sub in self._subscribers:
+                    self._subscribers.remove(sub)
+
 
 class ProgressTracker:
     def __init__(self):
-        # Keeps track of all tasks and their statuses
-        self.progress: Dict[str, str] = {}
-        self.workflow_name = None
+        self.runs: "OrderedDict[str, RunProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._default_run: Optional[str] = None
 
-    def start(self, workflow_name: str):
-        """Start a new workflow."""
-        self.workflow_name = workflow_name
-        self.progress.clear()
-        print(f"[PROGRESS] Started workflow: {workflow_name}")
+    def start(self, workflow_name: str, run_id: Optional[str] = None) -> str:
+        """Start a new workflow run and return its id."""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            self.runs[run_id] = RunProgress(run_id, workflow_name)
+            self._default_run = run_id
+            while len(self.runs) > MAX_RUNS:
+                self.runs.popitem(last=False)
+        logger.info(f"Started workflow: {workflow_name} (run {run_id})")
+        return run_id
+
+    def run(self, run_id: Optional[str] = None) -> Optional[RunProgress]:
+        return self.runs.get(run_id or self._default_run or "")
 
-    def update(self, task_name: str, status: str):
-        """Update the status of a specific task."""
-        if not self.workflow_name:
-            print("[WARN] Workflow not started yet — call start() first.")
+    def update(self, task_name: str, status: str, run_id: str, detail: Optional[dict] = None):
+        """Update the status of a task in a run. The run id is required, so concurrent runs never mix."""
+        run = self.runs.get(run_id) if run_id else None
+        if run is None:
+            logger.warning(f"Update for task '{task_name}' dropped: unknown run {run_id!r} (call start() first).")
             return
-        self.progress[task_name] = status
-        print(f"[PROGRESS] Task '{task_name}' marked as {status}")
-
-    def get_status(self):
-        """Return a snapshot of current progress."""
-        return {
-            "workflow": self.workflow_name,
-            "tasks": self.progress,
-            "completed": sum(1 for s in self.progress.values() if s == "completed"),
-            "total": len(self.progress),
-        }
+        run.update(task_name, status, detail)
+
+    def finish(self, run_id: str, status: str = "completed"):
+        run = self.runs.get(run_id) if run_id else None
+        if run is None:
+            logger.warning(f"finish() for unknown run {run_id!r} ignored.")
+            return
+        run.finish(status)
+
+    def get_status(self, run_id: Optional[str] = None):
+        """Return a snapshot of a run's progress."""
+        run = self.run(run_id)
+        return run.snapshot() if run else {"workflow": None, "tasks": {}, "completed": 0, "total": 0}
 
     def reset(self):
-        """Reset all progress."""
-        self.workflow_name = None
-        self.progress.clear()
-        print("[PROGRESS] Reset all workflow data.")
+        """Drop all runs."""
+        with self._lock:
+            self.runs.clear()
+            self._default_run = None
+        logger.info("Reset all workflow data.")
+
+
+async def sse_events(tracker: ProgressTracker, run_id: str, since: int = 0) -> AsyncIterator[str]:
+    """Format a run's events as Server-Sent Events."""
+    run = tracker.run(run_id)
+    if run is None:
+        yield f"event: error\ndata: {json.dumps({'error': f'unknown run {run_id}'})}\n\n"
+        return
+    async for event in run.subscribe(since):
+        yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -1,12 +1,92 @@
 # agents/coordinator/tools/query_decomposer.py
 from typing import List, Dict
+import random
 import re
-import os
-from openai import OpenAI
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
+from agents.coordinator.tools.dag_executor import _topic_words
+from agents.coordinator.tools.semantic_cache import semantic_cache
+from agents.coordinator.config import (
+    FASTPATH_ENABLED, FASTPATH_MAX_WORDS, FASTPATH_MAX_ENTITIES, FASTPATH_SAMPLE_RATE, FASTPATH_MATCH_MIN_OVERLAP,
+)
 load_dotenv()  # This will automatically load OPENAI_API_KEY
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+_CONJUNCTIONS = re.compile(r"\b(and|or|versus|vs|compare|compared|between|as well as|then|also)\b|[,;]", re.IGNORECASE)
+_ENTITY = re.compile(r"\b(?:[A-Z][a-zA-Z0-9]+|[A-Z]{2,}|\d{2,4})\b")
+
+_fastpath_lock = threading.Lock()
+_fastpath_stats = {"fast_path": 0, "llm": 0, "sampled": 0, "agreed": 0}
+_disagreements = deque(maxlen=20)  # recent misroutes, for tuning the thresholds
+
+# Generic steps ("Summarize the findings") that say nothing about the topic
+_TASK_WORDS = {
+    "research", "study", "studies", "investigate", "explore", "review", "identify", "summarize",
+    "summarise", "summary", "findings", "overview", "information", "data", "report", "key",
+}
+
+
+def classify_complexity(query: str) -> Dict:
+    """
+    Cheap single-intent check run before any LLM call.
+    Returns {"simple": bool, "features": {...}}.
+    """
+    words = query.split()
+    # The first word is capitalized anyway, so it does not count as an entity
+    entities = _ENTITY.findall(" ".join(words[1:]))
+    features = {
+        "words": len(words),
+        "conjunctions": len(_CONJUNCTIONS.findall(query)),
+        "questions": query.count("?"),
+        "entities": len(entities),
+    }
+    simple = (
+        features["words"] <= FASTPATH_MAX_WORDS
+        and features["conjunctions"] == 0
+        and features["questions"] <= 1
+        and features["entities"] <= FASTPATH_MAX_ENTITIES
+    )
+    return {"simple": simple, "features": features}
+
+
+def _covered(tasks: List[Dict], by: List[Dict]) -> bool:
+    """Each task's topic words mostly appear in one of `by`'s tasks (tasks without topic words are skipped)."""
+    by_words = [_topic_words(t["task"]) - _TASK_WORDS for t in by]
+    for t in tasks:
+        words = _topic_words(t["task"]) - _TASK_WORDS
+        if words and not any(len(words & w) >= len(words) * FASTPATH_MATCH_MIN_OVERLAP for w in by_words):
+            return False
+    return True
+
+
+def _check_routing(query: str, fast: List[Dict]):
+    """Background sample: do the LLM's subtasks cover the same topics as the fast path's?"""
+    try:
+        # A sample, not a served result: kept out of the decomposition cache
+        llm = _llm_decompose(query, cache=False)
+    except Exception as e:
+        print(f"[WARN] Fast-path accuracy sample failed: {e}")
+        return
+    agreed = _covered(llm, fast) and _covered(fast, llm)
+    with _fastpath_lock:
+        _fastpath_stats["sampled"] += 1
+        _fastpath_stats["agreed"] += int(agreed)
+        if not agreed:
+            _disagreements.append({"query": query, "fast": [t["task"] for t in fast], "llm": [t["task"] for t in llm]})
+
+
+def fastpath_stats() -> Dict:
+    """Fast-path share and its agreement with LLM decomposition on sampled queries."""
+    with _fastpath_lock:
+        out = dict(_fastpath_stats)
+        out["recent_disagreements"] = list(_disagreements)
+    total = out["fast_path"] + out["llm"]
+    out["fast_path_rate"] = round(out["fast_path"] / total, 4) if total else 0.0
+    out["accuracy"] = round(out["agreed"] / out["sampled"], 4) if out["sampled"] else None
+    return out
+
 
 def decompose_query(query: str, use_llm: bool = True) -> List[Dict]:
     """
@@ -16,32 +96,60 @@ def decompose_query(query: str, use_llm: bool = True) -> List[Dict]:
     Parameters:
         query: The main user query string
         use_llm: Whether to use LLM for decomposition (falls back to regex if False or LLM fails)
+
+    Simple single-intent queries (see classify_complexity) skip the LLM
+    and go straight to the regex path.
     """
     if not query:
         return []
 
+    if use_llm and FASTPATH_ENABLED and classify_complexity(query)["simple"]:
+        subtasks = _regex_decompose(query)
+        with _fastpath_lock:
+            _fastpath_stats["fast_path"] += 1
+        if random.random() < FASTPATH_SAMPLE_RATE:
+            threading.Thread(target=_check_routing, args=(query, subtasks), daemon=True).start()
+        return subtasks
+
     if use_llm:
-        try:
-            prompt = f"""
-            You are a research assistant. Break down the following query into 
-            independent, actionable subtasks. Return only a clean numbered list, 
-            one subtask per line. Do not include extra text.
-
-            Query: {query}
-            """
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2
-            )
-            tasks_text = response.choices[0].message.content
-            # Split by lines and clean
-            tasks = [t.strip("0123456789. ").strip() for t in tasks_text.split("\n") if t.strip()]
-            return [{"task": t} for t in tasks if t]
+        with _fastpath_lock:
+            _fastpath_stats["llm"] += 1
+        # Rephrasings of an earlier query reuse its decomposition
+        cached = semantic_cache.lookup_decomposition(query)
+        if cached:
+            return [dict(t) for t in cached["decomposition"]]
 
+        try:
+            return _llm_decompose(query)
         except Exception as e:
             print(f"[WARN] LLM decomposition failed, falling back to regex. Error: {e}")
 
+    return _regex_decompose(query)
+
+
+def _llm_decompose(query: str, cache: bool = True) -> List[Dict]:
+    started = time.perf_counter()
+    prompt = f"""
+    You are a research assistant. Break down the following query into 
+    independent, actionable subtasks. Return only a clean numbered list, 
+    one subtask per line. Do not include extra text.
+
+    Query: {query}
+    """
+    tasks_text = chat(
+        model="gpt-4",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2
+    )
+    # Split by lines and clean
+    tasks = [t.strip("0123456789. ").strip() for t in tasks_text.split("\n") if t.strip()]
+    subtasks = [{"task": t} for t in tasks if t]
+    if cache:
+        semantic_cache.store_decomposition(query, subtasks, (time.perf_counter() - started) * 1000)
+    return subtasks
+
+
+def _regex_decompose(query: str) -> List[Dict]:
     # === Fallback: Regex-based decomposition ===
     s = " ".join(query.split())
     parts = re.split(r'[?;\n]+', s)
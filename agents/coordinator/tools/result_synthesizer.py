@@ -1,24 +1,170 @@
 # agents/coordinator/tools/result_synthesizer.py
-from typing import List, Dict
+"""
+Result Synthesizer Tool
+Combines agent results into a report.
+
+`synthesize_results` builds the whole report at once. For streaming,
+`IncrementalSynthesizer` takes results one at a time, in whatever order
+tasks complete, and returns each report section as soon as its result
+arrives; `stream_synthesis` wraps it as a generator and `sse_synthesis`
+as Server-Sent Events. Every section also gets a short digest, and the
+closing summary is built from those digests only, never from the full
+section texts.
+"""
+
+import json
+import queue
+import re
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from agents.coordinator.config import SYNTHESIS_DIGEST_CHARS, SYNTHESIS_SUMMARY_MODE
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _header(metadata: Dict) -> str:
+    header = "📘 Final Research Summary"
+    if metadata.get("query"):
+        header += f" — Query: {metadata['query']}"
+    return f"{header}\n{'=' * len(header)}"
+
+
+def _format_section(r: Dict) -> str:
+    task = r.get("task", "<unknown task>")
+    agent = r.get("agent", "unknown")
+    res = r.get("result", "")
+    return f"\nTask: {task}\nHandled by: {agent}\nResult:\n{res}\n"
+
+
+def digest(r: Dict, max_chars: int = SYNTHESIS_DIGEST_CHARS) -> str:
+    """Short extractive digest of one result: its leading sentences, capped at max_chars."""
+    res = r.get("result", "")
+    text = res if isinstance(res, str) else json.dumps(res, default=str)
+    text = " ".join(text.split())
+    out = ""
+    for sentence in _SENTENCE_END.split(text):
+        if out and len(out) + len(sentence) + 1 > max_chars:
+            break
+        out = f"{out} {sentence}".strip()
+    if len(out) > max_chars:
+        out = out[: max_chars - 1].rstrip() + "…"
+    return f"{r.get('task', '<unknown task>')}: {out}" if out else r.get("task", "<unknown task>")
+
+
+def summarize_digests(digests: List[str], query: str = "", mode: str = SYNTHESIS_SUMMARY_MODE) -> str:
+    """Final summary over section digests ("llm" uses the gateway, falling back to extractive)."""
+    if not digests:
+        return "No results."
+    if mode == "llm":
+        try:
+            from utils.llm_gateway import complete
+
+            bullets = "\n".join(f"- {d}" for d in digests)
+            return complete(
+                f"Research question: {query or 'n/a'}\n\nFindings per subtask:\n{bullets}\n\n"
+                "Write a concise summary (3-5 sentences) answering the question from these findings.",
+                temperature=0.2,
+            ).strip()
+        except Exception as e:
+            print(f"[WARN] LLM summary failed, using extractive summary: {e}")
+    return "\n".join(f"• {d}" for d in digests)
+
+
+class IncrementalSynthesizer:
+    """Build a report section by section as results arrive."""
+
+    def __init__(self, metadata: Dict = None, summary_mode: str = SYNTHESIS_SUMMARY_MODE):
+        self.metadata = metadata or {}
+        self.summary_mode = summary_mode
+        self.sections: List[str] = []
+        self.digests: List[str] = []
+
+    def header(self) -> Dict:
+        return {"type": "header", "text": _header(self.metadata)}
+
+    def add(self, r: Dict) -> Dict:
+        section = _format_section(r)
+        self.sections.append(section)
+        self.digests.append(digest(r))
+        return {
+            "type": "section",
+            "index": len(self.sections) - 1,
+            "task": r.get("task", "<unknown task>"),
+            "agent": r.get("agent", "unknown"),
+            "status": r.get("status", "completed"),
+            "text": section,
+            "digest": self.digests[-1],
+        }
+
+    def finish(self) -> Dict:
+        text = summarize_digests(self.digests, self.metadata.get("query", ""), self.summary_mode)
+        return {"type": "summary", "sections": len(self.sections), "text": text}
+
+    def report(self) -> str:
+        return "\n".join([_header(self.metadata), *self.sections])
+
+
+class ResultStream:
+    """Thread-safe iterable of results: producers put() as tasks complete, then close()."""
+
+    _DONE = object()
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+
+    def put(self, result: Dict):
+        self._queue.put(result)
+
+    def close(self):
+        self._queue.put(self._DONE)
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            yield item
+
+
+def stream_synthesis(results: Iterable[Dict], metadata: Dict = None, summarize: bool = True) -> Iterator[Dict]:
+    """
+    Yield report events as results arrive: a header, one "section" event
+    per result (in arrival order), then a "summary" event built from the
+    section digests. `results` may be any iterable, e.g. a ResultStream.
+    """
+    synth = IncrementalSynthesizer(metadata)
+    yield synth.header()
+    for r in results:
+        yield synth.add(r)
+    if summarize:
+        yield synth.finish()
+
+
+async def sse_synthesis(results: AsyncIterator[Dict], metadata: Dict = None) -> AsyncIterator[str]:
+    """Format report events for an async stream of results as Server-Sent Events."""
+    synth = IncrementalSynthesizer(metadata)
+    seq = 0
+
+    def _sse(event: Dict) -> str:
+        return f"id: {seq}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    yield _sse(synth.header())
+    async for r in results:
+        seq += 1
+        yield _sse(synth.add(r))
+    seq += 1
+    yield _sse(synth.finish())
+
 
 def synthesize_results(results: List[Dict], metadata: Dict = None) -> str:
     """
     Combine structured results from other agents into a human-friendly summary.
     Each element of results is expected to be a dict like:
       {"task": <task_text>, "agent": <agent_name>, "result": <string_or_struct>}
-    This function simply concatenates and lightly formats — replace with
-    an LLM summarizer for richer synthesis.
+    This function simply concatenates and lightly formats; use
+    stream_synthesis to emit sections while tasks are still running.
     """
-    metadata = metadata or {}
-    lines = []
-    header = "📘 Final Research Summary"
-    if metadata.get("query"):
-        header += f" — Query: {metadata['query']}"
-    lines.append(header)
-    lines.append("=" * len(header))
+    synth = IncrementalSynthesizer(metadata)
     for r in results:
-        task = r.get("task", "<unknown task>")
-        agent = r.get("agent", "unknown")
-        res = r.get("result", "")
-        lines.append(f"\nTask: {task}\nHandled by: {agent}\nResult:\n{res}\n")
-    return "\n".join(lines)
+        synth.add(r)
+    return synth.report()
@@ -0,0 +1,227 @@
+# agents/coordinator/tools/semantic_cache.py
+"""
+Semantic Prompt Cache
+Reuses decompositions for rephrased research queries.
+
+Incoming queries are embedded and matched against prior queries; when the
+nearest one is at least SEMANTIC_CACHE_THRESHOLD (cosine) similar, its
+decomposition is reused instead of calling the LLM. (Plans are not cached:
+the planner is a local computation over live telemetry, see
+task_prioritizer.py.)
+
+Nearest-neighbour lookup uses an hnswlib index when hnswlib is installed
+and an exact numpy scan otherwise. The cache holds at most
+SEMANTIC_CACHE_MAX_ENTRIES entries in a ring of slots: once full, each new
+entry takes the oldest one's slot (and its hnswlib label, updated in place),
+so eviction never rebuilds the index. Entries are appended to a JSONL file,
+which is rewritten with just the live entries once it holds twice as many
+records.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from agents.coordinator.config import (
+    SEMANTIC_CACHE_PATH, SEMANTIC_CACHE_MODEL, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES
+)
+from utils import metrics
+
+try:
+    import hnswlib
+except ImportError:  # exact numpy search is fine for a few thousand queries
+    hnswlib = None
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        path: str = SEMANTIC_CACHE_PATH,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.lock = threading.RLock()
+        self.queries: List[dict] = []          # slot -> {"query", "decomposition", "latency_ms", "created_at"}
+        self.vectors: Optional[np.ndarray] = None  # max_entries rows, the first len(queries) in use
+        self._next = 0                          # slot the next entry goes to once the ring is full
+        self._file_records = 0
+        self.loaded = False
+        self.available = True
+        self._model = None
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()  # normalized text -> embedding
+        self._ann = None
+        self.stats = {
+            "decompose": {"lookups": 0, "hits": 0, "saved_ms": 0.0},
+        }
+
+    # --- Embeddings ---
+    _RECENT_EMBEDDINGS = 256
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embedding of `text`; the one computed for a lookup is reused when the same query is stored."""
+        if not self.available:
+            return None
+        key = " ".join(text.lower().split())
+        with self.lock:
+            vec = self._recent.get(key)
+            if vec is not None:
+                self._recent.move_to_end(key)
+                return vec
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+            except Exception as e:
+                print(f"[WARN] Semantic cache disabled, embedding model unavailable: {e}")
+                self.available = False
+                return None
+        vec = np.asarray(self._model.encode([key], normalize_embeddings=True)[0], dtype=np.float32)
+        with self.lock:
+            self._recent[key] = vec
+            while len(self._recent) > self._RECENT_EMBEDDINGS:
+                self._recent.popitem(last=False)
+        return vec
+
+    # --- Index ---
+    def _build_index(self):
+        self._ann = None
+        if hnswlib is None or not self.queries:
+            return
+        self._ann = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+        self._ann.init_index(max_elements=self.max_entries, ef_construction=200, M=16)
+        self._ann.add_items(self.vectors[:len(self.queries)], np.arange(len(self.queries)))
+        self._ann.set_ef(50)
+
+    def _nearest(self, vec: np.ndarray):
+        if not self.queries:
+            return None, 0.0
+        if self._ann is not None:
+            labels, distances = self._ann.knn_query(vec, k=1)
+            # hnswlib "ip" distance is 1 - dot product
+            return int(labels[0][0]), float(1.0 - distances[0][0])
+        sims = self.vectors[:len(self.queries)] @ vec
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+    def _add(self, entry: dict, vec: np.ndarray):
+        """Put an entry in the next free slot, or over the oldest entry when full."""
+        if self.vectors is None:
+            self.vectors = np.zeros((self.max_entries, len(vec)), dtype=np.float32)
+        if len(self.queries) < self.max_entries:
+            slot = len(self.queries)
+            self.queries.append(entry)
+        else:
+            slot = self._next
+            self._next = (slot + 1) % self.max_entries
+            self.queries[slot] = entry
+        self.vectors[slot] = vec
+        if self._ann is not None:
+            # An existing label is updated in place
+            self._ann.add_items(vec[None, :], np.array([slot]))
+        elif hnswlib is not None:
+            self._build_index()
+
+    def _ordered(self) -> List[int]:
+        """Slots from oldest to newest entry."""
+        return list(range(self._next, len(self.queries))) + list(range(self._next))
+
+    # --- Persistence ---
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not os.path.exists(self.path):
+                return
+            records = []
+            with open(self.path, "r") as f:
+                for line in f:
+                    self._file_records += 1
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Records of other kinds (plans, from older versions) are ignored
+                    if rec.get("kind") == "query":
+                        records.append(rec)
+            for rec in records[-self.max_entries:]:
+                vec = np.asarray(rec.pop("embedding"), dtype=np.float32)
+                rec.pop("kind", None)
+                self._add(rec, vec)
+            self._maybe_compact()
+
+    def _append(self, record: dict):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self._file_records += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        """Rewrite the JSONL with only the live entries once evicted records make up half of it."""
+        if self._file_records <= 2 * self.max_entries:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for slot in self._ordered():
+                f.write(json.dumps({"kind": "query", **self.queries[slot],
+                                    "embedding": self.vectors[slot].tolist()}) + "\n")
+        os.replace(tmp, self.path)
+        self._file_records = len(self.queries)
+
+    # --- Public API ---
+    def lookup_decomposition(self, query: str) -> Optional[dict]:
+        """Return {"query", "decomposition", "similarity"} for a close-enough prior query, else None."""
+        self.load()
+        vec = self._embed(query)
+        if vec is None:
+            return None
+        with self.lock:
+            self.stats["decompose"]["lookups"] += 1
+            idx, sim = self._nearest(vec)
+            if idx is None or sim < self.threshold:
+                return None
+            entry = self.queries[idx]
+            self.stats["decompose"]["hits"] += 1
+            self.stats["decompose"]["saved_ms"] += entry.get("latency_ms", 0.0)
+            return {"query": entry["query"], "decomposition": entry["decomposition"], "similarity": round(sim, 4)}
+
+    def store_decomposition(self, query: str, decomposition: List[dict], latency_ms: float):
+        vec = self._embed(query)
+        if vec is None:
+            return
+        self.load()
+        with self.lock:
+            entry = {"query": query, "decomposition": decomposition, "latency_ms": latency_ms, "created_at": time.time()}
+            self._add(entry, vec)
+            self._append({"kind": "query", **entry, "embedding": vec.tolist()})
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            out = {"entries": len(self.queries), "threshold": self.threshold,
+                   "index": "hnsw" if self._ann is not None else "exact"}
+            for kind, s in self.stats.items():
+                out[kind] = {
+                    **s,
+                    "saved_ms": round(s["saved_ms"], 2),
+                    "hit_rate": round(s["hits"] / s["lookups"], 4) if s["lookups"] else 0.0,
+                }
+            return out
+
+
+semantic_cache = SemanticCache()
+
+metrics.Gauge(
+    "semantic_cache_hit_ratio", "Share of decomposition lookups answered by the semantic cache.", ["kind"],
+    fn=lambda: {(k,): v["hit_rate"] for k, v in semantic_cache.get_stats().items() if isinstance(v, dict)},
+)
+
+__all__ = ["SemanticCache", "semantic_cache"]
@@ -0,0 +1,276 @@
+# agents/coordinator/tools/session_cache.py
+"""
+Session Working Set
+Keeps what a research session has already fetched and worked out, so
+follow-up questions reuse it instead of re-scraping and re-analyzing.
+
+Per session id it holds:
+    documents   fetched documents and retrieved passages, with the topic
+                words of the query/subtask that brought them in
+    outputs     each agent's output for a subtask (insights, claims,
+                validated facts, ...), keyed by agent and normalized task
+
+Retrieval for a subtask is served from the session when enough cached
+documents were fetched for overlapping topics (SESSION_MATCH_*); analysis
+and validation outputs are reused for the same task text. Embeddings come
+along when the retriever returns them on passages.
+
+Sessions are kept in LRU order and expire after SESSION_CACHE_TTL_S idle
+seconds. The whole cache is capped at SESSION_CACHE_MAX_MB (sizes are
+JSON-encoded estimates). Over the cap, the least recently used sessions
+go first, then the oldest entries of the session being written.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from agents.coordinator.config import (
+    SESSION_CACHE_ENABLED, SESSION_CACHE_MAX_MB, SESSION_CACHE_MAX_SESSIONS, SESSION_CACHE_TTL_S,
+    SESSION_MATCH_MIN_OVERLAP, SESSION_MATCH_MIN_DOCS,
+)
+from agents.coordinator.tools.dag_executor import MERGE_KEYS, STAGE_AGENTS, _topic_words
+from utils import metrics, tracing
+
+RETRIEVAL_AGENT = STAGE_AGENTS[0]
+
+
+def _size(obj) -> int:
+    return len(json.dumps(obj, default=str))
+
+
+def _task_key(agent: str, task: str) -> str:
+    return agent + ":" + " ".join(task.lower().split())
+
+
+def _doc_key(doc) -> str:
+    if isinstance(doc, dict):
+        for key in ("url", "id", "source"):
+            if doc.get(key):
+                # Passages of one page differ by their text
+                text = str(doc.get("content") or doc.get("text") or "")
+                return f"{doc[key]}#{hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]}"
+    return hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SessionWorkingSet:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.documents: "OrderedDict[str, dict]" = OrderedDict()   # key -> {"doc", "words", "bytes"}
+        self.outputs: "OrderedDict[str, dict]" = OrderedDict()     # agent:task -> {"produced", "bytes"}
+        self.bytes = 0
+        self.created_at = self.used_at = time.time()
+        self.stats = {"lookups": 0, "hits": 0}
+
+    def add_documents(self, docs: List, topic: str) -> int:
+        words = sorted(_topic_words(topic))
+        added = 0
+        for doc in docs:
+            key = _doc_key(doc)
+            entry = self.documents.get(key)
+            if entry is not None:
+                entry["words"] = sorted(set(entry["words"]) | set(words))
+                self.documents.move_to_end(key)
+                continue
+            size = _size(doc)
+            self.documents[key] = {"doc": doc, "words": words, "bytes": size}
+            self.bytes += size
+            added += 1
+        return added
+
+    def documents_for(self, task: str) -> List:
+        """Cached documents fetched for topics covering enough of `task`'s topic words."""
+        words = _topic_words(task)
+        if not words:
+            return []
+        needed = max(1, round(len(words) * SESSION_MATCH_MIN_OVERLAP))
+        return [e["doc"] for e in self.documents.values() if len(words & set(e["words"])) >= needed]
+
+    def put_output(self, agent: str, task: str, produced: Dict[str, list]):
+        key = _task_key(agent, task)
+        old = self.outputs.pop(key, None)
+        if old is not None:
+            self.bytes -= old["bytes"]
+        size = _size(produced)
+        self.outputs[key] = {"produced": produced, "bytes": size}
+        self.bytes += size
+
+    def get_output(self, agent: str, task: str) -> Optional[Dict[str, list]]:
+        entry = self.outputs.get(_task_key(agent, task))
+        if entry is None:
+            return None
+        self.outputs.move_to_end(_task_key(agent, task))
+        return entry["produced"]
+
+    def evict_oldest(self) -> bool:
+        """Drop the least recently used entry (documents first); False when empty."""
+        for store in (self.documents, self.outputs):
+            if store:
+                _, entry = store.popitem(last=False)
+                self.bytes -= entry["bytes"]
+                return True
+        return False
+
+    def snapshot(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "documents": len(self.documents),
+            "outputs": len(self.outputs),
+            "bytes": self.bytes,
+            "idle_s": round(time.time() - self.used_at, 1),
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / self.stats["lookups"], 4) if self.stats["lookups"] else 0.0,
+        }
+
+
+class SessionCache:
+    def __init__(
+        self,
+        max_bytes: int = int(SESSION_CACHE_MAX_MB * 1024 * 1024),
+        max_sessions: int = SESSION_CACHE_MAX_SESSIONS,
+        ttl: float = SESSION_CACHE_TTL_S,
+    ):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        self.sessions: "OrderedDict[str, SessionWorkingSet]" = OrderedDict()
+        self.stats = {"lookups": 0, "hits": 0, "evicted_sessions": 0, "evicted_entries": 0}
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        while self.sessions:
+            sid, ws = next(iter(self.sessions.items()))
+            if ws.used_at >= cutoff and len(self.sessions) <= self.max_sessions:
+                break
+            del self.sessions[sid]
+            self.stats["evicted_sessions"] += 1
+
+    def _enforce_cap(self, keep: SessionWorkingSet):
+        total = sum(ws.bytes for ws in self.sessions.values())
+        for sid in list(self.sessions):
+            if total <= self.max_bytes:
+                return
+            if self.sessions[sid] is keep:
+                continue
+            total -= self.sessions.pop(sid).bytes
+            self.stats["evicted_sessions"] += 1
+        while total > self.max_bytes:
+            before = keep.bytes
+            if not keep.evict_oldest():
+                break
+            total -= before - keep.bytes
+            self.stats["evicted_entries"] += 1
+
+    def session(self, session_id: Optional[str]) -> Optional[SessionWorkingSet]:
+        """The session's working set (created on first use); None without a session id."""
+        if not SESSION_CACHE_ENABLED or not session_id:
+            return None
+        with self.lock:
+            ws = self.sessions.get(session_id)
+            if ws is None:
+                ws = self.sessions[session_id] = SessionWorkingSet(session_id)
+            self.sessions.move_to_end(session_id)
+            ws.used_at = time.time()
+            self._expire()
+            return ws
+
+    def add_documents(self, session_id: Optional[str], docs: List, topic: str) -> int:
+        ws = self.session(session_id)
+        if ws is None or not docs:
+            return 0
+        with self.lock:
+            added = ws.add_documents(docs, topic)
+            self._enforce_cap(ws)
+            return added
+
+    def lookup(self, session_id: Optional[str], agent: str, task: str) -> Optional[Dict[str, list]]:
+        """
+        Output the session already has for `agent` on `task`, or None.
+        Retrieval is answered from cached documents on overlapping topics.
+        """
+        ws = self.session(session_id)
+        if ws is None:
+            return None
+        with self.lock:
+            self.stats["lookups"] += 1
+            ws.stats["lookups"] += 1
+            produced = ws.get_output(agent, task)
+            if produced is None and agent == RETRIEVAL_AGENT:
+                docs = ws.documents_for(task)
+                if len(docs) >= SESSION_MATCH_MIN_DOCS:
+                    produced = {"documents": docs}
+            if produced is None:
+                return None
+            self.stats["hits"] += 1
+            ws.stats["hits"] += 1
+            return {k: list(v) for k, v in produced.items()}
+
+    def store(self, session_id: Optional[str], agent: str, task: str, produced: Dict[str, list]):
+        ws = self.session(session_id)
+        if ws is None:
+            return
+        with self.lock:
+            if agent == RETRIEVAL_AGENT:
+                # Documents are matched by topic, so related subtasks can reuse them
+                ws.add_documents(produced.get("documents") or [], task)
+            else:
+                ws.put_output(agent, task, {k: v for k, v in produced.items() if v})
+            self._enforce_cap(ws)
+
+    def wrap(self, session_id: Optional[str], agent: str, handler: Callable[[dict], dict]) -> Callable[[dict], dict]:
+        """
+        Graph handler that answers from the session when it can and records
+        what the handler produces otherwise (for DAG execution: the branch
+        state carries the subtask in "current_task").
+        """
+        if not SESSION_CACHE_ENABLED or not session_id:
+            return handler
+
+        def cached_handler(branch: dict) -> dict:
+            task = branch.get("current_task") or ""
+            cached = self.lookup(session_id, agent, task)
+            current = tracing.current_span()
+            if current is not None:
+                current.set(session_cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                out = dict(branch)
+                for key, items in cached.items():
+                    out[key] = list(branch.get(key) or []) + items
+                return out
+            base_len = {k: len(branch.get(k) or []) for k in MERGE_KEYS}
+            out = handler(branch) or branch
+            self.store(session_id, agent, task, {k: list(out.get(k) or [])[base_len[k]:] for k in MERGE_KEYS})
+            return out
+
+        return cached_handler
+
+    def clear(self, session_id: str) -> bool:
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def get_stats(self, session_id: Optional[str] = None) -> dict:
+        with self.lock:
+            if session_id:
+                ws = self.sessions.get(session_id)
+                return ws.snapshot() if ws is not None else {"session_id": session_id, "documents": 0, "outputs": 0}
+            return {
+                **self.stats,
+                "sessions": len(self.sessions),
+                "bytes": sum(ws.bytes for ws in self.sessions.values()),
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self.stats["hits"] / self.stats["lookups"], 4) if self.stats["lookups"] else 0.0,
+            }
+
+
+session_cache = SessionCache()
+
+metrics.Gauge("session_cache_bytes", "Estimated size of all session working sets.",
+              fn=lambda: session_cache.get_stats()["bytes"])
+metrics.Gauge("session_cache_hit_ratio", "Share of subtasks answered from the session working set.",
+              fn=lambda: session_cache.get_stats()["hit_rate"])
+
+__all__ = ["SessionCache", "SessionWorkingSet", "session_cache"]
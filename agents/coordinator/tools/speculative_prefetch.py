@@ -0,0 +1,127 @@
+# agents/coordinator/tools/speculative_prefetch.py
+"""
+Speculative Retrieval Prefetch
+Starts retrieval for a query while it is still being decomposed.
+
+The raw query is already a good search signal, so `start(query)` sends
+the query and a few cheap keyword expansions to the retrieval agent
+straight away. When the plan arrives, `attach(subtasks)` gives each
+subtask the speculative results that match it ("prefetched" key) and
+cancels searches no subtask needs. Searches still running after a short
+grace period (PREFETCH_JOIN_TIMEOUT) are cancelled too. The DAG executor
+answers a subtask's retrieval from its prefetched documents instead of
+calling the scraper, so a hit saves a full retrieval round trip.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import wait
+from typing import Dict, List
+
+from agents.coordinator.config import (
+    PREFETCH_ENABLED, PREFETCH_MAX_QUERIES, PREFETCH_TOP_K, PREFETCH_JOIN_TIMEOUT, RPC_ENCODING,
+)
+from agents.coordinator.tools.agent_rpc import search_docs, search_payload, tool_url
+from agents.coordinator.tools.dag_executor import _topic_words
+from utils.logger import get_logger
+from utils.rpc_client import get_client, submit
+
+logger = get_logger("speculative_prefetch")
+
+_stats = {"runs": 0, "started": 0, "used": 0, "cancelled": 0, "late": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def expand_query(query: str, max_queries: int = PREFETCH_MAX_QUERIES) -> List[str]:
+    """The query itself, then its clauses, then its content words as one keyword query."""
+    query = " ".join(query.split())
+    candidates = [query]
+    candidates += [p.strip() for p in re.split(r"[?;,]|\band\b|\bor\b", query, flags=re.IGNORECASE)]
+    keywords = " ".join(sorted(_topic_words(query)))
+    candidates.append(keywords)
+    out, seen = [], set()
+    for c in candidates:
+        if len(c) > 3 and c.lower() not in seen:
+            seen.add(c.lower())
+            out.append(c)
+    return out[:max_queries]
+
+
+class SpeculativeRetrieval:
+    def __init__(self, query: str, top_k: int = PREFETCH_TOP_K):
+        self.query = query
+        self.started_at = time.perf_counter()
+        self.futures = {}
+        url = tool_url("retrieval", "batch")
+        for q in expand_query(query):
+            # Searches are idempotent, so they may be hedged
+            self.futures[q] = submit(get_client().call(url, search_payload(q, top_k), encoding=RPC_ENCODING, hedge=True))
+        with _stats_lock:
+            _stats["runs"] += 1
+            _stats["started"] += len(self.futures)
+
+    def cancel(self):
+        cancelled = sum(1 for f in self.futures.values() if not f.done() and f.cancel())
+        with _stats_lock:
+            _stats["cancelled"] += cancelled
+
+    def attach(self, subtasks: List[Dict], timeout: float = PREFETCH_JOIN_TIMEOUT) -> List[Dict]:
+        """
+        Merge speculative results into subtasks (in place) and cancel unused work.
+        Each speculative query goes to the subtask sharing the most topic words
+        with it; queries matching no subtask are cancelled.
+        """
+        words = [_topic_words(t["task"] if isinstance(t, dict) else str(t)) for t in subtasks]
+        assigned: Dict[str, int] = {}
+        for q in self.futures:
+            qwords = _topic_words(q)
+            overlaps = [len(qwords & w) for w in words]
+            if overlaps and max(overlaps) > 0:
+                assigned[q] = overlaps.index(max(overlaps))
+            elif not self.futures[q].done() and self.futures[q].cancel():
+                with _stats_lock:
+                    _stats["cancelled"] += 1
+
+        wait([self.futures[q] for q in assigned], timeout=timeout)
+        used = late = failed = 0
+        for q, idx in assigned.items():
+            future = self.futures[q]
+            if not future.done():
+                future.cancel()
+                late += 1
+                continue
+            try:
+                docs = search_docs(future.result())
+            except Exception as e:
+                logger.warning(f"Speculative search failed for '{q}': {e}")
+                failed += 1
+                continue
+            if isinstance(subtasks[idx], dict) and docs:
+                subtasks[idx].setdefault("prefetched", []).extend(
+                    dict(d, speculative_query=q) for d in docs
+                )
+                used += 1
+        with _stats_lock:
+            _stats["used"] += used
+            _stats["late"] += late
+            _stats["failed"] += failed
+        return subtasks
+
+
+def start(query: str):
+    """Start speculative retrieval for `query`; returns None when prefetch is disabled."""
+    if not PREFETCH_ENABLED or not query:
+        return None
+    try:
+        return SpeculativeRetrieval(query)
+    except Exception as e:
+        logger.warning(f"Speculative prefetch not started: {e}")
+        return None
+
+
+def get_stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    out["use_rate"] = round(out["used"] / out["started"], 4) if out["started"] else 0.0
+    return out
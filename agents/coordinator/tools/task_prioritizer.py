@@ -1,71 +1,199 @@
 # agents/coordinator/tools/task_prioritizer.py
 """
-LLM-powered Task Prioritizer
-Uses OpenAI's reasoning to determine optimal execution order for subtasks.
-Falls back to heuristic prioritization if API fails.
+Cost- and Latency-aware Task Prioritizer
+Plans execution order for subtasks from historical run telemetry.
+
+Each subtask is mapped to an agent and its dependencies (see
+dag_executor.build_dag) and annotated with the estimated latency, tokens
+and cost of that agent's past runs. Tasks are ordered by critical path:
+the longest estimated chain from a task to the end of the plan goes
+first, so the slow branches start early. Under a per-query time or cost
+budget, the lowest-value tasks that nothing else depends on are deferred
+until the plan fits: they are scheduled after everything else and only
+start once the in-budget tasks are done and the request deadline allows.
 """
 
-import os
-from typing import List
-from openai import OpenAI
-from dotenv import load_dotenv
-load_dotenv()  # This will automatically load OPENAI_API_KEY
+import heapq
+from typing import Dict, List, Optional
 
+from agents.coordinator.config import (
+    EXECUTION_MODE, MAX_PARALLEL_TASKS, PLAN_TIME_BUDGET_S, PLAN_COST_BUDGET_USD,
+)
+from agents.coordinator.tools.dag_executor import build_dag
+from agents.coordinator.tools.task_telemetry import task_telemetry
 
-# Initialize OpenAI client (expects OPENAI_API_KEY in env)
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def prioritize_tasks(sub_tasks: List[str]) -> List[str]:
+def _task_text(t) -> str:
+    return t["task"] if isinstance(t, dict) else str(t)
+
+
+def _rank(nodes: Dict[int, dict], dependents: Dict[int, List[int]]) -> Dict[int, float]:
+    """Upward rank: a task's latency plus the longest chain of kept tasks depending on it."""
+    rank: Dict[int, float] = {}
+
+    def _visit(i: int) -> float:
+        if i not in rank:
+            rank[i] = 0.0  # guards against cycles in explicit depends_on
+            below = [_visit(d) for d in dependents[i] if d in nodes]
+            rank[i] = nodes[i]["est_latency_s"] + max(below, default=0.0)
+        return rank[i]
+
+    for i in nodes:
+        _visit(i)
+    return rank
+
+
+def _schedule(nodes: Dict[int, dict], dependents: Dict[int, List[int]], rank: Dict[int, float], workers: int):
+    """List-schedule kept tasks on `workers` slots by rank; returns (order, makespan)."""
+    indegree = {i: sum(1 for d in n["depends_on"] if d in nodes) for i, n in nodes.items()}
+    ready = [(-rank[i], i, 0.0) for i, deg in indegree.items() if deg == 0]
+    heapq.heapify(ready)
+    slots = [0.0] * max(1, workers)
+    finish: Dict[int, float] = {}
+    order: List[int] = []
+    while ready:
+        _, i, ready_at = heapq.heappop(ready)
+        slot = min(range(len(slots)), key=slots.__getitem__)
+        start = max(slots[slot], ready_at)
+        finish[i] = slots[slot] = start + nodes[i]["est_latency_s"]
+        order.append(i)
+        for j in dependents[i]:
+            if j in nodes and j not in finish:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    heapq.heappush(ready, (-rank[j], j, max(finish[d] for d in nodes[j]["depends_on"] if d in nodes)))
+    # Anything left is part of a dependency cycle; run it last, in input order
+    order += [i for i in nodes if i not in finish]
+    return order, max(finish.values(), default=0.0)
+
+
+def plan_tasks(
+    sub_tasks: List,
+    time_budget: Optional[float] = None,
+    cost_budget: Optional[float] = None,
+    max_parallel: Optional[int] = None,
+) -> Dict:
     """
-    Uses OpenAI to reorder tasks in the most logical order.
-    If the model fails, falls back to heuristic sorting.
+    Build an execution plan for subtasks.
+
+    Args:
+        sub_tasks: task strings or {"task": ...} dicts (from decompose_query)
+        time_budget: seconds allowed for the whole plan (default PLAN_TIME_BUDGET_S, 0 = none)
+        cost_budget: USD allowed for the whole plan (default PLAN_COST_BUDGET_USD, 0 = none)
+        max_parallel: concurrent tasks assumed when estimating wall time
+            (default MAX_PARALLEL_TASKS in parallel mode, else 1)
+
+    Returns:
+        {"tasks": [annotated task dicts in execution order],
+         "deferred": [annotated task dicts left out to meet the budget],
+         "critical_path": [task strings], "estimated_latency_s", "estimated_cost_usd"}
     """
-    if not sub_tasks:
-        return []
+    time_budget = PLAN_TIME_BUDGET_S if time_budget is None else time_budget
+    cost_budget = PLAN_COST_BUDGET_USD if cost_budget is None else cost_budget
+    if max_parallel is None:
+        max_parallel = MAX_PARALLEL_TASKS if EXECUTION_MODE == "parallel" else 1
 
-    prompt = f"""
-You are an expert research coordinator.
-Given the following subtasks, reorder them in the sequence they should logically be executed 
-to efficiently complete a research query.
+    dag = build_dag(sub_tasks)
+    nodes: Dict[int, dict] = {}
+    for n, original in zip(dag, sub_tasks):
+        est = task_telemetry.estimate(n["agent"])
+        nodes[n["id"]] = {
+            **(original if isinstance(original, dict) else {}),
+            "task": n["task"],
+            "agent": n["agent"],
+            "depends_on": [d for d in n["depends_on"] if isinstance(d, int)],
+            "est_latency_s": est["latency_s"],
+            "est_tokens": est["tokens"],
+            "est_cost_usd": est["cost_usd"],
+        }
+    dependents: Dict[int, List[int]] = {i: [] for i in nodes}
+    for i, n in nodes.items():
+        for d in n["depends_on"]:
+            if d in dependents:
+                dependents[d].append(i)
 
-Return the reordered list ONLY, one task per line, in order of priority (highest first).
+    # Value of a task: itself plus every task that (transitively) needs its output
+    def _reach(i: int, seen: set) -> set:
+        for d in dependents[i]:
+            if d not in seen:
+                seen.add(d)
+                _reach(d, seen)
+        return seen
 
-Subtasks:
-{chr(10).join(f"- {t}" for t in sub_tasks)}
-"""
+    for i, n in nodes.items():
+        n["value"] = 1 + len(_reach(i, set()) - {i})
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert research planner."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-        )
-
-        output = response.choices[0].message.content.strip()
-        lines = [l.strip("-• ").strip() for l in output.splitlines() if l.strip()]
-        # Filter lines that match something from original subtasks (avoid hallucinations)
-        normalized = {t.lower(): t for t in sub_tasks}
-        ordered = []
-        for l in lines:
-            key = l.lower()
-            # match by substring (since model may slightly rephrase)
-            match = next((t for t in sub_tasks if l.lower() in t.lower() or t.lower() in l.lower()), None)
-            if match and match not in ordered:
-                ordered.append(match)
-
-        # Append any missing tasks that the LLM forgot
-        for t in sub_tasks:
-            if t not in ordered:
-                ordered.append(t)
+    kept = dict(nodes)
+    deferred: List[int] = []
+    while True:
+        rank = _rank(kept, dependents)
+        order, makespan = _schedule(kept, dependents, rank, max_parallel)
+        cost = sum(n["est_cost_usd"] for n in kept.values())
+        over_time = time_budget > 0 and makespan > time_budget
+        over_cost = cost_budget > 0 and cost > cost_budget
+        if not (over_time or over_cost) or len(kept) <= 1:
+            break
+        # Only tasks nothing kept depends on can go; cheapest value per unit of the exceeded budget first
+        leaves = [i for i in kept if not any(d in kept for d in dependents[i])]
+        metric = "est_latency_s" if over_time and not over_cost else "est_cost_usd"
+        victim = min(leaves, key=lambda i: (kept[i]["value"] / max(kept[i][metric], 1e-9), -i))
+        deferred.append(victim)
+        del kept[victim]
+
+    by_id = {i: n["task"] for i, n in nodes.items()}
+    critical, current = [], max(kept, key=lambda i: (rank[i], -i), default=None)
+    # Follow the highest-ranked chain down from the task that starts it
+    while current is not None:
+        critical.append(by_id[current])
+        nxt = [d for d in dependents[current] if d in kept]
+        current = max(nxt, key=lambda i: rank[i], default=None)
+
+    def _dependencies_first(ids: List[int]) -> List[int]:
+        """`ids` ordered so each task comes after the tasks among them it depends on (else submission order)."""
+        pending, out = set(ids), []
+        while pending:
+            ready = [i for i in pending if not any(d in pending for d in nodes[i]["depends_on"])]
+            # A dependency cycle leaves nothing ready: break it at the earliest task
+            nxt = min(ready or pending)
+            out.append(nxt)
+            pending.discard(nxt)
+        return out
+
+    def _public(i: int) -> dict:
+        n = dict(nodes[i])
+        n["depends_on"] = [by_id[d] for d in n["depends_on"]]
+        return n
+
+    return {
+        "tasks": [_public(i) for i in order],
+        "deferred": [{**_public(i), "deferred": True} for i in _dependencies_first(deferred)],
+        "critical_path": critical,
+        "estimated_latency_s": round(makespan, 3),
+        "estimated_cost_usd": round(cost, 6),
+    }
 
-        return ordered
 
+def prioritize_tasks(sub_tasks: List[str]) -> List[str]:
+    """
+    Order subtasks for execution (critical path first, within budget, then
+    the deferred tasks flagged "deferred"). Dict subtasks come back annotated
+    with agent, depends_on and estimates; plain strings come back as strings.
+    Falls back to heuristic sorting if planning fails.
+    """
+    if not sub_tasks:
+        return []
+    try:
+        plan = plan_tasks(sub_tasks)
     except Exception as e:
-        print(f"[WARN] LLM prioritization failed ({e}); falling back to heuristic ordering.")
+        print(f"[WARN] Task planning failed ({e}); falling back to heuristic ordering.")
         return _heuristic_prioritize(sub_tasks)
+    if plan["deferred"]:
+        print(f"[PLAN] Deferred {len(plan['deferred'])} task(s) to stay within budget: "
+              + "; ".join(t["task"] for t in plan["deferred"]))
+    ordered = plan["tasks"] + plan["deferred"]
+    if all(isinstance(t, dict) for t in sub_tasks):
+        return ordered
+    return [t["task"] for t in ordered]
 
 
 def _heuristic_prioritize(sub_tasks: List[str]) -> List[str]:
@@ -80,6 +208,6 @@ def _heuristic_prioritize(sub_tasks: List[str]) -> List[str]:
             return 2
         return 3
 
-    scored = [(score_task(t["task"]), t) for t in sub_tasks]
+    scored = [(score_task(_task_text(t)), t) for t in sub_tasks]
     scored.sort(key=lambda x: x[0])
     return [t for _, t in scored]
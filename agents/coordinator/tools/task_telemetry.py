@@ -0,0 +1,117 @@
+# agents/coordinator/tools/task_telemetry.py
+"""
+Task Telemetry
+Historical latency and token usage per agent, used by the planner to
+estimate what a subtask will cost before it runs.
+
+Every finished task is appended to a JSONL log and folded into an
+exponentially weighted moving average per agent, so recent runs count
+most. Agents without history fall back to TASK_DEFAULT_ESTIMATES.
+Measurements come from the DAG executor, which process_query runs for
+every query. The log keeps the last TASK_TELEMETRY_MAX_RECORDS records:
+once it holds twice as many it is rewritten with just those. Older
+records weigh next to nothing in the moving average anyway.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from agents.coordinator.config import (
+    TASK_TELEMETRY_PATH, TASK_TELEMETRY_MAX_RECORDS, TASK_DEFAULT_ESTIMATES, TASK_COST_PER_1K_TOKENS,
+)
+
+EWMA_ALPHA = 0.2
+_FALLBACK = {"latency_s": 10.0, "tokens": 2000}
+
+
+class TaskTelemetry:
+    def __init__(self, path: str = TASK_TELEMETRY_PATH, alpha: float = EWMA_ALPHA,
+                 max_records: int = TASK_TELEMETRY_MAX_RECORDS):
+        self.path = path
+        self.alpha = alpha
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.agents: Dict[str, dict] = {}   # agent -> {"latency_s", "tokens", "samples"}
+        self.recent: deque = deque(maxlen=max_records)  # records kept when the log is compacted
+        self._file_records = 0
+        self.loaded = False
+
+    def _fold(self, agent: str, latency_s: float, tokens: Optional[int]):
+        entry = self.agents.get(agent)
+        if entry is None:
+            prior = TASK_DEFAULT_ESTIMATES.get(agent, _FALLBACK)
+            self.agents[agent] = {"latency_s": latency_s, "tokens": tokens if tokens is not None else prior["tokens"],
+                                  "samples": 1}
+            return
+        entry["latency_s"] += self.alpha * (latency_s - entry["latency_s"])
+        if tokens is not None:
+            entry["tokens"] += self.alpha * (tokens - entry["tokens"])
+        entry["samples"] += 1
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.loaded = True
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "r") as f:
+                for line in f:
+                    self._file_records += 1
+                    try:
+                        rec = json.loads(line)
+                        self._fold(rec["agent"], rec["latency_s"], rec.get("tokens"))
+                    except (ValueError, KeyError):
+                        continue
+                    self.recent.append(rec)
+            self._maybe_compact()
+
+    def record(self, agent: str, latency_s: float, tokens: Optional[int] = None):
+        """Add one finished task's measurements (tokens may be unknown)."""
+        self.load()
+        rec = {"agent": agent, "latency_s": round(latency_s, 4), "tokens": tokens, "time": time.time()}
+        with self.lock:
+            self._fold(agent, latency_s, tokens)
+            self.recent.append(rec)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(rec) + "\n")
+            self._file_records += 1
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        """Rewrite the JSONL with only the most recent records once it holds twice as many (under self.lock)."""
+        if self._file_records <= 2 * self.max_records:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for rec in self.recent:
+                f.write(json.dumps(rec) + "\n")
+        os.replace(tmp, self.path)
+        self._file_records = len(self.recent)
+
+    def estimate(self, agent: str) -> dict:
+        """{"latency_s", "tokens", "cost_usd", "samples"} for one task on `agent`."""
+        self.load()
+        with self.lock:
+            entry = self.agents.get(agent) or {**TASK_DEFAULT_ESTIMATES.get(agent, _FALLBACK), "samples": 0}
+            tokens = int(round(entry["tokens"]))
+            return {
+                "latency_s": round(entry["latency_s"], 3),
+                "tokens": tokens,
+                "cost_usd": round(tokens / 1000 * TASK_COST_PER_1K_TOKENS, 6),
+                "samples": entry["samples"],
+            }
+
+    def get_stats(self) -> dict:
+        self.load()
+        with self.lock:
+            return {a: {k: round(v, 3) if isinstance(v, float) else v for k, v in e.items()}
+                    for a, e in self.agents.items()}
+
+
+task_telemetry = TaskTelemetry()
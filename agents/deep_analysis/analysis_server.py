@@ -1,7 +1,12 @@
 import json
-import os
-from openai import OpenAI
+import sys
+from fastmcp import FastMCP
 from agents.deep_analysis.config import MODEL_NAME
+from utils import metrics
+from utils.llm_gateway import chat
+from utils.logger import configure_logging, get_logger
+from utils.server import mount_tools, serve
+from utils.tool_router import ToolRouter
 
 # Import MCP tools
 from agents.deep_analysis.tools.comparative_analysis_tool import comparative_analysis_tool
@@ -9,13 +14,15 @@ from agents.deep_analysis.tools.trend_analysis_tool import trend_analysis_tool
 from agents.deep_analysis.tools.causal_reasoning_tool import causal_reasoning_tool
 from agents.deep_analysis.tools.statistical_analysis_tool import statistical_analysis_tool
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+configure_logging()
+logger = get_logger("deep_analysis")
+
+app = FastMCP("deep_analysis_agent")
+metrics.mount(app)
 
 
 # --- LLM Decision Logic ---
-def decide_tool(query: str) -> str:
+def _llm_decide_tool(query: str) -> str:
     """
     Uses LLM reasoning to decide which analysis tool should be called
     based on the user's query.
@@ -31,7 +38,7 @@ def decide_tool(query: str) -> str:
     Based on the user's query, decide which ONE tool is most appropriate.
     Respond with only the tool name (no explanation).
     """
-    response = client.chat.completions.create(
+    response = chat(
         model=MODEL_NAME,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -39,7 +46,51 @@ def decide_tool(query: str) -> str:
         ],
         temperature=0
     )
-    return response.choices[0].message["content"].strip()
+    return response.strip()
+
+
+# Local routing: keyword rules, then example centroids, then the LLM
+ROUTES = {
+    "comparative_analysis_tool": {
+        "keywords": ["compare", "comparison", "versus", "vs", "difference", "differences", "similar", "similarity", "similarities", "contrast"],
+        "examples": [
+            "Compare these two reports on AI adoption",
+            "What are the differences between the documents?",
+            "How similar are these articles?",
+        ],
+    },
+    "trend_analysis_tool": {
+        "keywords": ["trend", "trends", "over time", "growth", "pattern", "patterns", "year", "years", "timeline", "adoption rate"],
+        "examples": [
+            "How has AI adoption changed over the years?",
+            "Detect patterns in these yearly reports",
+            "Show the trend of renewable energy usage",
+        ],
+    },
+    "causal_reasoning_tool": {
+        "keywords": ["cause", "causes", "caused", "causal", "effect", "effects", "because", "leads to", "due to", "why", "impact of"],
+        "examples": [
+            "Find causal relationships between technology and performance",
+            "What caused the increase in flooding?",
+            "Why did employment rise after economic growth?",
+        ],
+    },
+    "statistical_analysis_tool": {
+        "keywords": ["statistic", "statistics", "statistical", "average", "mean", "median", "percent", "percentage", "numbers", "quantitative", "variance"],
+        "examples": [
+            "Compute the average revenue from these figures",
+            "Give me statistics on the numbers in these documents",
+            "Perform a quantitative analysis of profits",
+        ],
+    },
+}
+
+router = ToolRouter("deep_analysis", ROUTES, llm_fallback=_llm_decide_tool)
+
+
+def decide_tool(query: str) -> str:
+    """Pick the analysis tool for a query, calling the LLM only when local routing is unsure."""
+    return router.route(query)
 
 
 def extract_keyword(query: str) -> str:
@@ -51,7 +102,7 @@ def extract_keyword(query: str) -> str:
 # --- Main Deep Analysis Runner ---
 def run_deep_analysis(query: str, documents: list):
     tool_name = decide_tool(query)
-    print(f"\n[Agent 3 Decision] → Selected Tool: {tool_name}\n")
+    logger.info(f"[Agent 3 Decision] Selected tool: {tool_name}")
 
     if tool_name == "comparative_analysis_tool":
         result = comparative_analysis_tool.func(documents)
@@ -68,6 +119,22 @@ def run_deep_analysis(query: str, documents: list):
     return {"selected_tool": tool_name, "result": result}
 
 
+@app.tool("deep_analysis")
+def deep_analysis(query: str, documents: list) -> dict:
+    """Runs the analysis tool best suited to the query over the given documents."""
+    return run_deep_analysis(query, documents)
+
+
+@app.tool("router_stats")
+def router_stats() -> dict:
+    """Per-route decision counts, latency and accuracy of the local tool router."""
+    return router.stats()
+
+
+# Plain HTTP entry point for the coordinator (agent_rpc)
+mount_tools(app, {"run_deep_analysis": run_deep_analysis})
+
+
 # --- Individual tool demo runners ---
 def test_comparative_analysis():
     print("\n🧩 Running Comparative Analysis Tool Example")
@@ -123,13 +190,18 @@ def test_auto_decision():
 
 # --- Entry Point ---
 if __name__ == "__main__":
-    print("\n===== Deep Analysis Agent Tool Demos =====\n")
+    if "--demo" in sys.argv:
+        print("\n===== Deep Analysis Agent Tool Demos =====\n")
 
-    # Run each tool test individually
-    test_comparative_analysis()
-    test_trend_analysis()
-    test_causal_reasoning()
-    test_statistical_analysis()
+        # Run each tool test individually
+        test_comparative_analysis()
+        test_trend_analysis()
+        test_causal_reasoning()
+        test_statistical_analysis()
 
-    # Test LLM-powered dynamic tool selection
-    test_auto_decision()
+        # Test LLM-powered dynamic tool selection
+        test_auto_decision()
+    else:
+        print("Starting Deep Analysis MCP Agent...")
+        # The coordinator reaches this agent over HTTP (AGENT_ENDPOINTS["analysis"])
+        serve(app, host="0.0.0.0", port=8001)
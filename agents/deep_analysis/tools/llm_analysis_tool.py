@@ -1,19 +1,17 @@
 # agents/fact_validation/tools/llm_analysis_tool.py
 from fastmcp import FastMCP
 from typing import Optional
-from openai import OpenAI
 from dotenv import load_dotenv
-import os
+from utils.llm_gateway import chat
+from utils.tracing import traced
 
 # Load environment variables
 load_dotenv()
 
 mcp = FastMCP("llm-analysis-tool")
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("llm_analysis", kind="tool")
 def _llm_analysis_impl(prompt: str, model: str = "gpt-4o-mini") -> str:
     """
     Uses an LLM to provide deep analytical insights or reasoning based on a prompt.
@@ -22,11 +20,10 @@ def _llm_analysis_impl(prompt: str, model: str = "gpt-4o-mini") -> str:
         return "Please provide a valid analysis prompt."
     
     try:
-        response = client.chat.completions.create(
+        return chat(
             model=model,
             messages=[{"role": "user", "content": f"Analyze this deeply:\n{prompt}"}]
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error during LLM analysis: {str(e)}"
 
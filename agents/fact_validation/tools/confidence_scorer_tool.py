@@ -1,11 +1,13 @@
 # agents/fact_validation/tools/confidence_scorer_tool.py
 from fastmcp import FastMCP
+from utils.tracing import traced
 from typing import List
 import statistics
 
 mcp = FastMCP("confidence-scorer-tool")
 
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("confidence_scorer", kind="tool")
 def _confidence_scorer_impl(scores: List[int]) -> str:
     """
     Combines credibility and consistency scores into a confidence metric.
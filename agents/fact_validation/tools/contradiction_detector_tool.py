@@ -1,10 +1,12 @@
 # agents/fact_validation/tools/contradiction_detector_tool.py
 from fastmcp import FastMCP
+from utils.tracing import traced
 from typing import List
 
 mcp = FastMCP("contradiction-detector-tool")
 
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("contradiction_detector", kind="tool")
 def _contradiction_detector_impl(statements: List[str]) -> str:
     """
     Detects simple contradictions based on negation or opposing sentiment patterns.
@@ -1,10 +1,12 @@
 # agents/fact_validation/tools/cross_reference_tool.py
 from fastmcp import FastMCP
+from utils.tracing import traced
 from typing import List
 
 mcp = FastMCP("cross-reference-tool")
 
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("cross_reference", kind="tool")
 def _cross_reference_impl(claims: List[str]) -> str:
     """
     Cross-checks claims across multiple documents and identifies alignment or conflict.
@@ -1,18 +1,16 @@
 # agents/fact_validation/tools/llm_validation_tool.py
 from fastmcp import FastMCP
-from openai import OpenAI
 from dotenv import load_dotenv
-import os
+from utils.llm_gateway import chat
+from utils.tracing import traced
 
 # Load environment variables
 load_dotenv()
 
 mcp = FastMCP("llm-validation-tool")
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("llm_validation", kind="tool")
 def _llm_validation_impl(query: str) -> str:
     """
     Uses an LLM to perform holistic fact-checking and credibility reasoning.
@@ -21,13 +19,12 @@ def _llm_validation_impl(query: str) -> str:
         return "Please provide a query or claim for validation."
 
     try:
-        response = client.chat.completions.create(
+        return chat(
             model="gpt-4o-mini",
             messages=[
                 {"role": "user", "content": f"Fact-check this statement and explain your reasoning:\n{query}"}
             ]
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error during LLM validation: {str(e)}"
 
@@ -1,5 +1,6 @@
 # agents/fact_validation/tools/source_credibility_tool.py
 from fastmcp import FastMCP
+from utils.tracing import traced
 from typing import List
 from dotenv import load_dotenv
 import os
@@ -9,7 +10,8 @@ load_dotenv()
 
 mcp = FastMCP("source-credibility-tool")
 
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("source_credibility", kind="tool")
 def _source_credibility_impl(sources: List[str]) -> str:
     """
     Evaluates the trustworthiness and credibility of information sources.
@@ -1,7 +1,12 @@
 # agents/fact_validation/validation_server.py
-import os
-from openai import OpenAI
+import sys
+from fastmcp import FastMCP
 from dotenv import load_dotenv
+from utils import metrics
+from utils.llm_gateway import chat
+from utils.server import mount_tools, serve
+from utils.tool_router import ToolRouter
+from utils.logger import configure_logging, get_logger
 from agents.fact_validation.tools.source_credibility_tool import run as source_credibility_run
 from agents.fact_validation.tools.cross_reference_tool import run as cross_reference_run
 from agents.fact_validation.tools.confidence_scorer_tool import run as confidence_scorer_run
@@ -11,7 +16,11 @@ from agents.fact_validation.tools.llm_validation_tool import run as llm_validati
 # Load environment variables
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+configure_logging()
+logger = get_logger("fact_validation")
+
+app = FastMCP("fact_validation_agent")
+metrics.mount(app)
 
 # Tool descriptions for routing
 TOOL_DESCRIPTIONS = {
@@ -31,7 +40,7 @@ TOOLS = {
 }
 
 
-def choose_tool(query: str) -> str:
+def _llm_choose_tool(query: str) -> str:
     """
     Ask the LLM which tool best fits this fact-checking query.
     """
@@ -53,27 +62,73 @@ Answer with just the tool name.
 """
 
     try:
-        response = client.chat.completions.create(
+        tool_name = chat(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}]
-        )
-        tool_name = response.choices[0].message.content.strip()
+        ).strip()
         return tool_name
     except Exception as e:
-        print(f"Error selecting tool: {str(e)}")
+        logger.warning(f"Error selecting tool: {str(e)}")
         return "llm_validation_tool"  # Default fallback
 
 
+# Local routing: keyword rules, then example centroids, then the LLM
+ROUTES = {
+    "source_credibility_tool": {
+        "keywords": ["trustworthy", "credible", "credibility", "reliable source", "http", "https", "www.", "domain", "website"],
+        "examples": [
+            "Check how trustworthy the source https://www.cdc.gov is",
+            "Is this website a reliable source?",
+        ],
+    },
+    "cross_reference_tool": {
+        "keywords": ["cross", "compare these claims", "consistent", "agree", "agrees", "across documents"],
+        "examples": [
+            "Compare these claims: AI increases accuracy vs AI reduces accuracy",
+            "Do these documents agree with each other?",
+        ],
+    },
+    "confidence_scorer_tool": {
+        "keywords": ["confidence", "score", "scores", "rating", "reliability level"],
+        "examples": [
+            "Give confidence score for credibility 9, 8, 7",
+            "How confident should we be given these scores?",
+        ],
+    },
+    "contradiction_detector_tool": {
+        "keywords": ["contradict", "contradicts", "contradiction", "contradictions", "contradictory", "conflict", "conflicting", "inconsistent", "inconsistency", "inconsistencies", "opposite"],
+        "examples": [
+            "Detect contradictions in statements about AI reliability",
+            "Are there conflicting statements here?",
+        ],
+    },
+    "llm_validation_tool": {
+        "keywords": ["fact-check", "fact check", "is it true", "verify that", "true that"],
+        "examples": [
+            "Fact-check: AI can fully replace doctors by 2025",
+            "Is it true that coffee causes dehydration?",
+        ],
+    },
+}
+
+router = ToolRouter("fact_validation", ROUTES, llm_fallback=_llm_choose_tool)
+
+
+def choose_tool(query: str) -> str:
+    """Pick the fact-checking tool for a query, calling the LLM only when local routing is unsure."""
+    return router.route(query)
+
+
 def run_agent(query: str):
     """
     Uses LLM to route the query to the correct fact-checking tool.
     """
     tool_name = choose_tool(query)
 
-    print(f"\n🔍 Selected Tool: {tool_name}")
+    logger.info(f"Selected tool: {tool_name}")
 
     if tool_name not in TOOLS:
-        print(f"⚠️ Tool '{tool_name}' not recognized. Using llm_validation_tool as fallback.")
+        logger.warning(f"Tool '{tool_name}' not recognized. Using llm_validation_tool as fallback.")
         tool_name = "llm_validation_tool"
 
     tool_func = TOOLS[tool_name]
@@ -113,20 +168,41 @@ def run_agent(query: str):
         return f"Error executing tool '{tool_name}': {str(e)}"
 
 
+@app.tool("fact_validation")
+def fact_validation(query: str):
+    """Routes a fact-checking request to the most suitable validation tool and runs it."""
+    return run_agent(query)
+
+
+@app.tool("router_stats")
+def router_stats() -> dict:
+    """Per-route decision counts, latency and accuracy of the local tool router."""
+    return router.stats()
+
+
+# Plain HTTP entry point for the coordinator (agent_rpc)
+mount_tools(app, {"run_agent": run_agent})
+
+
 if __name__ == "__main__":
-    print("🧠 Fact-Checking & Validation Agent Ready.")
-    print("=" * 60)
+    if "--demo" in sys.argv:
+        print("🧠 Fact-Checking & Validation Agent Ready.")
+        print("=" * 60)
     
-    sample_queries = [
-        "Check how trustworthy the source https://www.cdc.gov is.",
-        "Compare these claims: AI increases accuracy vs AI reduces accuracy.",
-        "Give confidence score for credibility 9, 8, 7.",
-        "Detect contradictions in statements about AI reliability.",
-        "Fact-check the claim: 'AI will replace 80% of jobs by 2030.'"
-    ]
-
-    for q in sample_queries:
-        print(f"\n📝 User Query: {q}")
-        result = run_agent(q)
-        print(result)
-        print("-" * 60)
\ No newline at end of file
+        sample_queries = [
+            "Check how trustworthy the source https://www.cdc.gov is.",
+            "Compare these claims: AI increases accuracy vs AI reduces accuracy.",
+            "Give confidence score for credibility 9, 8, 7.",
+            "Detect contradictions in statements about AI reliability.",
+            "Fact-check the claim: 'AI will replace 80% of jobs by 2030.'"
+        ]
+
+        for q in sample_queries:
+            print(f"\n📝 User Query: {q}")
+            result = run_agent(q)
+            print(result)
+            print("-" * 60)
+    else:
+        print("Starting Fact Validation MCP Agent...")
+        # The coordinator reaches this agent over HTTP (AGENT_ENDPOINTS["validation"])
+        serve(app, host="0.0.0.0", port=8003)
@@ -1,8 +1,11 @@
 # agents/output_formatter/formatter_server.py
 from fastmcp import FastMCP
-from openai import OpenAI
-import os
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
+from utils.tool_router import ToolRouter
+from utils import metrics
+from utils.server import serve
+from utils.logger import configure_logging
 
 # Import all tool modules (they auto-register)
 from agents.output_formatter.tools import (
@@ -13,9 +16,10 @@ from agents.output_formatter.tools import (
 )
 
 load_dotenv()
+configure_logging()
 
 app = FastMCP("output_formatter_agent")
-llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+metrics.mount(app)
 
 # Map tool names to their callable functions
 TOOL_MAP = {
@@ -25,12 +29,8 @@ TOOL_MAP = {
     "executive_summary_generator": executive_summary_generator.executive_summary_generator,
 }
 
-@app.tool("select_and_run_output_formatter")
-def select_and_run_output_formatter(user_query: str, data: dict = None) -> dict:
-    """
-    Uses LLM reasoning to select the correct output formatting tool based on the query.
-    """
-    data = data or {}
+def _llm_select_tool(user_query: str) -> str:
+    """Ask the LLM which output formatting tool fits the query."""
     available_tools = ", ".join(TOOL_MAP.keys())
 
     prompt = f"""
@@ -46,13 +46,46 @@ def select_and_run_output_formatter(user_query: str, data: dict = None) -> dict:
     """
 
     # Ask the LLM which tool is appropriate
-    response = llm_client.chat.completions.create(
+    response = chat(
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
     )
 
-    chosen_tool_name = response.choices[0].message.content.strip().split()[0]
+    return response.strip().split()[0]
+
+
+# Local routing: keyword rules, then example centroids, then the LLM
+ROUTES = {
+    "citation_formatter": {
+        "keywords": ["citation", "citations", "cite", "reference", "references", "bibliography", "apa", "mla", "chicago"],
+        "examples": ["Format these citations in APA style", "Create a bibliography from these sources"],
+    },
+    "report_structuring_tool": {
+        "keywords": ["outline", "structure", "organize", "section", "sections", "report format"],
+        "examples": ["Organize these findings into a structured report", "Create a report outline"],
+    },
+    "visualization_generator": {
+        "keywords": ["chart", "charts", "graph", "graphs", "plot", "visualize", "visualise", "visualization", "visualisation", "diagram", "bar chart", "pie chart"],
+        "examples": ["Make a bar chart of these numbers", "Visualize the results as a graph"],
+    },
+    "executive_summary_generator": {
+        "keywords": ["summary", "summarize", "summarise", "executive", "tl;dr", "brief"],
+        "examples": ["Write an executive summary of this report", "Summarize the research briefly"],
+    },
+}
+
+router = ToolRouter("output_formatter", ROUTES, llm_fallback=_llm_select_tool)
+
+
+@app.tool("select_and_run_output_formatter")
+def select_and_run_output_formatter(user_query: str, data: dict = None) -> dict:
+    """
+    Selects the correct output formatting tool based on the query (local
+    routing first, LLM reasoning only when that is inconclusive).
+    """
+    data = data or {}
+    chosen_tool_name = router.route(user_query)
     chosen_tool = TOOL_MAP.get(chosen_tool_name)
 
     if not chosen_tool:
@@ -66,6 +99,13 @@ def select_and_run_output_formatter(user_query: str, data: dict = None) -> dict:
         return {"error": f"Tool execution failed: {e}"}
 
 
+@app.tool("router_stats")
+def router_stats() -> dict:
+    """Per-route decision counts, latency and accuracy of the local tool router."""
+    return router.stats()
+
+
 if __name__ == "__main__":
     print("Starting Output Formatter MCP Agent...")
-    app.run()
+    # The coordinator reaches this agent over HTTP (AGENT_ENDPOINTS["output"])
+    serve(app, host="0.0.0.0", port=8004)
@@ -1,14 +1,12 @@
 # agents/output_formatter/tools/citation_formatter.py
 from fastmcp import FastMCP
 from agents.output_formatter.config import DEFAULT_STYLE
-from openai import OpenAI
-import os
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
 
 load_dotenv()
 
 mcp = FastMCP("citation_formatter_")
-llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @mcp.tool("citation_formatter")
 def citation_formatter(citations: list, style: str = DEFAULT_STYLE) -> dict:
@@ -21,14 +19,14 @@ def citation_formatter(citations: list, style: str = DEFAULT_STYLE) -> dict:
     {citations_text}
     """
 
-    response = llm_client.chat.completions.create(
+    response = chat(
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.2,
         max_tokens=600
     )
 
-    return {"formatted_citations": response.choices[0].message.content}
+    return {"formatted_citations": response}
 
 
 # 🧪 Local testing entrypoint
@@ -1,15 +1,13 @@
 # agents/output_formatter/tools/executive_summary_generator.py
 from fastmcp import FastMCP
-from openai import OpenAI
 from agents.output_formatter.config import DEFAULT_SUMMARY_LENGTH
 from dotenv import load_dotenv
-import os
+from utils.llm_gateway import chat
 
 # Load environment variables (especially OPENAI_API_KEY)
 load_dotenv()
 
 mcp = FastMCP("executive_summary_generator_tool")
-llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @mcp.tool(
     name="executive_summary_generator",
@@ -24,14 +22,14 @@ def executive_summary_generator(report_text: str, word_limit: int = DEFAULT_SUMM
     {report_text}
     """
 
-    response = llm_client.chat.completions.create(
+    response = chat(
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
         max_tokens=800
     )
 
-    return {"executive_summary": response.choices[0].message.content}
+    return {"executive_summary": response}
 
 
 # 🧪 Local testing entrypoint
@@ -1,14 +1,12 @@
 from fastmcp import FastMCP
-from openai import OpenAI
-import os
 from dotenv import load_dotenv
+from utils.llm_gateway import chat
 
 # Load environment variables (especially OPENAI_API_KEY)
 load_dotenv()
 
-# Initialize FastMCP agent and OpenAI client
+# Initialize FastMCP agent
 mcp = FastMCP("report_structuring_tool")
-llm_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @mcp.tool(
     name="report_structuring_tool",
@@ -32,14 +30,14 @@ def report_structuring_tool(sections: list) -> dict:
     {combined}
     """
 
-    response = llm_client.chat.completions.create(
+    response = chat(
         model="gpt-4",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.3,
         max_tokens=800
     )
 
-    return {"structured_report": response.choices[0].message.content}
+    return {"structured_report": response}
 
 
 # -------------------------------------------------------------
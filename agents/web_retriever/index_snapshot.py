@@ -0,0 +1,324 @@
+# agents/web_retriever/index_snapshot.py
+"""
+Keyword Index Snapshots
+Compacted, checksummed snapshots of the keyword store for fast warm starts.
+
+Layout (one directory per snapshot, CURRENT names the live one):
+    snapshots/CURRENT
+    snapshots/<snapshot_id>/docs.bin       compressed {"doc_id", "text"} records, back to back
+    snapshots/<snapshot_id>/docs.idx       uint64 record offsets (n + 1 entries)
+    snapshots/<snapshot_id>/terms.bin      compressed {"doc_ids": [...], "terms": [sorted terms]}
+    snapshots/<snapshot_id>/postings.bin   compressed [[doc_no, tf], ...] per term, in terms.bin order
+    snapshots/<snapshot_id>/postings.idx   uint64 block offsets (terms + 1 entries)
+    snapshots/<snapshot_id>/manifest.json  codec, counts, JSONL offset and sha256 of every file
+
+Only terms.bin is read in full on load. The other files are memory-mapped:
+a term's postings are decompressed the first time a query (or a replayed
+write) touches the term, and a document's text only when it is returned
+from a search. Writes made after the snapshot are replayed from the JSONL
+store starting at the recorded offset.
+
+Usage:
+    python -m agents.web_retriever.index_snapshot snapshot
+    python -m agents.web_retriever.index_snapshot compact
+    python -m agents.web_retriever.index_snapshot verify
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import time
+import uuid
+import zlib
+from typing import Dict, Optional
+
+from agents.web_retriever.config import KEYWORD_DB_PATH, KEYWORD_SNAPSHOT_DIR
+
+try:
+    import zstandard
+except ImportError:  # zlib keeps snapshots working without the optional dependency
+    zstandard = None
+
+# Bumped whenever the stored postings change meaning (2, 3: term_index stemmer fixes, 4: per-term postings)
+MANIFEST_VERSION = 4
+_OFFSET = struct.Struct("<Q")
+
+
+# --- Codecs ---
+def _compressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress
+    return lambda data: zlib.compress(data, 6)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _current_dir(snapshot_root: str) -> Optional[str]:
+    pointer = os.path.join(snapshot_root, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r") as f:
+        name = f.read().strip()
+    path = os.path.join(snapshot_root, name)
+    return path if os.path.isdir(path) else None
+
+
+# --- Reader ---
+class Snapshot:
+    """Read-only, memory-mapped view of one snapshot directory."""
+
+    def __init__(self, path: str, manifest: dict):
+        self.path = path
+        self.manifest = manifest
+        self.doc_count = manifest["doc_count"]
+        self.jsonl_offset = manifest["jsonl_offset"]
+        self._decompress = _decompressor(manifest["codec"])
+        self._files = []
+        self._maps = []
+        try:
+            self._docs = self._map("docs.bin")
+            self._idx = self._map("docs.idx")
+            self._postings = self._map("postings.bin")
+            self._postings_idx = self._map("postings.idx")
+            with open(os.path.join(path, "terms.bin"), "rb") as f:
+                header = json.loads(self._decompress(f.read()))
+            self.doc_ids = header["doc_ids"]
+            self.terms = header["terms"]
+        except BaseException:
+            self.close()
+            raise
+
+    def _map(self, name: str):
+        f = open(os.path.join(self.path, name), "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(m)
+        return m
+
+    @staticmethod
+    def _block(data, idx, n: int):
+        start = _OFFSET.unpack_from(idx, n * _OFFSET.size)[0]
+        end = _OFFSET.unpack_from(idx, (n + 1) * _OFFSET.size)[0]
+        return data[start:end]
+
+    def record(self, doc_no: int) -> dict:
+        return json.loads(self._decompress(self._block(self._docs, self._idx, doc_no)))
+
+    def text(self, doc_no: int) -> str:
+        return self.record(doc_no)["text"]
+
+    def term_postings(self, term: str) -> Optional[Dict[str, int]]:
+        """{doc_id: tf} of one term, read from the memory-mapped postings; None if the term is not in it."""
+        n = bisect.bisect_left(self.terms, term)
+        if n == len(self.terms) or self.terms[n] != term:
+            return None
+        entries = json.loads(self._decompress(self._block(self._postings, self._postings_idx, n)))
+        return {self.doc_ids[doc_no]: tf for doc_no, tf in entries}
+
+    def close(self):
+        for m in self._maps:
+            m.close()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_snapshot(snapshot_root: str = KEYWORD_SNAPSHOT_DIR, verify: bool = False) -> Optional[Snapshot]:
+    """
+    Open the CURRENT snapshot, or return None if there is none or it is unusable.
+    File sizes are always checked; sha256 checksums only when verify=True.
+    """
+    path = _current_dir(snapshot_root)
+    if not path:
+        return None
+    try:
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        if manifest["codec"] == "zstd" and zstandard is None:
+            print("[WARN] Snapshot is zstd-compressed but zstandard is not installed; ignoring it.")
+            return None
+        for name, info in manifest["files"].items():
+            file_path = os.path.join(path, name)
+            if os.path.getsize(file_path) != info["bytes"]:
+                return None
+            if verify and _sha256(file_path) != info["sha256"]:
+                return None
+        return Snapshot(path, manifest)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Could not open keyword snapshot at {path}: {e}")
+        return None
+
+
+# --- Writer ---
+def write_snapshot(index, snapshot_root: str = KEYWORD_SNAPSHOT_DIR) -> dict:
+    """
+    Write the live documents of a loaded KeywordIndex as a new snapshot and
+    point CURRENT at it. The recorded JSONL offset is the one the index has
+    applied up to, so records appended since are replayed on warm start.
+    Caller must hold index.lock.
+    """
+    codec = "zstd" if zstandard is not None else "zlib"
+    compress = _compressor(codec)
+    # Always a fresh directory: the live snapshot may be memory-mapped by this process
+    snapshot_id = time.strftime("%Y%m%dT%H%M%S") + f"-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(snapshot_root, snapshot_id)
+    os.makedirs(path)
+
+    doc_ids = list(index.docs)
+    doc_nos = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+
+    with open(os.path.join(path, "docs.bin"), "wb") as docs_f, \
+            open(os.path.join(path, "docs.idx"), "wb") as idx_f:
+        offset = 0
+        idx_f.write(_OFFSET.pack(offset))
+        for doc_id in doc_ids:
+            blob = compress(json.dumps({"doc_id": doc_id, "text": index.text(doc_id)}).encode("utf-8"))
+            docs_f.write(blob)
+            offset += len(blob)
+            idx_f.write(_OFFSET.pack(offset))
+
+    terms = sorted(index.postings.live_terms())
+    with open(os.path.join(path, "postings.bin"), "wb") as post_f, \
+            open(os.path.join(path, "postings.idx"), "wb") as idx_f:
+        offset = 0
+        idx_f.write(_OFFSET.pack(offset))
+        for term in terms:
+            entries = [[doc_nos[d], tf] for d, tf in index.postings.peek(term).items()]
+            blob = compress(json.dumps(entries).encode("utf-8"))
+            post_f.write(blob)
+            offset += len(blob)
+            idx_f.write(_OFFSET.pack(offset))
+    with open(os.path.join(path, "terms.bin"), "wb") as f:
+        f.write(compress(json.dumps({"doc_ids": doc_ids, "terms": terms}).encode("utf-8")))
+
+    files = {}
+    for name in ("docs.bin", "docs.idx", "terms.bin", "postings.bin", "postings.idx"):
+        file_path = os.path.join(path, name)
+        files[name] = {"bytes": os.path.getsize(file_path), "sha256": _sha256(file_path)}
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "snapshot_id": snapshot_id,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "codec": codec,
+        "doc_count": len(doc_ids),
+        "term_count": len(terms),
+        "jsonl_path": index.path,
+        "jsonl_offset": index.offset,
+        "files": files,
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap CURRENT atomically, then drop older snapshots
+    pointer_tmp = os.path.join(snapshot_root, "CURRENT.tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(snapshot_id)
+    os.replace(pointer_tmp, os.path.join(snapshot_root, "CURRENT"))
+    for name in os.listdir(snapshot_root):
+        old = os.path.join(snapshot_root, name)
+        if name != snapshot_id and os.path.isdir(old):
+            shutil.rmtree(old, ignore_errors=True)
+
+    return manifest
+
+
+def compact(index, snapshot_root: str = KEYWORD_SNAPSHOT_DIR) -> dict:
+    """
+    Rewrite the JSONL store with one line per live document (no superseded
+    versions, no tombstones) and take a fresh snapshot of the result.
+
+    Runs under the store's file lock, so writers in other processes (the
+    retriever server) wait; records they appended before it are applied
+    first and end up in the rewritten store.
+    """
+    index.load()
+    with index.lock, index.file_lock():
+        index.catch_up()
+        before = os.path.getsize(index.path) if os.path.exists(index.path) else 0
+        tmp_path = index.path + ".compact"
+        with open(tmp_path, "w") as f:
+            for doc_id in index.docs:
+                f.write(json.dumps({"doc_id": doc_id, "text": index.text(doc_id)}) + "\n")
+            index.offset = f.tell()
+            index.inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp_path, index.path)
+        after = index.offset
+        manifest = write_snapshot(index, snapshot_root)
+    return {"jsonl_bytes_before": before, "jsonl_bytes_after": after, "manifest": manifest}
+
+
+def verify(snapshot_root: str = KEYWORD_SNAPSHOT_DIR) -> Dict[str, bool]:
+    """Recompute checksums of the CURRENT snapshot: {file_name: ok}."""
+    path = _current_dir(snapshot_root)
+    if not path:
+        return {}
+    with open(os.path.join(path, "manifest.json"), "r") as f:
+        manifest = json.load(f)
+    return {
+        name: os.path.exists(os.path.join(path, name)) and _sha256(os.path.join(path, name)) == info["sha256"]
+        for name, info in manifest["files"].items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot, compact or verify the keyword index.")
+    parser.add_argument("command", choices=["snapshot", "compact", "verify"])
+    parser.add_argument("--jsonl", default=KEYWORD_DB_PATH, help="keyword store (JSONL)")
+    parser.add_argument("--snapshot-dir", default=KEYWORD_SNAPSHOT_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        result = verify(args.snapshot_dir)
+        print(json.dumps(result, indent=2) if result else "No snapshot found.")
+        return 0 if result and all(result.values()) else 1
+
+    from agents.web_retriever.tools.keyword_search_tool import KeywordIndex
+
+    index = KeywordIndex(args.jsonl, snapshot_dir=args.snapshot_dir)
+    started = time.perf_counter()
+    if args.command == "compact":
+        result = compact(index, args.snapshot_dir)
+        manifest = result["manifest"]
+        print(f"Compacted {args.jsonl}: {result['jsonl_bytes_before']} -> {result['jsonl_bytes_after']} bytes")
+    else:
+        index.load()
+        with index.lock:
+            index.catch_up()
+            manifest = write_snapshot(index, args.snapshot_dir)
+    print(
+        f"Snapshot {manifest['snapshot_id']}: {manifest['doc_count']} docs, "
+        f"{manifest['term_count']} terms, codec={manifest['codec']} "
+        f"({time.perf_counter() - started:.2f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
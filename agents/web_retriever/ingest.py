@@ -0,0 +1,421 @@
+# agents/web_retriever/ingest.py
+"""
+Offline Bulk Ingestion
+Loads local corpora into the keyword and semantic indexes without scraping.
+
+Pipeline:
+    read (main thread) -> parse -> extract -> chunk (worker processes)
+    -> dedup -> batched embed -> bulk write (main process)
+
+Stages are connected by bounded queues, so a slow embed/write stage holds
+back the readers instead of buffering the corpus in memory. The sources
+and chunk hashes completed by each write batch are appended to a checkpoint
+log (one JSON line per batch); rerunning the same command resumes where it
+stopped.
+
+Supported inputs:
+    *.jsonl / *.ndjson   one object per line with "text" or "html" (+ optional "url"/"id")
+    directories          *.html / *.htm files, walked recursively
+    *.warc / *.warc.gz   HTTP response records
+
+Usage:
+    python -m agents.web_retriever.ingest corpus.jsonl crawl.warc.gz ./html_dump
+    python -m agents.web_retriever.ingest ./html_dump --workers 8 --no-semantic
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from agents.web_retriever.config import (
+    INGEST_CHECKPOINT_PATH,
+    INGEST_CHUNK_CHARS,
+    INGEST_CHUNK_OVERLAP,
+    INGEST_EMBED_BATCH,
+    INGEST_QUEUE_SIZE,
+    KEYWORD_DB_PATH,
+)
+
+HTML_SUFFIXES = (".html", ".htm")
+
+
+# --- Readers ---
+# Bad records are reported through on_error(source_id, message) and skipped
+def _iter_jsonl(path: str, on_error: Callable[[str, str], None]) -> Iterator[Tuple[str, str, str, bytes]]:
+    with open(path, "rb") as f:
+        for lineno, line in enumerate(f, 1):
+            source_id = f"{path}:{lineno}"
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                on_error(source_id, f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                on_error(source_id, f"expected a JSON object, got {type(record).__name__}")
+                continue
+            url = record.get("url") or record.get("id") or source_id
+            if record.get("html"):
+                yield source_id, url, "html", record["html"].encode("utf-8")
+            elif record.get("text"):
+                yield source_id, url, "text", record["text"].encode("utf-8")
+
+
+def _iter_html_dir(path: str, on_error: Callable[[str, str], None]) -> Iterator[Tuple[str, str, str, bytes]]:
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith(HTML_SUFFIXES):
+                file_path = os.path.join(root, name)
+                try:
+                    with open(file_path, "rb") as f:
+                        payload = f.read()
+                except OSError as e:
+                    on_error(file_path, str(e))
+                    continue
+                yield file_path, "file://" + os.path.abspath(file_path), "html", payload
+
+
+def _iter_warc(path: str, on_error: Callable[[str, str], None]) -> Iterator[Tuple[str, str, str, bytes]]:
+    """Minimal WARC reader: yields the HTTP body of every response record."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        record_no = 0
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            if not line.startswith(b"WARC/"):
+                continue
+            headers = {}
+            while True:
+                line = f.readline()
+                if not line or not line.strip():
+                    break
+                key, _, value = line.decode("utf-8", errors="replace").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            record_no += 1
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                # The block cannot be skipped exactly: resync on the next "WARC/" line
+                on_error(f"{path}#{record_no}", f"bad Content-Length: {headers.get('content-length')!r}")
+                continue
+            block = f.read(length)
+            if headers.get("warc-type") != "response" or not headers.get("warc-target-uri"):
+                continue
+            http_headers, _, body = block.partition(b"\r\n\r\n")
+            if b"text/html" not in http_headers.lower():
+                continue
+            yield f"{path}#{record_no}", headers["warc-target-uri"], "html", body
+
+
+def _print_error(source_id: str, message: str):
+    print(f"[WARN] Skipping {source_id}: {message}")
+
+
+def iter_sources(
+    paths: List[str], on_error: Optional[Callable[[str, str], None]] = None
+) -> Iterator[Tuple[str, str, str, bytes]]:
+    """
+    Yield (source_id, url, kind, payload) for every document in the inputs.
+    Malformed records and unreadable (or truncated) files are passed to
+    on_error(source_id, message) and skipped; the rest of the input is still read.
+    """
+    on_error = on_error or _print_error
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                yield from _iter_html_dir(path, on_error)
+            elif path.endswith((".warc", ".warc.gz")):
+                yield from _iter_warc(path, on_error)
+            elif path.endswith((".jsonl", ".ndjson")):
+                yield from _iter_jsonl(path, on_error)
+            elif path.lower().endswith(HTML_SUFFIXES):
+                with open(path, "rb") as f:
+                    payload = f.read()
+                yield path, "file://" + os.path.abspath(path), "html", payload
+            else:
+                on_error(path, "unsupported input")
+        except (OSError, EOFError, zlib.error) as e:
+            on_error(path, str(e))
+
+
+# --- Chunking ---
+def chunk_text(text: str, size: int = INGEST_CHUNK_CHARS, overlap: int = INGEST_CHUNK_OVERLAP) -> List[str]:
+    """Split on paragraph boundaries into chunks of roughly `size` characters."""
+    paragraphs = [" ".join(p.split()) for p in text.split("\n")]
+    paragraphs = [p for p in paragraphs if p]
+    chunks, current = [], ""
+    for p in paragraphs:
+        while len(p) > size:
+            # Paragraph alone is too long: hard-split it
+            head, p = p[:size], p[size - overlap:]
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(head)
+        if current and len(current) + len(p) + 1 > size:
+            chunks.append(current)
+            current = current[-overlap:] + " " + p if overlap else p
+        else:
+            current = f"{current} {p}" if current else p
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# --- Worker processes: parse -> extract -> chunk ---
+def _worker(in_q, out_q):
+    timings = defaultdict(float)
+    counts = defaultdict(int)
+    while True:
+        item = in_q.get()
+        if item is None:
+            break
+        source_id, url, kind, payload = item
+        try:
+            t0 = time.perf_counter()
+            if kind == "html":
+                from agents.web_retriever.tools.web_tool import extract_text
+                extracted = extract_text(payload)
+                text = extracted["text"]
+                t1 = time.perf_counter()
+                timings["parse+extract"] += t1 - t0
+                counts["parse+extract"] += 1
+            else:
+                text = payload.decode("utf-8", errors="replace")
+                t1 = t0
+            chunks = chunk_text(text)
+            timings["chunk"] += time.perf_counter() - t1
+            counts["chunk"] += 1
+            out_q.put(("doc", source_id, url, chunks))
+        except Exception as e:
+            out_q.put(("error", source_id, url, str(e)))
+    out_q.put(("done", dict(timings), dict(counts), None))
+
+
+# --- Checkpointing ---
+def _load_checkpoint(path: str) -> dict:
+    """Replay the checkpoint log (a checkpoint written as one JSON object reads as a one-line log)."""
+    checkpoint = {"completed": set(), "chunk_hashes": set()}
+    if not path or not os.path.exists(path):
+        return checkpoint
+    with open(path, "rb") as f:
+        data = f.read()
+    for line in data.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # torn last line of an interrupted run
+        for key in checkpoint:
+            checkpoint[key].update(record.get(key, []))
+    if data and not data.endswith(b"\n"):
+        # Later records must start on a line of their own
+        with open(path, "ab") as f:
+            f.write(b"\n")
+    return checkpoint
+
+
+def _append_checkpoint(path: str, sources: List[str], hashes: List[str]):
+    """Record one write batch; the log only grows by what the batch added."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps({"completed": sources, "chunk_hashes": hashes}) + "\n")
+
+
+# --- Driver ---
+def ingest(
+    paths: List[str],
+    workers: int = None,
+    embed_batch: int = INGEST_EMBED_BATCH,
+    queue_size: int = INGEST_QUEUE_SIZE,
+    checkpoint_path: str = INGEST_CHECKPOINT_PATH,
+    semantic: bool = True,
+    keyword: bool = True,
+) -> dict:
+    """
+    Run the ingestion pipeline over `paths` and return a per-stage throughput report.
+    """
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    checkpoint = _load_checkpoint(checkpoint_path)
+
+    keyword_index = semantic_store = None
+    if keyword:
+        from agents.web_retriever.tools.keyword_search_tool import _index as keyword_index
+        os.makedirs(os.path.dirname(KEYWORD_DB_PATH), exist_ok=True)
+    if semantic:
+        from agents.web_retriever.tools.semantic_search_tool import store_many as semantic_store
+
+    timings = defaultdict(float)
+    counts = defaultdict(int)
+    ctx = mp.get_context()
+    in_q = ctx.Queue(maxsize=queue_size)
+    out_q = ctx.Queue(maxsize=queue_size)
+    procs = [ctx.Process(target=_worker, args=(in_q, out_q), daemon=True) for _ in range(workers)]
+    for p in procs:
+        p.start()
+
+    errors = []
+
+    def _bad_record(source_id: str, message: str):
+        counts["bad records"] += 1
+        errors.append({"source": source_id, "url": None, "error": message})
+
+    def _reader():
+        t0 = time.perf_counter()
+        try:
+            for source in iter_sources(paths, on_error=_bad_record):
+                if source[0] in checkpoint["completed"]:
+                    counts["skipped (checkpoint)"] += 1
+                    continue
+                counts["read"] += 1
+                in_q.put(source)  # blocks when workers fall behind
+        except Exception as e:
+            errors.append({"source": None, "url": None, "error": f"reader failed: {e}"})
+        finally:
+            timings["read"] = time.perf_counter() - t0
+            # Workers stop on these, whatever happened above
+            for _ in procs:
+                in_q.put(None)
+
+    reader = threading.Thread(target=_reader, daemon=True)
+    started = time.perf_counter()
+    reader.start()
+
+    pending: List[Tuple[str, str]] = []
+    pending_sources: List[str] = []
+    pending_hashes: List[str] = []
+
+    def _flush():
+        if not pending and not pending_sources:
+            return
+        if pending and semantic_store:
+            t0 = time.perf_counter()
+            result = semantic_store(pending, batch_size=embed_batch)
+            if "error" in result:
+                raise RuntimeError(result["error"])
+            timings["embed+write (semantic)"] += time.perf_counter() - t0
+            counts["embed+write (semantic)"] += len(pending)
+        if pending and keyword_index:
+            t0 = time.perf_counter()
+            keyword_index.store_many(pending)
+            timings["write (keyword)"] += time.perf_counter() - t0
+            counts["write (keyword)"] += len(pending)
+        checkpoint["completed"].update(pending_sources)
+        _append_checkpoint(checkpoint_path, pending_sources, pending_hashes)
+        pending.clear()
+        pending_sources.clear()
+        pending_hashes.clear()
+
+    finished = 0
+    try:
+        while finished < len(procs):
+            try:
+                kind, a, b, c = out_q.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in procs):
+                    errors.append({"source": None, "url": None, "error": "worker processes exited unexpectedly"})
+                    break
+                continue
+            if kind == "done":
+                finished += 1
+                for stage, seconds in a.items():
+                    timings[stage] += seconds
+                    counts[stage] += b.get(stage, 0)
+                continue
+            if kind == "error":
+                errors.append({"source": a, "url": b, "error": c})
+                continue
+
+            source_id, url, chunks = a, b, c
+            t0 = time.perf_counter()
+            for n, chunk in enumerate(chunks):
+                digest = hashlib.sha1(chunk.lower().encode("utf-8")).hexdigest()
+                if digest in checkpoint["chunk_hashes"]:
+                    counts["duplicates dropped"] += 1
+                    continue
+                checkpoint["chunk_hashes"].add(digest)
+                pending_hashes.append(digest)
+                pending.append((url if len(chunks) == 1 else f"{url}#chunk{n}", chunk))
+            counts["dedup"] += len(chunks)
+            timings["dedup"] += time.perf_counter() - t0
+            pending_sources.append(source_id)
+
+            if len(pending) >= embed_batch:
+                _flush()
+        _flush()
+    finally:
+        reader.join(timeout=1)
+        for p in procs:
+            p.join(timeout=1)
+            if p.is_alive():
+                p.terminate()
+
+    elapsed = time.perf_counter() - started
+    stages = {
+        stage: {
+            "items": counts.get(stage, 0),
+            "seconds": round(seconds, 3),
+            # worker stages run in parallel: seconds are summed across processes
+            "items_per_sec": round(counts.get(stage, 0) / seconds, 1) if seconds else None,
+        }
+        for stage, seconds in timings.items()
+    }
+    return {
+        "documents": counts["read"],
+        "skipped": counts["skipped (checkpoint)"],
+        "duplicates_dropped": counts["duplicates dropped"],
+        "bad_records": counts["bad records"],
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "docs_per_sec": round(counts["read"] / elapsed, 1) if elapsed else None,
+        "stages": stages,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest local corpora into the retriever indexes.")
+    parser.add_argument("paths", nargs="+", help="JSONL files, HTML directories or WARC files")
+    parser.add_argument("--workers", type=int, default=None, help="parse/extract/chunk processes")
+    parser.add_argument("--embed-batch", type=int, default=INGEST_EMBED_BATCH)
+    parser.add_argument("--queue-size", type=int, default=INGEST_QUEUE_SIZE)
+    parser.add_argument("--checkpoint", default=INGEST_CHECKPOINT_PATH, help="set to '' to disable resuming")
+    parser.add_argument("--no-semantic", action="store_true", help="skip embedding + Postgres writes")
+    parser.add_argument("--no-keyword", action="store_true", help="skip the keyword index")
+    args = parser.parse_args(argv)
+
+    report = ingest(
+        args.paths,
+        workers=args.workers,
+        embed_batch=args.embed_batch,
+        queue_size=args.queue_size,
+        checkpoint_path=args.checkpoint,
+        semantic=not args.no_semantic,
+        keyword=not args.no_keyword,
+    )
+
+    print(f"Ingested {report['documents']} documents in {report['elapsed_seconds']}s "
+          f"({report['docs_per_sec']} docs/s), {report['skipped']} skipped, "
+          f"{report['duplicates_dropped']} duplicate chunks dropped, {len(report['errors'])} errors")
+    print(f"{'stage':<26}{'items':>10}{'seconds':>12}{'items/s':>12}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<26}{s['items']:>10}{s['seconds']:>12}{str(s['items_per_sec']):>12}")
+    for err in report["errors"][:10]:
+        print(f"[ERROR] {err['source']}: {err['error']}")
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
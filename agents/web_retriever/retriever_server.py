@@ -1,15 +1,80 @@
 # agents/web_retriever/retriever_server.py
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from agents.web_retriever import tools
+from agents.web_retriever.tools import web_tool, semantic_search_tool, keyword_search_tool, rerank_tool, rag_tool, batch_tool
+from utils import metrics
+from utils.server import mount_tools, serve
+from utils.logger import configure_logging
+from typing import List, Literal, Optional
+
+configure_logging()
 
 app = FastMCP(
     name="web_retriever_agent",
-    description="Agent 2: Web Scraper & Document Retrieval Agent (RAG-ready, Postgres + pgvector)"
+    instructions="Agent 2: Web Scraper & Document Retrieval Agent (RAG-ready, Postgres + pgvector)"
 )
 
-# Register all tools
-for tool_module in [tools.web_tool, tools.semantic_search_tool, tools.keyword_search_tool, tools.rag_tool]:
-    app.register_tool(tool_module.tool_spec)
+
+@app.tool("fetch_webpage")
+def fetch_webpage(url: str) -> dict:
+    """Fetches a webpage and extracts readable text content."""
+    return web_tool.run(url)
+
+
+@app.tool("semantic_search")
+def semantic_search(
+    action: Literal["store", "search"],
+    url: Optional[str] = None,
+    text: Optional[str] = None,
+    query: Optional[str] = None,
+    top_k: int = 5
+) -> dict:
+    """Embeds, stores, and searches web documents using PostgreSQL + pgvector."""
+    return semantic_search_tool.run(action=action, url=url, text=text, query=query, top_k=top_k)
+
+
+@app.tool("keyword_search")
+def keyword_search(
+    action: Literal["store", "search", "delete"],
+    doc_id: Optional[str] = None,
+    text: Optional[str] = None,
+    query: Optional[str] = None,
+    top_k: int = 5
+) -> dict:
+    """Index or search documents by keyword, tolerating typos and word-form variants."""
+    return keyword_search_tool.run(action=action, doc_id=doc_id, text=text, query=query, top_k=top_k)
+
+
+@app.tool("rerank")
+def rerank(query: str, candidates: List[dict], top_k: int = 5) -> dict:
+    """Reranks retrieved passages with a CPU cross-encoder so fewer, better passages go downstream."""
+    return rerank_tool.run(query=query, candidates=candidates, top_k=top_k)
+
+
+@app.tool("rag_search")
+def rag_search(query: str, urls: Optional[List[str]] = None, top_k: int = 5, rerank: bool = False) -> dict:
+    """Full RAG: scrape URLs, store embeddings in Postgres, keyword index, retrieve, generate LLM answer."""
+    return rag_tool.run(query=query, urls=urls, top_k=top_k, rerank=rerank)
+
+
+@app.tool("batch")
+async def batch(calls: List[dict], max_workers: int = batch_tool.DEFAULT_MAX_WORKERS, ctx: Optional[Context] = None) -> dict:
+    """Executes many store/search/fetch calls in one request; each result is logged to the client as it completes."""
+    return await batch_tool.stream_batch(calls, max_workers, ctx)
+
+
+metrics.mount(app)
+# Plain HTTP entry points for the coordinator (agent_rpc)
+mount_tools(app, {
+    "fetch_webpage": web_tool.run,
+    "semantic_search": semantic_search_tool.run,
+    "keyword_search": keyword_search_tool.run,
+    "rerank": rerank_tool.run,
+    "rag_search": rag_tool.run,
+    "batch": batch_tool.run,
+})
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8002)
+    # Warm the keyword index (snapshot + JSONL tail) before accepting queries
+    tools.keyword_search_tool._index.load()
+    serve(app, host="0.0.0.0", port=8002)
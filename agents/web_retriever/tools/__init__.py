@@ -1,3 +1,3 @@
 # agents/web_retriever/tools/__init__.py
-from . import web_tool, semantic_search_tool, keyword_search_tool, rag_tool
-__all__ = ["web_tool", "semantic_search_tool", "keyword_search_tool", "rag_tool"]
+from . import web_tool, semantic_search_tool, keyword_search_tool, rerank_tool, rag_tool, batch_tool
+__all__ = ["web_tool", "semantic_search_tool", "keyword_search_tool", "rerank_tool", "rag_tool", "batch_tool"]
@@ -0,0 +1,192 @@
+# agents/web_retriever/tools/batch_tool.py
+"""
+Batch Tool
+Runs a list of heterogeneous retriever calls in one request.
+
+Each call is {"tool": <name>, "args": {...}, "id": <optional caller tag>}.
+Writes (stores, and rag_search with urls) run first, then reads, so a batch
+can index documents and query them in one round trip. Within each phase
+calls run concurrently. Identical fetches and identical reads in the same
+batch run once and share their result, even when they are in flight at the
+same time. iter_batch yields results as each call completes; over MCP each
+one is sent to the client as a log message before the full response. Calls
+that have not started when the caller's request deadline passes are skipped.
+"""
+
+from fastmcp import FastMCP, Context
+from agents.web_retriever.tools import web_tool, semantic_search_tool, keyword_search_tool, rerank_tool, rag_tool
+from utils import deadline
+from utils.tracing import bind, traced
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Iterator, List, Optional
+import asyncio, json, threading, time
+
+mcp = FastMCP("batch-tool")
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class _SharedCache:
+    """Per-batch single-flight cache: the first caller computes, others wait on its Future."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    def get_or_run(self, key, fn):
+        with self.lock:
+            future = self.entries.get(key)
+            owner = future is None
+            if owner:
+                future = self.entries[key] = Future()
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def _store_both(url: str, text: str) -> dict:
+    return {
+        "semantic": semantic_search_tool.run(action="store", url=url, text=text),
+        "keyword": keyword_search_tool.run(action="store", doc_id=url, text=text),
+    }
+
+
+def _search_both(query: str, top_k: int = 5) -> dict:
+    sem = semantic_search_tool.run(action="search", query=query, top_k=top_k).get("results", [])
+    key = keyword_search_tool.run(action="search", query=query, top_k=top_k).get("results", [])
+    return {"results": rerank_tool.fuse(sem, key)[:top_k]}
+
+
+TOOLS = {
+    "fetch": web_tool.run,
+    "store": _store_both,
+    "search": _search_both,
+    "semantic_search": semantic_search_tool.run,
+    "keyword_search": keyword_search_tool.run,
+    "rerank": rerank_tool.run,
+    "rag_search": rag_tool.run,
+}
+
+
+def _is_write(call: dict) -> bool:
+    tool, args = call.get("tool"), call.get("args") or {}
+    if tool == "store":
+        return True
+    if tool in ("semantic_search", "keyword_search"):
+        return args.get("action") in ("store", "delete")
+    return tool == "rag_search" and bool(args.get("urls"))
+
+
+def iter_batch(calls: List[dict], max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[dict]:
+    """
+    Execute `calls` and yield one result dict per call, in completion order:
+    {"index", "id", "tool", "result" | "error", "elapsed_ms"}.
+    """
+    fetch_cache = _SharedCache()
+    read_cache = _SharedCache()
+    # Worker threads don't inherit context variables, so capture the deadline here
+    at = deadline.current()
+
+    def _execute(index: int, call: dict) -> dict:
+        tool = call.get("tool")
+        args = call.get("args") or {}
+        started = time.perf_counter()
+        out = {"index": index, "id": call.get("id"), "tool": tool}
+        try:
+            deadline.check(f"batch call {index} ({tool})", at=at)
+            if tool not in TOOLS:
+                raise ValueError(f"Unknown tool '{tool}'. Available: {', '.join(TOOLS)}")
+            if tool == "fetch":
+                result = fetch_cache.get_or_run(args.get("url"), lambda: web_tool.run(**args))
+            elif _is_write(call):
+                if tool == "store" and not args.get("text") and args.get("url"):
+                    # Store by URL only: fetch through the shared cache first
+                    page = fetch_cache.get_or_run(args["url"], lambda: web_tool.run(url=args["url"]))
+                    if "text" not in page:
+                        raise ValueError(page.get("error", f"No text found for {args['url']}"))
+                    args = dict(args, text=page["text"])
+                result = TOOLS[tool](**args)
+            else:
+                key = (tool, json.dumps(args, sort_keys=True, default=str))
+                result = read_cache.get_or_run(key, lambda: TOOLS[tool](**args))
+            out["result"] = result
+        except Exception as e:
+            out["error"] = str(e)
+        out["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return out
+
+    indexed = list(enumerate(calls))
+    phases = [[c for c in indexed if _is_write(c[1])], [c for c in indexed if not _is_write(c[1])]]
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for phase in phases:
+            futures = [pool.submit(bind(_execute), i, call) for i, call in phase]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+# Implementation function (no MCP decorator)
+@traced("batch", kind="tool")
+def _batch_impl(calls: List[dict], max_workers: int = DEFAULT_MAX_WORKERS) -> dict:
+    started = time.perf_counter()
+    results = list(iter_batch(calls, max_workers))
+    return {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+async def stream_batch(calls: List[dict], max_workers: int = DEFAULT_MAX_WORKERS, ctx: Optional[Context] = None) -> dict:
+    """Run a batch, sending each result to the client as a log message the moment it completes."""
+    started = time.perf_counter()
+    results = []
+    it = iter_batch(calls, max_workers)
+    while True:
+        item = await asyncio.to_thread(next, it, None)
+        if item is None:
+            break
+        results.append(item)
+        if ctx is not None:
+            await ctx.info(json.dumps(item, default=str))
+            await ctx.report_progress(len(results), len(calls))
+    return {
+        "results": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+# Register with MCP
+@mcp.tool()
+async def batch(calls: List[dict], max_workers: int = DEFAULT_MAX_WORKERS, ctx: Optional[Context] = None) -> dict:
+    """
+    Executes many store/search/fetch calls in one request with internal parallelism.
+
+    Args:
+        calls: List of {"tool": name, "args": {...}, "id": optional tag}. Tools:
+               fetch, store, search, semantic_search, keyword_search, rerank, rag_search
+        max_workers: Maximum calls executed concurrently (default: 8)
+
+    Returns:
+        Dictionary with per-call results in completion order (each carries its
+        original "index"), error count and total elapsed time. Each result is
+        also sent to the client as an info log message when its call
+        completes, together with a progress notification.
+    """
+    return await stream_batch(calls, max_workers, ctx)
+
+# Backwards compatibility
+def run(calls: List[dict], max_workers: int = DEFAULT_MAX_WORKERS):
+    return _batch_impl(calls=calls, max_workers=max_workers)
+
+# Export
+__all__ = ['batch', 'run', 'iter_batch', 'stream_batch', 'TOOLS', 'mcp']
+
+if __name__ == "__main__":
+    mcp.run()
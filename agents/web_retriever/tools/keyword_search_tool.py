@@ -1,14 +1,286 @@
 # agents/web_retriever/tools/keyword_search_tool.py
 from fastmcp import FastMCP
-from agents.web_retriever.config import KEYWORD_DB_PATH
+from utils.tracing import traced
+from agents.web_retriever.config import KEYWORD_DB_PATH, KEYWORD_SNAPSHOT_DIR, FUZZY_MAX_EXPANSIONS, FUZZY_MIN_SIMILARITY
+from agents.web_retriever.index_snapshot import open_snapshot
+from agents.web_retriever.tools.term_index import TermIndex, tokenize
+from collections import Counter, defaultdict
 from typing import Optional, Literal
-import os, json, re
+from contextlib import contextmanager
+import os, json, math, re, threading
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows; single-writer setups are unaffected
+    fcntl = None
 
 mcp = FastMCP("keyword-search-tool")
 
-# Implementation function (no decorator)
+
+class _Postings(dict):
+    """
+    term -> {doc_id: tf}, backed by a snapshot's memory-mapped postings.
+    A snapshot term is read the first time it is looked up or written to;
+    terms whose last document was removed are remembered, so the snapshot
+    does not bring them back.
+    """
+
+    def __init__(self, snapshot=None):
+        super().__init__()
+        self.snapshot = snapshot
+        self.dropped = set()
+
+    def _from_snapshot(self, term: str):
+        if self.snapshot is None or term in self.dropped:
+            return None
+        return self.snapshot.term_postings(term)
+
+    def __missing__(self, term):
+        docs = self._from_snapshot(term) or {}
+        self.dropped.discard(term)
+        self[term] = docs
+        return docs
+
+    def get(self, term, default=None):
+        if dict.__contains__(self, term):
+            return dict.__getitem__(self, term)
+        docs = self._from_snapshot(term)
+        if docs is None:
+            return default
+        self[term] = docs
+        return docs
+
+    def __delitem__(self, term):
+        dict.__delitem__(self, term)
+        if self.snapshot is not None:
+            self.dropped.add(term)
+
+    def peek(self, term: str) -> dict:
+        """Postings of a term without keeping snapshot reads in memory."""
+        if dict.__contains__(self, term):
+            return dict.__getitem__(self, term)
+        return self._from_snapshot(term) or {}
+
+    def live_terms(self):
+        """Every term with at least one document, read or not."""
+        live = {term for term, docs in self.items() if docs}
+        if self.snapshot is not None:
+            live.update(t for t in self.snapshot.terms if t not in self.dropped and not dict.__contains__(self, t))
+        return live
+
+
+class KeywordIndex:
+    """
+    In-memory inverted index over the JSONL keyword store.
+    Built lazily on first use (from the latest snapshot plus the JSONL tail
+    written after it, when one exists) and kept in sync by store()/delete().
+    With a snapshot, postings are read from its memory map per term and the
+    fuzzy term dictionary over its vocabulary is built on the first search.
+    """
+
+    def __init__(self, path: str = KEYWORD_DB_PATH, snapshot_dir: str = KEYWORD_SNAPSHOT_DIR):
+        self.path = path
+        self.snapshot_dir = snapshot_dir
+        self.snapshot = None
+        self.docs = {}                                 # doc_id -> text, or record number in self.snapshot
+        self.postings = _Postings()                    # stemmed term -> {doc_id: tf}
+        self.terms = TermIndex()
+        self._vocab_pending = False                    # snapshot vocabulary not in self.terms yet
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.offset = 0                                # JSONL bytes reflected in the in-memory index
+        self.inode = None                              # of the JSONL file those bytes belong to
+
+    def text(self, doc_id: str) -> str:
+        value = self.docs[doc_id]
+        return self.snapshot.text(value) if isinstance(value, int) else value
+
+    def _add(self, doc_id: str, text: str):
+        if doc_id in self.docs:
+            self._remove(doc_id)
+        self.docs[doc_id] = text
+        for term, tf in Counter(tokenize(text)).items():
+            self.postings[term][doc_id] = tf
+            self.terms.add(term)
+
+    def _remove(self, doc_id: str):
+        if doc_id not in self.docs:
+            return
+        old = self.text(doc_id)
+        del self.docs[doc_id]
+        for term in set(tokenize(old)):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(doc_id, None)
+            if not docs:
+                # Dead terms would otherwise keep taking fuzzy-expansion slots
+                del self.postings[term]
+                self.terms.remove(term)
+
+    def _load_snapshot(self) -> int:
+        """Populate from the current snapshot; returns the JSONL offset to replay from."""
+        snapshot = open_snapshot(self.snapshot_dir)
+        if snapshot is None:
+            return 0
+        adopted = False
+        try:
+            if snapshot.manifest.get("jsonl_path") not in (None, self.path):
+                return 0
+            if not os.path.exists(self.path) or os.path.getsize(self.path) < snapshot.jsonl_offset:
+                # Store was rewritten behind the snapshot's back
+                return 0
+            self.snapshot = snapshot
+            self.docs = {doc_id: i for i, doc_id in enumerate(snapshot.doc_ids)}
+            self.postings = _Postings(snapshot)
+            self._vocab_pending = True
+            adopted = True
+            return snapshot.jsonl_offset
+        finally:
+            if not adopted:
+                snapshot.close()
+
+    def _ensure_vocab(self):
+        """Add the snapshot's vocabulary to the fuzzy term dictionary. Caller holds self.lock."""
+        if self._vocab_pending:
+            for term in self.snapshot.terms:
+                if term not in self.postings.dropped:
+                    self.terms.add(term)
+            self._vocab_pending = False
+
+    @contextmanager
+    def file_lock(self):
+        """Cross-process lock on the JSONL store, held while appending to or rewriting it."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _replay(self, f) -> int:
+        """Apply JSONL records from f's position on; returns the offset of the last complete line."""
+        offset = f.tell()
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # still being written; picked up next time
+            offset += len(line)
+            try:
+                doc = json.loads(line.decode("utf-8"))
+            except Exception:
+                continue
+            if doc.get("deleted"):
+                self._remove(doc.get("doc_id"))
+            elif doc.get("doc_id") and doc.get("text"):
+                self._add(doc["doc_id"], doc["text"])
+        return offset
+
+    def catch_up(self):
+        """Apply records other processes appended since this index last read the store. Caller holds self.lock."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_ino != self.inode:
+                # Rewritten (compacted) elsewhere: replaying it all is always correct
+                self.offset, self.inode = 0, os.fstat(f.fileno()).st_ino
+            f.seek(self.offset)
+            self.offset = self._replay(f)
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            self.offset = self._load_snapshot()
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    self.inode = os.fstat(f.fileno()).st_ino
+                    f.seek(self.offset)
+                    self.offset = self._replay(f)
+            self.loaded = True
+
+    def _write(self, entries):
+        # Caller holds self.lock. Records other processes appended are applied first,
+        # so self.offset always marks what the in-memory index reflects
+        with self.file_lock():
+            self.catch_up()
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(e) + "\n" for e in entries))
+                self.offset = f.tell()
+                self.inode = os.fstat(f.fileno()).st_ino
+
+    def store(self, doc_id: str, text: str):
+        self.load()
+        with self.lock:
+            self._write([{"doc_id": doc_id, "text": text}])
+            self._add(doc_id, text)
+
+    def store_many(self, items):
+        """Bulk append of (doc_id, text) pairs under a single lock and file handle."""
+        self.load()
+        with self.lock:
+            self._write([{"doc_id": doc_id, "text": text} for doc_id, text in items])
+            for doc_id, text in items:
+                self._add(doc_id, text)
+
+    def delete(self, doc_id: str) -> bool:
+        """Tombstone a document; compaction drops it from the store for good."""
+        self.load()
+        with self.lock:
+            if doc_id not in self.docs:
+                return False
+            self._write([{"doc_id": doc_id, "deleted": True}])
+            self._remove(doc_id)
+            return True
+
+    def expand(self, query: str):
+        """Map each query term to its nearest indexed terms: {term: similarity}."""
+        self._ensure_vocab()
+        expanded = {}
+        for term in dict.fromkeys(tokenize(query)):
+            for match, sim in self.terms.lookup(term, FUZZY_MAX_EXPANSIONS, FUZZY_MIN_SIMILARITY):
+                expanded[match] = max(sim, expanded.get(match, 0.0))
+        return expanded
+
+    def search(self, query: str, top_k: int = 5):
+        self.load()
+        with self.lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            scores = defaultdict(float)
+            for term, sim in self.expand(query).items():
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + n_docs / len(docs))
+                for doc_id, tf in docs.items():
+                    scores[doc_id] += sim * (1 + math.log(tf)) * idf
+
+            # Exact phrase occurrences still dominate, as before; only the leading
+            # candidates are checked so snapshot texts are decompressed sparingly
+            q = query.lower()
+            leading = sorted(scores, key=scores.get, reverse=True)[:max(top_k * 4, 20)]
+            texts = {doc_id: self.text(doc_id) for doc_id in leading}
+            for doc_id, text in texts.items():
+                scores[doc_id] += len(re.findall(re.escape(q), text.lower()))
+
+            ranked = sorted(leading, key=scores.get, reverse=True)[:top_k]
+            return [
+                {"doc_id": doc_id, "text": texts[doc_id], "score": round(scores[doc_id], 4)}
+                for doc_id in ranked
+            ]
+
+
+_index = KeywordIndex()
+
+
+# Implementation function (no MCP decorator)
+@traced("keyword_search", kind="tool")
 def _keyword_search_impl(
-    action: Literal["store", "search"],
+    action: Literal["store", "search", "delete"],
     doc_id: Optional[str] = None,
     text: Optional[str] = None,
     query: Optional[str] = None,
@@ -18,50 +290,38 @@ def _keyword_search_impl(
 
     # Indexing
     if action == "store" and doc_id and text:
-        entry = {"doc_id": doc_id, "text": text}
-        with open(KEYWORD_DB_PATH, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        _index.store(doc_id, text)
         return {"status": "stored"}
 
-    # Search
+    # Removal (tombstoned; dropped from disk on the next compaction)
+    if action == "delete" and doc_id:
+        return {"status": "deleted" if _index.delete(doc_id) else "not_found"}
+
+    # Search (typo-tolerant: query terms are stemmed and expanded to nearby indexed terms)
     if action == "search" and query:
-        results = []
-        if os.path.exists(KEYWORD_DB_PATH):
-            q = query.lower()
-            with open(KEYWORD_DB_PATH, "r") as f:
-                for line in f:
-                    try:
-                        doc = json.loads(line)
-                    except Exception:
-                        continue
-                    text = doc.get("text", "")
-                    if q in text.lower():
-                        score = len(re.findall(re.escape(q), text.lower()))
-                        results.append({"doc_id": doc.get("doc_id"), "text": text, "score": score})
-        results = sorted(results, key=lambda x: x["score"], reverse=True)[:top_k]
-        return {"results": results}
+        return {"results": _index.search(query, top_k)}
 
     return {"error": "Invalid parameters"}
 
 # Register with MCP
 @mcp.tool()
 def keyword_search(
-    action: Literal["store", "search"],
+    action: Literal["store", "search", "delete"],
     doc_id: Optional[str] = None,
     text: Optional[str] = None,
     query: Optional[str] = None,
     top_k: int = 5
 ) -> dict:
     """
-    Index or search documents using exact/substring keywords.
-    
+    Index or search documents by keyword, tolerating typos and word-form variants.
+
     Args:
-        action: Either "store" to index a document or "search" to query
-        doc_id: Document identifier (required for store action)
+        action: "store" to index a document, "search" to query, "delete" to remove a document
+        doc_id: Document identifier (required for store and delete actions)
         text: Document text content (required for store action)
         query: Search query (required for search action)
         top_k: Number of top results to return (default: 5)
-    
+
     Returns:
         Dictionary with status/results or error message
     """
@@ -72,7 +332,7 @@ def run(action: str, doc_id: str = None, text: str = None, query: str = None, to
     return _keyword_search_impl(action=action, doc_id=doc_id, text=text, query=query, top_k=top_k)
 
 # Export
-__all__ = ['keyword_search', 'run', 'mcp']
+__all__ = ['keyword_search', 'run', 'mcp', 'KeywordIndex']
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp.run()
@@ -1,48 +1,62 @@
 # agents/web_retriever/tools/rag_tool.py
 from fastmcp import FastMCP
-from agents.web_retriever.tools import web_tool, semantic_search_tool, keyword_search_tool
+from utils.logger import get_logger
+from utils.tracing import traced
+from agents.web_retriever.tools import web_tool, semantic_search_tool, keyword_search_tool, rerank_tool
+from agents.web_retriever.config import RERANK_CANDIDATES
 from typing import List, Optional
 
 mcp = FastMCP("rag-tool")
+logger = get_logger("rag_tool")
 
 def llm_generate(prompt: str) -> str:
     # Placeholder LLM call
     return f"[LLM Answer]\nPrompt:\n{prompt[:500]}..."
 
-# Implementation function (no decorator)
-def _rag_search_impl(query: str, urls: Optional[List[str]] = None, top_k: int = 5) -> dict:
+# Implementation function (no MCP decorator)
+@traced("rag_search", kind="tool")
+def _rag_search_impl(query: str, urls: Optional[List[str]] = None, top_k: int = 5, rerank: bool = False) -> dict:
     """Implementation of RAG search logic"""
     if urls is None:
         urls = []
     
     # Step 1: Scrape + store
     for url in urls:
-        print(f"Fetching: {url}")  # DEBUG
+        logger.debug(f"Fetching: {url}")
         web_result = web_tool.run(url=url)
         if "text" in web_result:
-            print(f"Text length: {len(web_result['text'])}")  # DEBUG
+            logger.debug(f"Text length: {len(web_result['text'])}")
             
             # Store in semantic search
             sem_store = semantic_search_tool.run(action="store", url=url, text=web_result["text"])
-            print(f"Semantic store result: {sem_store}")  # DEBUG
+            logger.debug(f"Semantic store result: {sem_store}")
             
             # Store in keyword search
             key_store = keyword_search_tool.run(action="store", doc_id=url, text=web_result["text"])
-            print(f"Keyword store result: {key_store}")  # DEBUG
+            logger.debug(f"Keyword store result: {key_store}")
         else:
-            print(f"No text found for {url}")  # DEBUG
+            logger.debug(f"No text found for {url}")
 
-    # Step 2: Retrieve top-K
-    print(f"\nSearching for: {query}")  # DEBUG
-    sem_results = semantic_search_tool.run(action="search", query=query, top_k=top_k).get("results", [])
-    print(f"Semantic results count: {len(sem_results)}")  # DEBUG
+    # Step 2: Retrieve top-K (a wider candidate pool when reranking)
+    logger.debug(f"Searching for: {query}")
+    first_stage_k = max(top_k, RERANK_CANDIDATES) if rerank else top_k
+    sem_results = semantic_search_tool.run(action="search", query=query, top_k=first_stage_k).get("results", [])
+    logger.debug(f"Semantic results count: {len(sem_results)}")
     
-    key_results = keyword_search_tool.run(action="search", query=query, top_k=top_k).get("results", [])
-    print(f"Keyword results count: {len(key_results)}")  # DEBUG
+    key_results = keyword_search_tool.run(action="search", query=query, top_k=first_stage_k).get("results", [])
+    logger.debug(f"Keyword results count: {len(key_results)}")
+
+    # Optional: fuse both lists and keep only the top_k cross-encoder picks
+    if rerank:
+        reranked = rerank_tool.run(query=query, candidates=rerank_tool.fuse(sem_results, key_results), top_k=top_k)
+        logger.debug(f"Reranked {reranked['scored']} candidates (stopped early: {reranked['stopped_early']})")
+        retrieved_docs = reranked["results"]
+    else:
+        retrieved_docs = sem_results + key_results
 
     # Combine context
-    combined_context = "\n".join([d.get("snippet", d.get("text", "")) for d in sem_results + key_results])
-    print(f"Combined context length: {len(combined_context)}")  # DEBUG
+    combined_context = "\n".join([d.get("snippet", d.get("text", "")) for d in retrieved_docs])
+    logger.debug(f"Combined context length: {len(combined_context)}")
 
     # Step 3: LLM answer
     prompt = f"Answer the question using the context below:\n{combined_context}\nQuestion: {query}"
@@ -50,13 +64,13 @@ def _rag_search_impl(query: str, urls: Optional[List[str]] = None, top_k: int =
 
     return {
         "query": query,
-        "retrieved_docs": sem_results + key_results,
+        "retrieved_docs": retrieved_docs,
         "llm_answer": answer
     }
 
 # Register with MCP - calls implementation
 @mcp.tool()
-def rag_search(query: str, urls: Optional[List[str]] = None, top_k: int = 5) -> dict:
+def rag_search(query: str, urls: Optional[List[str]] = None, top_k: int = 5, rerank: bool = False) -> dict:
     """
     Full RAG: scrape URLs, store embeddings in Postgres, keyword index, retrieve, generate LLM answer.
     
@@ -64,15 +78,16 @@ def rag_search(query: str, urls: Optional[List[str]] = None, top_k: int = 5) ->
         query: The search query
         urls: Optional list of URLs to scrape and index
         top_k: Number of top results to retrieve (default: 5)
+        rerank: Fuse semantic + keyword candidates and rerank them with a cross-encoder (default: False)
     
     Returns:
         Dictionary containing query, retrieved_docs, and llm_answer
     """
-    return _rag_search_impl(query=query, urls=urls, top_k=top_k)
+    return _rag_search_impl(query=query, urls=urls, top_k=top_k, rerank=rerank)
 
 # Keep the run function for backwards compatibility
-def run(query: str, urls: Optional[List[str]] = None, top_k: int = 5):
-    return _rag_search_impl(query=query, urls=urls, top_k=top_k)
+def run(query: str, urls: Optional[List[str]] = None, top_k: int = 5, rerank: bool = False):
+    return _rag_search_impl(query=query, urls=urls, top_k=top_k, rerank=rerank)
 
 # Export
 __all__ = ['rag_search', 'run', 'mcp']
@@ -0,0 +1,142 @@
+# agents/web_retriever/tools/rerank_tool.py
+from fastmcp import FastMCP
+from utils import metrics
+from utils.tracing import traced
+from agents.web_retriever.config import (
+    RERANK_MODEL, RERANK_BATCH_SIZE, RERANK_CACHE_SIZE, RERANK_MARGIN, RERANK_MAX_CHARS
+)
+from collections import OrderedDict
+from typing import List, Optional
+import hashlib, threading
+
+mcp = FastMCP("rerank-tool")
+
+_model = None
+def _load_model():
+    global _model
+    if _model is None:
+        from sentence_transformers import CrossEncoder
+        _model = CrossEncoder(RERANK_MODEL, device="cpu", max_length=512)
+    return _model
+
+# (query, passage) content hash -> cross-encoder score, LRU-bounded
+_score_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _passage(doc: dict) -> str:
+    return (doc.get("text") or doc.get("snippet") or "")[:RERANK_MAX_CHARS]
+
+
+def _cache_key(query: str, passage: str) -> str:
+    return hashlib.sha1(f"{query}\x00{passage}".encode("utf-8")).hexdigest()
+
+
+def score_pairs(query: str, passages: List[str]) -> List[float]:
+    """Score (query, passage) pairs, serving repeats from the cache and batching the rest."""
+    keys = [_cache_key(query, p) for p in passages]
+    scores: List[Optional[float]] = [None] * len(passages)
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            if key in _score_cache:
+                _score_cache.move_to_end(key)
+                scores[i] = _score_cache[key]
+                _cache_stats["hits"] += 1
+
+    missing = [i for i, s in enumerate(scores) if s is None]
+    if missing:
+        predicted = _load_model().predict(
+            [(query, passages[i]) for i in missing], batch_size=RERANK_BATCH_SIZE
+        )
+        with _cache_lock:
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                _score_cache[keys[i]] = scores[i]
+                _cache_stats["misses"] += 1
+            while len(_score_cache) > RERANK_CACHE_SIZE:
+                _score_cache.popitem(last=False)
+    return scores
+
+
+def fuse(*result_lists: List[dict], k: int = 60) -> List[dict]:
+    """
+    Reciprocal-rank fusion of semantic ("url"/"snippet") and keyword
+    ("doc_id"/"text") results into one candidate list, best first.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.get("url") or doc.get("doc_id")
+            entry = fused.setdefault(key, {"id": key, "text": _passage(doc), "fused_score": 0.0})
+            entry["fused_score"] += 1.0 / (k + rank + 1)
+            if len(_passage(doc)) > len(entry["text"]):
+                entry["text"] = _passage(doc)
+    return sorted(fused.values(), key=lambda d: d["fused_score"], reverse=True)
+
+
+# Implementation function (no MCP decorator)
+@traced("rerank", kind="tool")
+def _rerank_impl(query: str, candidates: List[dict], top_k: int = 5, margin: float = RERANK_MARGIN) -> dict:
+    """
+    Rerank first-stage candidates (in first-stage order) with a cross-encoder.
+    Candidates are scored batch by batch; scoring stops early once a whole
+    batch falls more than `margin` below the current k-th best score.
+    """
+    if not query or not candidates:
+        return {"results": [], "scored": 0, "stopped_early": False}
+
+    scored = []
+    stopped_early = False
+    for start in range(0, len(candidates), RERANK_BATCH_SIZE):
+        batch = candidates[start:start + RERANK_BATCH_SIZE]
+        batch_scores = score_pairs(query, [_passage(d) for d in batch])
+        scored.extend(zip(batch, batch_scores))
+
+        remaining = len(candidates) - (start + len(batch))
+        if remaining and len(scored) >= top_k:
+            kth = sorted((s for _, s in scored), reverse=True)[top_k - 1]
+            if max(batch_scores) < kth - margin:
+                stopped_early = True
+                break
+
+    scored.sort(key=lambda x: x[1], reverse=True)
+    results = [dict(doc, rerank_score=round(score, 4)) for doc, score in scored[:top_k]]
+    return {"results": results, "scored": len(scored), "stopped_early": stopped_early}
+
+# Register with MCP
+@mcp.tool()
+def rerank(query: str, candidates: List[dict], top_k: int = 5) -> dict:
+    """
+    Reranks retrieved passages with a CPU cross-encoder so fewer, better passages go downstream.
+
+    Args:
+        query: The search query
+        candidates: Retrieved documents, best first (each with "text" or "snippet")
+        top_k: Number of passages to keep (default: 5)
+
+    Returns:
+        Dictionary with reranked results, number of pairs scored and whether scoring stopped early
+    """
+    return _rerank_impl(query=query, candidates=candidates, top_k=top_k)
+
+# Backwards compatibility
+def run(query: str, candidates: List[dict], top_k: int = 5):
+    return _rerank_impl(query=query, candidates=candidates, top_k=top_k)
+
+def cache_stats() -> dict:
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_score_cache)}
+
+def _hit_ratio() -> float:
+    with _cache_lock:
+        lookups = _cache_stats["hits"] + _cache_stats["misses"]
+        return _cache_stats["hits"] / lookups if lookups else 0.0
+
+metrics.Gauge("rerank_cache_hit_ratio", "Share of rerank pair scores served from cache.", fn=_hit_ratio)
+
+# Export
+__all__ = ['rerank', 'run', 'fuse', 'score_pairs', 'cache_stats', 'mcp']
+
+if __name__ == "__main__":
+    mcp.run()
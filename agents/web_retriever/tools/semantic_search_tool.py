@@ -4,6 +4,8 @@ from agents.web_retriever.config import POSTGRES_URI, EMBED_MODEL, VECTOR_DIM
 from sqlalchemy import create_engine, Column, Integer, Text, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pgvector.sqlalchemy import Vector
+from utils.single_flight import SingleFlight
+from utils.tracing import instrument_sqlalchemy, traced
 from typing import Optional, Literal, List
 import numpy as np
 
@@ -11,6 +13,7 @@ mcp = FastMCP("semantic-search-tool")
 
 Base = declarative_base()
 engine = create_engine(POSTGRES_URI)
+instrument_sqlalchemy(engine, db="documents")
 Session = sessionmaker(bind=engine)
 
 _model = None
@@ -30,6 +33,15 @@ class Document(Base):
 
 Base.metadata.create_all(engine)
 
+# Concurrent searches for the same query share one encode
+_embed_flight = SingleFlight("embed")
+
+@traced("embed_query", kind="embedding")
+def embed_query(query: str) -> List[float]:
+    return _embed_flight.do(
+        query, lambda: _load_model().encode([query], normalize_embeddings=True)[0].tolist()
+    )
+
 def store(url: str, text: str) -> dict:
     session = Session()
     try:
@@ -52,9 +64,39 @@ def store(url: str, text: str) -> dict:
     finally:
         session.close()
 
+def store_many(items: List[tuple], batch_size: int = 64) -> dict:
+    """
+    Bulk upsert of (url, text) pairs: one batched encode and one transaction.
+    """
+    if not items:
+        return {"status": "stored", "count": 0}
+    session = Session()
+    try:
+        model = _load_model()
+        embs = model.encode([t for _, t in items], batch_size=batch_size, normalize_embeddings=True)
+
+        existing = {
+            d.url: d for d in session.query(Document).filter(Document.url.in_([u for u, _ in items]))
+        }
+        for (url, text), emb in zip(items, embs):
+            doc = existing.get(url)
+            if doc:
+                doc.text = text
+                doc.embedding = emb.tolist()
+            else:
+                doc = Document(url=url, text=text, embedding=emb.tolist())
+                session.add(doc)
+                existing[url] = doc
+        session.commit()
+        return {"status": "stored", "count": len(items)}
+    except Exception as e:
+        session.rollback()
+        return {"error": f"Failed to store documents: {str(e)}"}
+    finally:
+        session.close()
+
 def search(query: str, top_k: int = 5) -> List[dict]:
-    model = _load_model()
-    q_emb = model.encode([query], normalize_embeddings=True)[0].tolist()
+    q_emb = embed_query(query)
     session = Session()
     
     try:
@@ -84,7 +126,8 @@ def search(query: str, top_k: int = 5) -> List[dict]:
     finally:
         session.close()
 
-# Implementation function (no decorator)
+# Implementation function (no MCP decorator)
+@traced("semantic_search", kind="tool")
 def _semantic_search_impl(
     action: Literal["store", "search"],
     url: Optional[str] = None,
@@ -132,7 +175,7 @@ def run(action: str, url: str = None, text: str = None, query: str = None, top_k
     return _semantic_search_impl(action=action, url=url, text=text, query=query, top_k=top_k)
 
 # Export
-__all__ = ['semantic_search', 'store', 'search', 'run', 'mcp']
+__all__ = ['semantic_search', 'store', 'store_many', 'search', 'embed_query', 'run', 'mcp']
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
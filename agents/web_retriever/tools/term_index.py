@@ -0,0 +1,245 @@
+# agents/web_retriever/tools/term_index.py
+"""
+Term Index
+Typo-tolerant dictionary over the keyword vocabulary.
+
+Terms are stemmed at index time, so "healthcare"/"healthcares" and
+"diagnose"/"diagnosing" share an entry. Lookups go through a trigram
+index (longer terms) and a one-edit deletion index (short terms, where
+trigrams carry too little signal), so a misspelled query term is mapped
+to its nearest indexed terms without scanning the vocabulary. Query terms
+of PREFIX_MIN_LEN or more letters also match indexed terms they start
+(e.g. "health" -> "healthcar"), which keeps the recall of the old
+substring search for word prefixes.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# (suffix, replacement, minimum stem length, condition) — checked in order, first match wins.
+# Conditions on the remaining stem: "m>0"/"m>1" Porter measure (vowel-consonant runs),
+# "vowel" contains a vowel (then Porter's e-restore applies: hoping -> hope),
+# "consonant" ends in a consonant, "plural" is not a -s/-u/-i word (analysis, virus)
+_SUFFIX_RULES = [
+    ("ational", "ate", 3, None), ("ization", "ize", 3, None), ("fulness", "ful", 3, None),
+    ("iveness", "ive", 3, None), ("ousness", "ous", 3, None), ("ations", "ate", 3, None),
+    ("ation", "ate", 3, None), ("ments", "", 4, None), ("ment", "", 4, None),
+    ("ities", "", 4, None), ("ity", "", 4, None), ("ness", "", 3, None),
+    ("ings", "", 2, "vowel"), ("ing", "", 2, "vowel"), ("ies", "y", 2, None), ("ied", "y", 2, None),
+    ("sses", "ss", 2, None), ("edly", "", 2, "vowel"), ("eed", "ee", 1, "m>0"), ("ed", "", 2, "vowel"),
+    ("ly", "", 4, "consonant"), ("ches", "ch", 2, None), ("shes", "sh", 2, None), ("xes", "x", 2, None),
+    ("ers", "", 3, "m>1"), ("er", "", 3, "m>1"), ("s", "", 3, "plural"),
+]
+
+# Words the rules would conflate with unrelated ones (news/new, species/specy, does/doe)
+_EXCEPTIONS = {
+    "news": "news", "series": "series", "species": "species", "does": "do", "goes": "go",
+    "always": "always", "perhaps": "perhaps", "whereas": "whereas", "lens": "lens",
+}
+
+_VOWELS = "aeiou"
+
+
+def _is_consonant(word: str, i: int) -> bool:
+    if word[i] in _VOWELS:
+        return False
+    # "y" after a consonant is a vowel (study, rhythm)
+    return word[i] != "y" or i == 0 or not _is_consonant(word, i - 1)
+
+
+def _measure(stem: str) -> int:
+    """Porter's m: the number of vowel-consonant runs in the stem."""
+    m, prev_vowel = 0, False
+    for i in range(len(stem)):
+        vowel = not _is_consonant(stem, i)
+        if prev_vowel and not vowel:
+            m += 1
+        prev_vowel = vowel
+    return m
+
+
+def _ends_cvc(stem: str) -> bool:
+    """Consonant-vowel-consonant ending, last not w/x/y (hop, car): short words that keep their "e"."""
+    return (len(stem) >= 3 and _is_consonant(stem, len(stem) - 3) and not _is_consonant(stem, len(stem) - 2)
+            and _is_consonant(stem, len(stem) - 1) and stem[-1] not in "wxy")
+
+
+def _holds(condition, stem: str) -> bool:
+    if condition == "m>0":
+        return _measure(stem) > 0
+    if condition == "m>1":
+        return _measure(stem) > 1
+    if condition == "vowel":
+        return any(not _is_consonant(stem, i) for i in range(len(stem)))
+    if condition == "consonant":
+        return _is_consonant(stem, len(stem) - 1)
+    if condition == "plural":
+        return stem[-1] not in "sui"
+    return True
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer (Porter-style, single pass)."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word in _EXCEPTIONS:
+        return _EXCEPTIONS[word]
+    base = word
+    for suffix, repl, min_stem, condition in _SUFFIX_RULES:
+        if not word.endswith(suffix) or len(word) - len(suffix) < min_stem:
+            continue
+        base = word[: len(word) - len(suffix)]
+        if not _holds(condition, base):
+            base = word
+            if suffix == "eed":
+                break  # need, feed: not an -ed word either
+            continue
+        base += repl
+        if condition == "vowel":
+            # Porter's fix-ups after -ed/-ing: hoping -> hope, running -> run, rated -> rate
+            if base.endswith(("at", "bl", "iz")):
+                base += "e"
+            elif len(base) > 2 and base[-1] == base[-2] and base[-1] not in "lsz":
+                base = base[:-1]
+            elif _measure(base) == 1 and (_ends_cvc(base) or len(base) == 2):
+                base += "e"  # hop -> hope, us -> use
+        elif not repl and len(base) > 3 and base[-1] == base[-2] and base[-1] not in "lsz":
+            base = base[:-1]
+        break
+    # A final silent "e" goes unless the word is short (case, hope), so "diagnose" meets "diagnosing"
+    if base.endswith("e") and len(base) > 3:
+        rest = base[:-1]
+        m = _measure(rest)
+        if m > 1 or (m == 1 and not _ends_cvc(rest)):
+            base = rest
+    return base
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case, split on non-alphanumerics and stem."""
+    return [stem(t) for t in TOKEN_RE.findall(text.lower())]
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"$${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance with an early exit once `limit` is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class TermIndex:
+    """Vocabulary with trigram and deletion lookups for fuzzy term expansion."""
+
+    SHORT_TERM = 4       # terms up to this length use the deletion index
+    PREFIX_MIN_LEN = 4   # query terms at least this long also match indexed terms they start
+
+    def __init__(self):
+        self.terms: Set[str] = set()
+        self.trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+        self.delete_postings: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term: str):
+        return term in self.terms
+
+    def add(self, term: str):
+        """Add an already-stemmed term to the vocabulary."""
+        if not term or term in self.terms:
+            return
+        self.terms.add(term)
+        for g in _trigrams(term):
+            self.trigram_postings[g].add(term)
+        if len(term) <= self.SHORT_TERM + 1:
+            for d in _deletes(term):
+                self.delete_postings[d].add(term)
+
+    def remove(self, term: str):
+        """Drop a term no document uses any more, so it stops taking expansion slots."""
+        if term not in self.terms:
+            return
+        self.terms.discard(term)
+        for postings, keys in ((self.trigram_postings, _trigrams(term)), (self.delete_postings, _deletes(term))):
+            for key in keys:
+                bucket = postings.get(key)
+                if bucket is not None:
+                    bucket.discard(term)
+                    if not bucket:
+                        del postings[key]
+
+    def _prefix_matches(self, term: str) -> Set[str]:
+        """Indexed terms starting with `term`: they contain all of its start-anchored trigrams."""
+        padded = f"$${term}"
+        buckets = sorted((self.trigram_postings.get(padded[i:i + 3], set()) for i in range(len(term))), key=len)
+        if not buckets or not buckets[0]:
+            return set()
+        return {cand for cand in buckets[0] if cand != term and cand.startswith(term)}
+
+    def lookup(self, term: str, max_expansions: int = 3, min_similarity: float = 0.6) -> List[Tuple[str, float]]:
+        """
+        Return up to `max_expansions` indexed terms close to `term` as
+        (term, similarity) pairs, best first. An exact hit skips the fuzzy
+        stages; prefix matches (similarity = share of the longer term the
+        query covers) are added either way.
+        """
+        candidates: Dict[str, float] = {}
+        if len(term) >= self.PREFIX_MIN_LEN:
+            for cand in self._prefix_matches(term):
+                sim = len(term) / len(cand)
+                if sim >= min_similarity:
+                    candidates[cand] = sim
+
+        if term in self.terms:
+            candidates[term] = 1.0
+        elif len(term) <= self.SHORT_TERM:
+            # One edit away: shared deletion or term is a deletion of a candidate
+            for key in _deletes(term) | {term}:
+                matches = set(self.delete_postings.get(key, ()))
+                if key in self.terms:
+                    matches.add(key)
+                for cand in matches:
+                    if _edit_distance(term, cand, 1) <= 1:
+                        sim = 1.0 - 1.0 / (max(len(cand), len(term)) + 1)
+                        candidates[cand] = max(sim, candidates.get(cand, 0.0))
+        else:
+            grams = _trigrams(term)
+            overlap: Dict[str, int] = defaultdict(int)
+            for g in grams:
+                for cand in self.trigram_postings.get(g, ()):
+                    overlap[cand] += 1
+            limit = max(1, len(term) // 4)
+            for cand, shared in overlap.items():
+                dice = 2.0 * shared / (len(grams) + len(cand) + 1)
+                if dice < min_similarity:
+                    continue
+                dist = _edit_distance(term, cand, limit)
+                if dist > limit:
+                    continue
+                candidates[cand] = max(dice, candidates.get(cand, 0.0))
+
+        ranked = sorted(candidates.items(), key=lambda x: (-x[1], x[0]))
+        return ranked[:max_expansions]
+
+
+__all__ = ["TermIndex", "stem", "tokenize"]
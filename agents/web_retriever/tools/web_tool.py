@@ -4,47 +4,56 @@ import requests
 from readability import Document
 from bs4 import BeautifulSoup
 import chardet
-from agents.web_retriever.config import FETCH_TIMEOUT, USER_AGENT
+from agents.web_retriever.config import FETCH_TIMEOUT, USER_AGENT, WEB_FIXTURE_URL
+from utils.cassette import http_get
+from utils.single_flight import SingleFlight
+from utils.tracing import traced
 from typing import Optional
 
 mcp = FastMCP("web-tool")
 
-@mcp.tool()
-def fetch_webpage(url: str) -> dict:
+# Concurrent fetches of the same URL share one download
+_fetch_flight = SingleFlight("fetch")
+
+
+def extract_text(raw_bytes: bytes) -> dict:
     """
-    Fetches a webpage and extracts readable text content.
-    
-    Args:
-        url: The URL of the webpage to fetch
-    
-    Returns:
-        Dictionary containing url, title, text, and metadata, or error message
+    Decode raw HTML bytes and extract the readable title and text.
+    Shared by fetch_webpage and the offline ingestion pipeline.
     """
+    enc = chardet.detect(raw_bytes).get("encoding") or "utf-8"
+    html = raw_bytes.decode(enc, errors="replace")
+
+    doc = Document(html)
+    title = doc.short_title()
+    summary_html = doc.summary()
+    text = BeautifulSoup(summary_html, "html.parser").get_text(separator="\n")
+    return {"title": title, "text": text, "encoding": enc}
+
+def _fetch(url: str) -> dict:
     headers = {"User-Agent": USER_AGENT}
     
     try:
-        r = requests.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+        if WEB_FIXTURE_URL:
+            r = http_get(f"{WEB_FIXTURE_URL.rstrip('/')}/fetch", params={"url": url},
+                         headers=headers, timeout=FETCH_TIMEOUT)
+        else:
+            r = http_get(url, headers=headers, timeout=FETCH_TIMEOUT)
         
         if r.status_code != 200:
             return {"error": f"Failed to fetch {url}: {r.status_code}"}
 
-        raw_bytes = r.content
-        enc = chardet.detect(raw_bytes).get("encoding", "utf-8")
-        html = raw_bytes.decode(enc, errors="replace")
-
-        doc = Document(html)
-        title = doc.short_title()
-        summary_html = doc.summary()
-        text = BeautifulSoup(summary_html, "html.parser").get_text(separator="\n")
+        extracted = extract_text(r.content)
+        text = extracted["text"]
 
         return {
             "url": url,
-            "title": title,
+            "title": extracted["title"],
             "text": text,
             "metadata": {
                 "length": len(text),
                 "status": r.status_code,
-                "encoding": enc
+                "encoding": extracted["encoding"]
             }
         }
     
@@ -55,12 +64,33 @@ def fetch_webpage(url: str) -> dict:
     except Exception as e:
         return {"error": f"Error processing {url}: {str(e)}"}
 
+# Implementation function (no MCP decorator)
+@traced("fetch_webpage", kind="tool")
+def _fetch_webpage_impl(url: str) -> dict:
+    return _fetch_flight.do(url, lambda: _fetch(url))
+
+@mcp.tool()
+def fetch_webpage(url: str) -> dict:
+    """
+    Fetches a webpage and extracts readable text content.
+    
+    Args:
+        url: The URL of the webpage to fetch
+    
+    Returns:
+        Dictionary containing url, title, text, and metadata, or error message
+    """
+    return _fetch_webpage_impl(url)
+
 # Backwards compatibility
 def run(url: str):
-    return fetch_webpage(url)
+    return _fetch_webpage_impl(url)
+
+def flight_stats() -> dict:
+    return _fetch_flight.get_stats()
 
 # Export
-__all__ = ['fetch_webpage', 'run', 'mcp']
+__all__ = ['fetch_webpage', 'extract_text', 'run', 'flight_stats', 'mcp']
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
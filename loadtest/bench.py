@@ -0,0 +1,134 @@
+# loadtest/bench.py
+"""
+Throughput/latency benchmark for the orchestration code.
+
+Calls a target function concurrently with a list of queries and reports
+throughput, latency percentiles and errors. Run it against the fake LLM
+and fixture web servers to measure the pipeline itself, offline and
+reproducibly:
+
+    python -m loadtest.fake_llm --port 8900 --latency lognormal:0.4,0.3 --tps 120 &
+    python -m loadtest.fixture_web --port 8901 &
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 WEB_FIXTURE_URL=http://127.0.0.1:8901 \
+        python -m loadtest.bench --target main:run_research --requests 200 --concurrency 16
+
+--target is "module:function"; the function is called with one query
+string. LLM response caching is disabled unless --cache is given, so
+every request reaches the (fake) model.
+
+With --cassette a real run can be captured once (--record) and replayed
+offline afterwards at original or accelerated timing (--speed), see
+utils/cassette.py.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_QUERIES = [
+    "Impact of AI on global healthcare",
+    "What is photosynthesis",
+    "Compare solar and wind energy costs in Germany and Spain since 2010",
+    "History of the Roman empire",
+    "Effects of remote work on urban housing markets and commuting patterns",
+    "How do vaccines train the immune system?",
+    "Causes and consequences of the 2008 financial crisis",
+    "Trends in electric vehicle adoption across Europe, China and the US",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def load_target(spec: str) -> Callable[[str], object]:
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name or "run")
+
+
+def run_benchmark(target: Callable[[str], object], queries: List[str], requests: int, concurrency: int,
+                  warmup: int = 0) -> Dict:
+    """Call `target` `requests` times (cycling through queries) with `concurrency` workers."""
+    for i in range(warmup):
+        target(queries[i % len(queries)])
+
+    def _one(i: int):
+        started = time.perf_counter()
+        try:
+            target(queries[i % len(queries)])
+            error = None
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+        return time.perf_counter() - started, error
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        outcomes = list(pool.map(_one, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = [t for t, err in outcomes if err is None]
+    errors = [err for _, err in outcomes if err is not None]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 3) if wall else None,
+        "latency_s": {f"p{p}": round(percentile(latencies, p), 4) if latencies else None for p in (50, 90, 95, 99)},
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", default="main:run_research", help="module:function taking a query string")
+    parser.add_argument("--queries", help="file with one query per line (default: built-in set)")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls first (client setup, imports)")
+    parser.add_argument("--cache", action="store_true", help="keep the LLM response cache enabled")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--cassette", help="record to / replay from this cassette file")
+    parser.add_argument("--record", action="store_true", help="record the cassette instead of replaying it")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay timing factor (0 = no delays)")
+    args = parser.parse_args(argv)
+
+    if not args.cache:
+        os.environ["LLM_CACHE_DISABLED"] = "1"  # read when the gateway is first imported
+    if args.cassette:
+        os.environ.update({"CASSETTE_PATH": args.cassette, "CASSETTE_MODE": "record" if args.record else "replay",
+                           "CASSETTE_SPEED": str(args.speed)})
+    elif "OPENAI_BASE_URL" not in os.environ:
+        print("[WARN] OPENAI_BASE_URL is not set; LLM calls will go to the real API.", file=sys.stderr)
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    report = run_benchmark(load_target(args.target), queries, args.requests, args.concurrency, args.warmup)
+    report["target"] = args.target
+    gateway = sys.modules.get("utils.llm_gateway")
+    if gateway is not None:
+        report["llm"] = {"cache": gateway.cache_stats(), "scheduler": gateway.scheduler_metrics()}
+    tape = sys.modules["utils.cassette"].active() if "utils.cassette" in sys.modules else None
+    if tape is not None:
+        report["cassette"] = tape.get_stats()
+
+    text = json.dumps(report, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
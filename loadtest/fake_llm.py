@@ -0,0 +1,255 @@
+# loadtest/fake_llm.py
+"""
+Fake OpenAI-compatible LLM server for offline load tests.
+
+Serves POST /v1/chat/completions (plain and streaming) with deterministic
+responses: the same seed, model and messages always give the same text,
+usage and simulated latency, regardless of request order or concurrency.
+
+    python -m loadtest.fake_llm --port 8900 --latency lognormal:0.6,0.4 --tps 80
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 python main.py
+
+Latency = time to first token (sampled from --latency) + completion
+tokens / --tps. Responses come from --rules (a JSON list of
+{"match": <regex over the prompt>, "response": <template>}),
+falling back to built-in templates: a numbered list when the prompt asks
+for a list, a JSON object when it asks for JSON, and filler text
+otherwise. Templates may use {prompt}, {last_user}, {model} and {words}.
+Optional --rpm/--tpm limits answer 429 with x-ratelimit-* headers like
+the real API, and --error-rate injects 500s (from a seeded sequence, so
+a retried request can succeed). GET /stats reports counters.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z\-]{3,}")
+
+
+def parse_latency(spec: str):
+    """
+    Latency distribution from a spec string (seconds):
+    fixed:0.5 | uniform:0.2,1.0 | normal:0.8,0.2 | lognormal:<median>,<sigma>
+    Returns a function rng -> seconds.
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(a) for a in args.split(",") if a] if args else []
+    if kind == "fixed":
+        return lambda rng: params[0] if params else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeLLM:
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: str = "fixed:0",
+        tps: float = 0.0,
+        completion_tokens: int = 120,
+        rules: Optional[List[dict]] = None,
+        rpm: int = 0,
+        tpm: int = 0,
+        error_rate: float = 0.0,
+    ):
+        self.seed = seed
+        self.latency = parse_latency(latency)
+        self.tps = tps
+        self.completion_tokens = completion_tokens
+        self.rules = [(re.compile(r["match"], re.IGNORECASE | re.DOTALL), r) for r in rules or []]
+        self.rpm = rpm
+        self.tpm = tpm
+        self.error_rate = error_rate
+        self._errors = random.Random(seed)
+        self.window = deque()   # (time, tokens) for the last minute
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "errors": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0, "simulated_seconds": 0.0}
+
+    def _rng(self, body: dict) -> random.Random:
+        key = json.dumps([self.seed, body.get("model"), body.get("messages")], sort_keys=True, default=str)
+        return random.Random(hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _text(self, prompt: str, last_user: str, model: str, rng: random.Random, limit: int) -> str:
+        words = _WORD.findall(last_user) or ["result"]
+        fields = {"prompt": prompt, "last_user": last_user, "model": model, "words": " ".join(words[:8])}
+        for pattern, rule in self.rules:
+            if pattern.search(prompt):
+                return rule["response"].format(**fields)
+        if re.search(r"\blist\b", prompt, re.IGNORECASE):
+            n = rng.randint(2, 5)
+            return "\n".join(f"{i + 1}. {' '.join(rng.sample(words, min(3, len(words))))}" for i in range(n))
+        if "json" in prompt.lower():
+            return json.dumps({"summary": " ".join(words[:12]), "score": round(rng.random(), 3), "items": words[:5]})
+        n = min(limit, self.completion_tokens)
+        return " ".join(rng.choice(words) for _ in range(max(1, n * 3 // 4)))
+
+    def admit(self, tokens: int):
+        """Sliding one-minute RPM/TPM window; returns (ok, headers)."""
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0][0] > 60:
+                self.window.popleft()
+            used_req = len(self.window)
+            used_tok = sum(t for _, t in self.window)
+            over = (self.rpm and used_req >= self.rpm) or (self.tpm and used_tok + tokens > self.tpm)
+            if not over:
+                self.window.append((now, tokens))
+                used_req += 1
+                used_tok += tokens
+            reset = 60 - (now - self.window[0][0]) if self.window else 0
+        headers = {}
+        if self.rpm:
+            headers.update({"x-ratelimit-limit-requests": str(self.rpm),
+                            "x-ratelimit-remaining-requests": str(max(0, self.rpm - used_req))})
+        if self.tpm:
+            headers.update({"x-ratelimit-limit-tokens": str(self.tpm),
+                            "x-ratelimit-remaining-tokens": str(max(0, self.tpm - used_tok))})
+        if over:
+            headers["retry-after-ms"] = str(int(reset * 1000))
+        return not over, headers
+
+    def complete(self, body: dict) -> dict:
+        """Build the response and its simulated timing for one request."""
+        rng = self._rng(body)
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        last_user = next((str(m.get("content", "")) for m in reversed(messages) if m.get("role") == "user"), prompt)
+        limit = body.get("max_tokens") or body.get("max_completion_tokens") or 4096
+        text = self._text(prompt, last_user, body.get("model", ""), rng, limit)
+        prompt_tokens = count_tokens(prompt)
+        completion_tokens = min(count_tokens(text), limit)
+        ttft = self.latency(rng)
+        generation = completion_tokens / self.tps if self.tps else 0.0
+        with self.lock:
+            fail = self.error_rate > 0 and self._errors.random() < self.error_rate
+        return {
+            "text": text,
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+            "ttft": ttft,
+            "generation": generation,
+            "fail": fail,
+        }
+
+
+def create_app(llm: FakeLLM) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI-compatible LLM")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        result = llm.complete(body)
+        ok, headers = llm.admit(result["usage"]["total_tokens"])
+        with llm.lock:
+            llm.stats["requests"] += 1
+        if not ok:
+            with llm.lock:
+                llm.stats["rate_limited"] += 1
+            return JSONResponse({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                                status_code=429, headers=headers)
+        if result["fail"]:
+            with llm.lock:
+                llm.stats["errors"] += 1
+            return JSONResponse({"error": {"message": "Injected failure", "type": "server_error"}}, status_code=500)
+
+        with llm.lock:
+            llm.stats["prompt_tokens"] += result["usage"]["prompt_tokens"]
+            llm.stats["completion_tokens"] += result["usage"]["completion_tokens"]
+            llm.stats["simulated_seconds"] += result["ttft"] + result["generation"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+
+        if not body.get("stream"):
+            await asyncio.sleep(result["ttft"] + result["generation"])
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": result["text"]}}],
+                "usage": result["usage"],
+            }, headers=headers)
+
+        with llm.lock:
+            llm.stats["streamed"] += 1
+
+        async def _events():
+            await asyncio.sleep(result["ttft"])
+            pieces = re.findall(r"\S+\s*", result["text"]) or [result["text"]]
+            delay = result["generation"] / len(pieces)
+            for i, piece in enumerate(pieces):
+                delta = {"role": "assistant", "content": piece} if i == 0 else {"content": piece}
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if delay:
+                    await asyncio.sleep(delay)
+            done = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream", headers=headers)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "loadtest"}]}
+
+    @app.get("/stats")
+    async def stats():
+        with llm.lock:
+            return dict(llm.stats)
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="fixed:0", help="time to first token distribution")
+    parser.add_argument("--tps", type=float, default=0.0, help="output tokens per second (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="length of filler responses")
+    parser.add_argument("--rules", help="JSON file of {match, response} templates")
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    rules = None
+    if args.rules:
+        with open(args.rules, "r") as f:
+            rules = json.load(f)
+    llm = FakeLLM(args.seed, args.latency, args.tps, args.completion_tokens, rules, args.rpm, args.tpm, args.error_rate)
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
+
+
+__all__ = ["FakeLLM", "create_app", "parse_latency", "main"]
+
+if __name__ == "__main__":
+    main()
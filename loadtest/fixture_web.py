@@ -0,0 +1,168 @@
+# loadtest/fixture_web.py
+"""
+Fixture web server standing in for live websites and GitHub in load tests.
+
+    python -m loadtest.fixture_web --port 8901 --latency uniform:0.05,0.3
+    WEB_FIXTURE_URL=http://127.0.0.1:8901 GITHUB_BASE_URL=http://127.0.0.1:8901 ...
+
+- GET /fetch?url=<original url> serves the page the web retriever asked
+  for: a file from --pages (a directory with an index.json mapping
+  url -> file name) when present, otherwise a generated article whose
+  title and paragraphs are derived from the URL, so every URL gives the
+  same page on every run.
+- GET /{owner}/{repo}/archive/refs/heads/main.zip serves a repository
+  archive: --repo-dir zipped, or a small generated Python project.
+- --latency and --error-rate work as in loadtest.fake_llm.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import zipfile
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, Response
+
+from loadtest.fake_llm import parse_latency
+
+_VOCAB = (
+    "research data analysis growth policy market climate energy health model system network study "
+    "report evidence impact trend region population technology cost supply demand risk result"
+).split()
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest())
+
+
+def generate_page(url: str, seed: int = 0, paragraphs: int = 6) -> str:
+    """Deterministic article HTML for a URL."""
+    rng = _rng(seed, url)
+    path_words = [w for w in urlsplit(url).path.replace("-", "/").replace("_", "/").split("/") if w.isalpha()]
+    words = path_words + _VOCAB
+    title = " ".join(w.capitalize() for w in (path_words or rng.sample(_VOCAB, 3))[:6])
+    body = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            s = " ".join(rng.choice(words) for _ in range(rng.randint(8, 18)))
+            sentences.append(s.capitalize() + ".")
+        body.append(f"<p>{' '.join(sentences)}</p>")
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<nav>Home | About</nav><article><h1>{title}</h1>{''.join(body)}</article>"
+        f"<footer>Fixture page for {url}</footer></body></html>"
+    )
+
+
+def generate_repo(owner: str, repo: str, seed: int = 0, files: int = 8) -> bytes:
+    """Zip archive of a small generated Python project, laid out like a GitHub archive."""
+    rng = _rng(seed, owner, repo)
+    buf = io.BytesIO()
+    root = f"{repo}-main"
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{root}/README.md", f"# {repo}\n\nGenerated fixture repository for {owner}/{repo}.\n")
+        zf.writestr(f"{root}/requirements.txt", "requests\nfastapi\n")
+        for i in range(files):
+            name = f"{rng.choice(_VOCAB)}_{i}"
+            funcs = []
+            for j in range(rng.randint(2, 5)):
+                arg = rng.choice(_VOCAB)
+                funcs.append(
+                    f"def {rng.choice(_VOCAB)}_{j}({arg}):\n"
+                    f'    """Compute {rng.choice(_VOCAB)} for {arg}."""\n'
+                    f"    return [{arg} * {rng.randint(1, 9)} for _ in range({rng.randint(2, 20)})]\n"
+                )
+            zf.writestr(f"{root}/src/{name}.py", "import os\n\n\n" + "\n\n".join(funcs))
+    return buf.getvalue()
+
+
+def zip_directory(path: str, root: str) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                zf.write(full, os.path.join(root, os.path.relpath(full, path)))
+    return buf.getvalue()
+
+
+def create_app(
+    seed: int = 0,
+    latency: str = "fixed:0",
+    error_rate: float = 0.0,
+    pages_dir: Optional[str] = None,
+    repo_dir: Optional[str] = None,
+) -> FastAPI:
+    app = FastAPI(title="Fixture web server")
+    sample_latency = parse_latency(latency)
+    errors = random.Random(seed)
+    lock = threading.Lock()
+    stats = {"pages": 0, "archives": 0, "errors": 0}
+    index = {}
+    if pages_dir:
+        with open(os.path.join(pages_dir, "index.json"), "r") as f:
+            index = json.load(f)
+
+    async def _delay_or_fail(key: str):
+        await asyncio.sleep(sample_latency(_rng(seed, "latency", key)))
+        with lock:
+            fail = error_rate > 0 and errors.random() < error_rate
+            if fail:
+                stats["errors"] += 1
+        if fail:
+            raise HTTPException(status_code=503, detail="Injected failure")
+
+    @app.get("/fetch", response_class=HTMLResponse)
+    async def fetch(url: str):
+        await _delay_or_fail(url)
+        with lock:
+            stats["pages"] += 1
+        if url in index:
+            with open(os.path.join(pages_dir, index[url]), "rb") as f:
+                return HTMLResponse(f.read())
+        return HTMLResponse(generate_page(url, seed))
+
+    @app.get("/{owner}/{repo}/archive/refs/heads/main.zip")
+    async def archive(owner: str, repo: str):
+        await _delay_or_fail(f"{owner}/{repo}")
+        with lock:
+            stats["archives"] += 1
+        data = zip_directory(repo_dir, f"{repo}-main") if repo_dir else generate_repo(owner, repo, seed)
+        return Response(data, media_type="application/zip")
+
+    @app.get("/stats")
+    async def get_stats():
+        with lock:
+            return dict(stats)
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pages", help="directory with index.json (url -> file) and page files")
+    parser.add_argument("--repo-dir", help="directory served as every repository archive")
+    args = parser.parse_args(argv)
+    app = create_app(args.seed, args.latency, args.error_rate, args.pages, args.repo_dir)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+__all__ = ["create_app", "generate_page", "generate_repo", "main"]
+
+if __name__ == "__main__":
+    main()
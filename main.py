@@ -1,11 +1,21 @@
 # main.py
+import copy
+from typing import Optional
 from langgraph.graph import StateGraph, END, START
+from utils import accounting
+from utils.single_flight import SingleFlight
+from utils.logger import configure_logging
+from utils.tracing import start_trace, traced
 # ---- Coordinator ----
 from agents.coordinator.coordinator_agent import research_coordinator
 from agents.coordinator.tools.query_decomposer import query_decomposer
 from agents.coordinator.tools.task_prioritizer import task_prioritizer
 from agents.coordinator.tools.progress_tracking import progress_tracking
 from agents.coordinator.tools.result_synthesis import result_synthesis
+from agents.coordinator.tools.dag_executor import run_parallel
+from agents.coordinator.tools.progress_tracker import ProgressTracker
+from agents.coordinator.tools.session_cache import session_cache
+from agents.coordinator.config import EXECUTION_MODE, MAX_PARALLEL_TASKS
 
 # ---- Web Retriever ----
 from agents.web_retriever.web_retriever_agent import web_scraper
@@ -19,6 +29,8 @@ from agents.fact_validation.fact_validation_agent import fact_validation
 # ---- Output Formatter ----
 from agents.output_formatter.output_formatter_agent import output_formatter
 
+configure_logging()
+
 # --- Shared state schema ---
 state = {
     "query": str,
@@ -29,22 +41,57 @@ state = {
     "validated_facts": list,
     "final_report": str,
     "agent_status": dict,
-    "progress": dict
+    "progress": dict,
+    "task_results": list,
+    "dag_stats": dict,
+    "run_id": str,
+    "session_id": str,
+    "accounting": dict
 }
 
+progress_tracker = ProgressTracker()
+
+
+def parallel_executor(state):
+    """Run all prioritized subtasks as a dependency DAG and join their outputs."""
+    handlers = {
+        "web_scraper": web_scraper,
+        "deep_analysis": deep_analysis,
+        "fact_validation": fact_validation,
+    }
+    # Subtasks the session has already retrieved or analyzed are answered from its working set
+    session_id = state.get("session_id")
+    handlers = {agent: session_cache.wrap(session_id, agent, fn) for agent, fn in handlers.items()}
+    run_id = state.get("run_id") or progress_tracker.start("Research Workflow")
+    joined = run_parallel(
+        state, handlers, max_parallel=MAX_PARALLEL_TASKS,
+        on_update=lambda task, status, result=None: progress_tracker.update(task, status, run_id=run_id, detail=result),
+    )
+    progress_tracker.finish(run_id)
+    joined["run_id"] = run_id
+    joined["progress"] = progress_tracker.get_status(run_id)
+    joined["next_agent"] = "output_formatter"
+    return joined
+
+
+def _node(fn):
+    """Graph node wrapped in a trace span named after it."""
+    return traced(fn.__name__, kind="node")(fn)
+
 # --- Build LangGraph ---
 graph = StateGraph(state)
 
 # --- Add Nodes ---
-graph.add_node("research_coordinator", research_coordinator)
-graph.add_node("query_decomposer", query_decomposer)
-graph.add_node("task_prioritizer", task_prioritizer)
-graph.add_node("progress_tracking", progress_tracking)
-graph.add_node("result_synthesis", result_synthesis)
-graph.add_node("web_scraper", web_scraper)
-graph.add_node("deep_analysis", deep_analysis)
-graph.add_node("fact_validation", fact_validation)
-graph.add_node("output_formatter", output_formatter)
+graph.add_node("research_coordinator", _node(research_coordinator))
+graph.add_node("query_decomposer", _node(query_decomposer))
+graph.add_node("task_prioritizer", _node(task_prioritizer))
+graph.add_node("progress_tracking", _node(progress_tracking))
+graph.add_node("result_synthesis", _node(result_synthesis))
+graph.add_node("web_scraper", _node(web_scraper))
+graph.add_node("deep_analysis", _node(deep_analysis))
+graph.add_node("fact_validation", _node(fact_validation))
+graph.add_node("output_formatter", _node(output_formatter))
+graph.add_node("parallel_executor", _node(parallel_executor))
 
 # --- Flow Connections ---
 graph.add_edge(START, "research_coordinator")
@@ -54,8 +101,13 @@ graph.add_edge("query_decomposer", "task_prioritizer")
 # --- LLM-Based Conditional Routing ---
 graph.add_conditional_edges(
     "task_prioritizer",
-    lambda state: state["next_agent"],
+    lambda state: (
+        "parallel_executor"
+        if EXECUTION_MODE == "parallel" and state.get("next_agent") != "output_formatter"
+        else state["next_agent"]
+    ),
     {
+        "parallel_executor": "parallel_executor",
         "web_scraper": "web_scraper",
         "deep_analysis": "deep_analysis",
         "fact_validation": "fact_validation",
@@ -68,11 +120,46 @@ graph.add_edge("web_scraper", "progress_tracking")
 graph.add_edge("deep_analysis", "progress_tracking")
 graph.add_edge("fact_validation", "progress_tracking")
 graph.add_edge("progress_tracking", "result_synthesis")
-graph.add_edge("result_synthesis", "research_coordinator")
+# Parallel mode: all branches have already joined, so synthesis goes straight to output
+graph.add_edge("parallel_executor", "result_synthesis")
+graph.add_conditional_edges(
+    "result_synthesis",
+    lambda state: "output_formatter" if state.get("dag_stats") else "research_coordinator",
+    {
+        "output_formatter": "output_formatter",
+        "research_coordinator": "research_coordinator"
+    }
+)
 graph.add_edge("output_formatter", END)
 
 compiled_graph = graph.compile()
 
+# Identical queries submitted while one is already running share its result
+_research_flight = SingleFlight("research")
+
+
+def _invoke(query: str, session_id: Optional[str] = None) -> dict:
+    # The run id doubles as the trace id, so progress and traces line up
+    run_id = progress_tracker.start("Research Workflow")
+    with start_trace("research", run_id=run_id, query=query, session_id=session_id or ""):
+        final_state = compiled_graph.invoke({"query": query, "run_id": run_id, "session_id": session_id})
+    # Tokens, latency and cost per agent/tool, taken after the root span closed
+    final_state["accounting"] = accounting.report(run_id)
+    return final_state
+
+
+def run_research(query: str, session_id: Optional[str] = None) -> dict:
+    """
+    Entry point for callers: invoke the graph, coalescing identical in-flight queries.
+    Follow-up queries passing the same `session_id` reuse the documents and
+    analyses earlier queries of the session produced.
+    """
+    key = f"{session_id or ''}|{' '.join(query.lower().split())}"
+    final_state = _research_flight.do(key, lambda: _invoke(query, session_id))
+    return copy.deepcopy(final_state)
+
+
 if __name__ == "__main__":
-    final_state = compiled_graph.invoke({"query": "Impact of AI on Global Healthcare"})
+    final_state = run_research("Impact of AI on Global Healthcare")
     print("\n✅ Final Research Report:\n", final_state["final_report"])
+    print("\n" + accounting.summary(final_state["accounting"]))
@@ -1,9 +1,11 @@
 from mcp.server.fastmcp import FastMCP
+from utils import metrics
 from retrieval_agent.tools.web_scraper_tool import scrape_website
 from retrieval_agent.tools.keyword_search_tool import keyword_search
 from retrieval_agent.tools.embedding_storage_tool import store_embedding, query_similar_documents
 
 app = FastMCP("retrieval_agent_tools")
+metrics.mount(app)
 
 @app.tool()
 def web_scraper(url: str) -> dict:
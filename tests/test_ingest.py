@@ -0,0 +1,54 @@
+# tests/test_ingest.py
+import json
+
+from agents.web_retriever.ingest import ingest, iter_sources
+
+
+def _run(paths):
+    return ingest(paths, workers=2, checkpoint_path="", semantic=False, keyword=False)
+
+
+def test_malformed_jsonl_lines_are_skipped_and_counted(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("\n".join([
+        json.dumps({"id": "a", "text": "First document about vaccines."}),
+        "[1, 2, 3]",
+        "{not json",
+        json.dumps({"id": "b", "text": "Second document about trials."}),
+    ]) + "\n")
+
+    report = _run([str(corpus)])
+
+    assert report["documents"] == 2
+    assert report["bad_records"] == 2
+    assert {e["source"] for e in report["errors"]} == {f"{corpus}:2", f"{corpus}:3"}
+
+
+def test_bad_warc_record_and_missing_file_do_not_stop_ingest(tmp_path):
+    body = b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html><body><p>Kept page.</p></body></html>"
+    warc = tmp_path / "crawl.warc"
+    warc.write_bytes(
+        b"WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: http://bad\r\nContent-Length: twelve\r\n\r\n"
+        + b"WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: http://good\r\n"
+        + b"Content-Length: %d\r\n\r\n" % len(body) + body + b"\r\n\r\n"
+    )
+    errors = []
+
+    sources = list(iter_sources([str(warc), str(tmp_path / "missing.jsonl")],
+                                on_error=lambda source, message: errors.append(source)))
+
+    assert [url for _, url, _, _ in sources] == ["http://good"]
+    assert errors == [f"{warc}#1", str(tmp_path / "missing.jsonl")]
+
+
+def test_reader_failure_still_stops_the_workers(tmp_path, monkeypatch):
+    def broken(paths, on_error=None):
+        yield from ()
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr("agents.web_retriever.ingest.iter_sources", broken)
+
+    report = _run([str(tmp_path / "any.jsonl")])
+
+    assert report["documents"] == 0
+    assert any("disk on fire" in e["error"] for e in report["errors"])
@@ -0,0 +1,65 @@
+# tests/test_llm_gateway.py
+from types import SimpleNamespace
+
+import pytest
+
+from utils import llm_gateway
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+class _Scheduler:
+    def __init__(self):
+        self.settled = []
+
+    def acquire(self, model, tokens, priority, timeout=None):
+        return 0.0
+
+    def settle(self, model, estimated, actual):
+        self.settled.append(actual)
+
+    def on_rate_limited(self, model, headers):
+        pass
+
+    def observe_headers(self, model, headers):
+        pass
+
+
+def _client(*outcomes):
+    outcomes = list(outcomes)
+
+    def create(**request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = SimpleNamespace(usage=SimpleNamespace(total_tokens=outcome))
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    raw = SimpleNamespace(create=create)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(with_raw_response=raw)))
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = _Scheduler()
+    monkeypatch.setattr(llm_gateway, "scheduler", scheduler)
+    return scheduler
+
+
+def _create():
+    return llm_gateway._create({"model": "m", "messages": [{"role": "user", "content": "hi"}]}, "interactive", None)
+
+
+def test_every_attempt_is_settled(monkeypatch, scheduler):
+    monkeypatch.setattr(llm_gateway, "get_client", lambda api_key=None: _client(_RateLimited(), 42))
+    assert _create().usage.total_tokens == 42
+    assert scheduler.settled == [0, 42]
+
+
+def test_failed_attempt_refunds_its_tokens(monkeypatch, scheduler):
+    monkeypatch.setattr(llm_gateway, "get_client", lambda api_key=None: _client(RuntimeError("boom")))
+    with pytest.raises(RuntimeError):
+        _create()
+    assert scheduler.settled == [0]
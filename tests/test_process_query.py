@@ -0,0 +1,78 @@
+# tests/test_process_query.py
+import pytest
+
+pytest.importorskip("mcp")
+
+from agents.coordinator import coordinator_server
+from agents.coordinator.tools import agent_rpc, speculative_prefetch
+from agents.coordinator.tools.task_telemetry import task_telemetry
+
+
+SUBTASKS = [
+    {"task": "Collect data on vaccine uptake"},
+    {"task": "Collect data on flu cases"},
+    {"task": "Analyze vaccine uptake against flu cases"},
+]
+
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    monkeypatch.setattr(task_telemetry, "path", str(tmp_path / "task_telemetry.jsonl"))
+    calls = []
+
+    def _handler(agent, key):
+        def handler(branch):
+            calls.append((agent, branch["current_task"], len(branch["documents"])))
+            out = dict(branch)
+            out[key] = list(branch.get(key) or []) + [{"text": f"{agent}: {branch['current_task']}"}]
+            return out
+        return handler
+
+    monkeypatch.setattr(agent_rpc, "HANDLERS", {
+        "web_scraper": _handler("web_scraper", "documents"),
+        "deep_analysis": _handler("deep_analysis", "insights"),
+        "fact_validation": _handler("fact_validation", "validated_facts"),
+    })
+    monkeypatch.setattr(coordinator_server, "decompose_query", lambda query: [dict(t) for t in SUBTASKS])
+    monkeypatch.setattr(speculative_prefetch, "start", lambda query: None)
+    return calls
+
+
+@pytest.mark.parametrize("mode", ["sequential", "parallel"])
+def test_process_query_runs_subtasks_on_the_agents(calls, monkeypatch, mode):
+    monkeypatch.setattr(coordinator_server, "EXECUTION_MODE", mode)
+    out = coordinator_server.process_query("vaccine uptake and flu cases")
+
+    assert {r["status"] for r in out["task_results"]} == {"completed"}
+    assert sorted(c[0] for c in calls) == ["deep_analysis", "web_scraper", "web_scraper"]
+    # The analysis branch starts after both retrievals and sees their documents
+    assert calls[-1] == ("deep_analysis", "Analyze vaccine uptake against flu cases", 2)
+    assert "Completed:" not in str(out["result"])
+    assert coordinator_server.progress_tracker.get_status(out["run_id"])["completed"] == 3
+
+
+def test_prefetched_documents_replace_the_scraper_call(calls, monkeypatch):
+    class _Speculative:
+        def attach(self, subtasks):
+            subtasks[0]["prefetched"] = [{"text": "uptake rose"}, {"text": "uptake fell"}]
+            return subtasks
+
+    monkeypatch.setattr(speculative_prefetch, "start", lambda query: _Speculative())
+    out = coordinator_server.process_query("vaccine uptake and flu cases")
+
+    assert [c[1] for c in calls if c[0] == "web_scraper"] == ["Collect data on flu cases"]
+    assert calls[-1] == ("deep_analysis", "Analyze vaccine uptake against flu cases", 3)
+    first = next(r for r in out["task_results"] if r["task"] == "Collect data on vaccine uptake")
+    assert first["status"] == "completed" and len(first["result"]["documents"]) == 2
+    assert next(t for t in out["sub_tasks"] if t["task"] == "Collect data on vaccine uptake")["prefetched_docs"] == 2
+
+
+def test_report_sections_follow_completion_order(calls):
+    out = coordinator_server.process_query("vaccine uptake and flu cases")
+
+    finished = sorted(out["task_results"], key=lambda r: r["end"])
+    positions = [out["result"].index(f"Task: {r['task']}") for r in finished]
+    assert positions == sorted(positions)
+    assert out["result"].startswith("📘 Final Research Summary")
+    for t in SUBTASKS:
+        assert t["task"] in out["summary"]
@@ -0,0 +1,38 @@
+# tests/test_progress_tracker.py
+import asyncio
+
+import pytest
+
+from agents.coordinator.tools.progress_tracker import ProgressTracker
+
+
+def test_update_needs_the_run_it_belongs_to():
+    tracker = ProgressTracker()
+    first = tracker.start("first")
+    latest = tracker.start("latest")
+
+    with pytest.raises(TypeError):
+        tracker.update("task", "running")
+    tracker.update("task", "running", run_id="no-such-run")
+    tracker.update("task", "completed", run_id=first)
+
+    assert tracker.get_status(latest)["total"] == 0
+    assert tracker.get_status(first)["tasks"] == {"task": "completed"}
+
+
+def test_subscriber_is_removed_when_the_run_finishes():
+    tracker = ProgressTracker()
+    run_id = tracker.start("run")
+    run = tracker.run(run_id)
+
+    async def _consume():
+        seen = []
+        async for event in run.subscribe():
+            seen.append(event["type"])
+            if len(seen) == 1:
+                tracker.finish(run_id)
+        return seen
+
+    tracker.update("task", "completed", run_id=run_id)
+    assert asyncio.run(_consume()) == ["task", "run"]
+    assert run._subscribers == []
@@ -0,0 +1,17 @@
+# tests/test_retriever_server.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastmcp")
+pytest.importorskip("readability")
+pytest.importorskip("pgvector")
+
+
+def test_server_imports_and_lists_tools():
+    from agents.web_retriever import retriever_server
+
+    tools = asyncio.run(retriever_server.app.get_tools())
+    assert set(tools) >= {
+        "fetch_webpage", "semantic_search", "keyword_search", "rerank", "rag_search", "batch",
+    }
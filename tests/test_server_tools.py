@@ -0,0 +1,60 @@
+# tests/test_server_tools.py
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from utils.server import mount_tools
+
+
+class _App:
+    """The part of FastMCP that mount_tools uses."""
+
+    def __init__(self):
+        self.routes = []
+
+    def custom_route(self, path, methods):
+        def deco(fn):
+            self.routes.append(Route(path, fn, methods=methods))
+            return fn
+        return deco
+
+
+def _boom():
+    raise RuntimeError("down")
+
+
+async def _echo(text: str) -> dict:
+    return {"echo": text}
+
+
+@pytest.fixture
+def client():
+    app = _App()
+    mount_tools(app, {
+        "add": lambda a, b=0: {"sum": a + b},
+        "echo": _echo,
+        "boom": _boom,
+    })
+    return TestClient(Starlette(routes=app.routes))
+
+
+def test_calls_sync_and_async_tools(client):
+    assert client.post("/tools/add", json={"a": 2, "b": 3}).json() == {"sum": 5}
+    assert client.post("/tools/echo", json={"text": "hi"}).json() == {"echo": "hi"}
+
+
+def test_rejects_unknown_tool_and_bad_arguments(client):
+    assert client.post("/tools/nope", json={}).status_code == 404
+    assert client.post("/tools/add", json={"c": 1}).status_code == 400
+    assert client.post("/tools/add", content=b"[1, 2]").status_code == 400
+
+
+def test_tool_failure_is_a_server_error(client):
+    resp = client.post("/tools/boom", json={})
+    assert resp.status_code == 500
+    assert "down" in resp.json()["error"]
@@ -0,0 +1,41 @@
+# tests/test_task_prioritizer.py
+import pytest
+
+from agents.coordinator.tools import task_prioritizer
+from agents.coordinator.tools.task_telemetry import TaskTelemetry
+
+
+@pytest.fixture(autouse=True)
+def telemetry(monkeypatch, tmp_path):
+    # Default per-agent estimates (deep_analysis 12s, fact_validation 6s) unless recorded otherwise
+    telemetry = TaskTelemetry(path=str(tmp_path / "telemetry.jsonl"))
+    monkeypatch.setattr(task_prioritizer, "task_telemetry", telemetry)
+    return telemetry
+
+
+def test_deferred_tasks_come_after_their_dependencies(telemetry):
+    telemetry.record("web_scraper", 40.0)
+    sub_tasks = [
+        {"task": "Analyze AI costs against healthcare outcomes", "depends_on": ["Collect data on AI costs"]},
+        {"task": "Verify sources on healthcare outcomes", "depends_on": []},
+        {"task": "Collect data on AI costs"},
+    ]
+    plan = task_prioritizer.plan_tasks(sub_tasks, time_budget=7, max_parallel=1)
+
+    assert [t["task"] for t in plan["tasks"]] == ["Verify sources on healthcare outcomes"]
+    deferred = [t["task"] for t in plan["deferred"]]
+    assert deferred == ["Collect data on AI costs", "Analyze AI costs against healthcare outcomes"]
+    assert all(t["deferred"] for t in plan["deferred"])
+
+
+def test_telemetry_log_is_compacted(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    telemetry = TaskTelemetry(path=str(path), max_records=3)
+    for i in range(7):
+        telemetry.record("web_scraper", float(i))
+
+    lines = path.read_text().splitlines()
+    assert len(lines) <= 6
+    assert telemetry.get_stats()["web_scraper"]["samples"] == 7
+    reloaded = TaskTelemetry(path=str(path), max_records=3)
+    assert reloaded.estimate("web_scraper")["samples"] == 3
@@ -0,0 +1,77 @@
+# tests/test_term_index.py
+import pytest
+
+pytest.importorskip("fastmcp")  # agents.web_retriever.tools imports every tool module
+pytest.importorskip("readability")
+
+from agents.web_retriever.tools.term_index import TermIndex, stem
+
+
+@pytest.mark.parametrize("forms", [
+    ("healthcare", "healthcares"),
+    ("diagnose", "diagnosing", "diagnoses", "diagnosed"),
+    ("case", "cases"),
+    ("image", "images"),
+    ("vaccine", "vaccines"),
+    ("use", "uses", "used", "using"),
+    ("care", "caring"),
+    ("hope", "hoping"),
+    ("run", "running"),
+    ("research", "researcher"),
+    ("study", "studies", "studied"),
+    ("church", "churches"),
+    ("box", "boxes"),
+    ("class", "classes"),
+    ("effective", "effectiveness"),
+])
+def test_word_forms_share_a_stem(forms):
+    assert len({stem(w) for w in forms}) == 1
+
+
+@pytest.mark.parametrize("word, other", [
+    ("water", "wat"),
+    ("matter", "mat"),
+    ("paper", "pap"),
+    ("cancer", "canc"),
+    ("number", "numb"),
+    ("caring", "car"),
+    ("hoping", "hop"),
+    ("news", "new"),
+    ("series", "sery"),
+    ("species", "specy"),
+    ("does", "doe"),
+    ("goes", "goe"),
+])
+def test_unrelated_words_stay_apart(word, other):
+    assert stem(word) != stem(other)
+
+
+def test_short_words_and_numbers_are_kept():
+    assert stem("gas") == "gas"
+    assert stem("2024") == "2024"
+
+
+def test_typo_maps_to_indexed_term():
+    index = TermIndex()
+    for word in ("vaccine", "efficacy", "trial"):
+        index.add(stem(word))
+    assert index.lookup(stem("vacine"))[0][0] == stem("vaccine")
+    assert index.lookup(stem("efficasy"))[0][0] == stem("efficacy")
+
+
+def test_prefix_matches_longer_terms():
+    index = TermIndex()
+    index.add(stem("healthcare"))
+    index.add(stem("health"))
+    matches = dict(index.lookup(stem("health")))
+    assert matches[stem("health")] == 1.0
+    assert stem("healthcare") in matches
+
+
+def test_removed_terms_are_not_expanded_to():
+    index = TermIndex()
+    index.add("vaccin")
+    index.remove("vaccin")
+    assert "vaccin" not in index
+    assert index.lookup("vacin") == []
+    assert not index.trigram_postings and not index.delete_postings
@@ -0,0 +1,23 @@
+# tests/test_tool_router.py
+from utils.tool_router import ToolRouter
+
+ROUTES = {
+    "rating_tool": {"keywords": ["rate", "score"]},
+    "generator_tool": {"keywords": ["generate", "www."]},
+}
+
+
+def _router():
+    return ToolRouter("test", ROUTES, llm_fallback=lambda q: "llm_choice", shadow_rate=0)
+
+
+def test_keywords_match_whole_words_only():
+    router = _router()
+    assert router.route("Please rate this answer") == "rating_tool"
+    # "rate" inside "generate" / "rated" is not a keyword hit
+    assert router.route("Generate a plan") == "generator_tool"
+    assert router.route("Which movies were highly rated") == "llm_choice"
+
+
+def test_keywords_ending_in_punctuation_still_match():
+    assert _router().route("Check www.example.org") == "generator_tool"
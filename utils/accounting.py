@@ -0,0 +1,239 @@
+# utils/accounting.py
+"""
+Per-run token, latency and cost accounting.
+
+Built from trace spans (utils.tracing), like utils.metrics: every LLM
+span of a run is charged to the agent and tool it ran under, found by
+walking up its parents:
+
+    agent  nearest "task" span (DAG subtask, "task:<agent>") or "node" span
+           (graph node / pipeline agent); "(run)" when there is none
+    tool   nearest "tool" span below that agent; "-" when called directly
+
+`report(run_id)` returns the breakdown run -> agent -> tool with calls,
+cache hits, prompt/completion tokens, LLM seconds and estimated cost
+(utils.llm_pricing), plus wall time for each agent and tool. Cache hits
+and coalesced calls are counted but cost nothing; streamed calls carry
+estimated token counts. Agent wall times are inclusive, so an agent that
+runs others (e.g. parallel_executor) also contains their time.
+
+The tokens of LLM calls that reached a model are also added up on every
+task/node span above them (span_tokens(), e.g. for task_telemetry's
+per-agent estimates), whether or not the trace is a run.
+
+Only spans of traces opened with start_trace() in this process are
+accounted. Work done by another agent server is accounted in that
+server's process. The last MAX_RUNS runs are kept in memory.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+from utils import tracing
+from utils.llm_pricing import cost_usd
+
+MAX_RUNS = int(os.getenv("ACCOUNTING_MAX_RUNS", "200"))
+
+NO_AGENT = "(run)"
+NO_TOOL = "-"
+
+_FIELDS = ("calls", "cache_hits", "prompt_tokens", "completion_tokens", "cost_usd", "llm_seconds")
+
+
+def _usage() -> Dict[str, float]:
+    return dict.fromkeys(_FIELDS, 0)
+
+
+def _add(into: Dict[str, float], usage: Dict[str, float]):
+    for field in _FIELDS:
+        into[field] += usage[field]
+
+
+def _rounded(usage: Dict[str, float]) -> dict:
+    out = dict(usage)
+    out["tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    out["cost_usd"] = round(usage["cost_usd"], 6)
+    out["llm_seconds"] = round(usage["llm_seconds"], 3)
+    return out
+
+
+def _agent_name(s: "tracing.Span") -> str:
+    return s.name.split(":", 1)[-1] if s.kind == "task" else s.name
+
+
+class _RunAccount:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.run_id: Optional[str] = None
+        self.name: Optional[str] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.llm: Dict[Tuple[str, str, str], Dict[str, float]] = defaultdict(_usage)   # (agent, tool, model)
+        self.agent_seconds: Dict[str, float] = defaultdict(float)
+        self.agent_runs: Dict[str, int] = defaultdict(int)
+        self.tool_seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self.tool_runs: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.errors = 0
+
+    def add(self, s: "tracing.Span", root: "tracing.Span", agent: Optional["tracing.Span"],
+            tool: Optional["tracing.Span"]):
+        if self.start is None:
+            self.run_id, self.name, self.start = root.attributes.get("run_id"), root.name, root.start
+        seconds = (s.end or s.start) - s.start
+        self.errors += s.status == "error"
+        agent_name = _agent_name(agent) if agent is not None else NO_AGENT
+
+        if s is root:
+            self.end = s.end
+        elif s.kind in ("node", "task"):
+            self.agent_seconds[_agent_name(s)] += seconds
+            self.agent_runs[_agent_name(s)] += 1
+        elif s.kind == "tool":
+            self.tool_seconds[(agent_name, s.name)] += seconds
+            self.tool_runs[(agent_name, s.name)] += 1
+        elif s.kind == "llm":
+            a = s.attributes
+            model = a.get("model") or ""
+            usage = self.llm[(agent_name, tool.name if tool is not None else NO_TOOL, model)]
+            usage["calls"] += 1
+            usage["llm_seconds"] += seconds
+            if a.get("cache_hit") or a.get("coalesced"):
+                usage["cache_hits"] += 1
+                return
+            prompt, completion = a.get("prompt_tokens") or 0, a.get("completion_tokens") or 0
+            usage["prompt_tokens"] += prompt
+            usage["completion_tokens"] += completion
+            usage["cost_usd"] += cost_usd(model, prompt, completion)
+
+    def report(self) -> dict:
+        totals, by_model = _usage(), defaultdict(_usage)
+        agents: Dict[str, dict] = {}
+
+        def _agent(name: str) -> dict:
+            if name not in agents:
+                agents[name] = {"usage": _usage(), "tools": {}}
+            return agents[name]
+
+        for (agent, tool, model), usage in self.llm.items():
+            _add(totals, usage)
+            _add(by_model[model], usage)
+            entry = _agent(agent)
+            _add(entry["usage"], usage)
+            _add(entry["tools"].setdefault(tool, _usage()), usage)
+        for agent in self.agent_seconds:
+            _agent(agent)
+        for agent, tool in self.tool_seconds:
+            _agent(agent)["tools"].setdefault(tool, _usage())
+
+        end = self.end or time.time()
+        total_cost = totals["cost_usd"]
+        by_agent = []
+        for agent, entry in agents.items():
+            tools = [{
+                "tool": tool,
+                "wall_seconds": round(self.tool_seconds.get((agent, tool), 0.0), 3),
+                "runs": self.tool_runs.get((agent, tool), 0),
+                **_rounded(usage),
+            } for tool, usage in entry["tools"].items()]
+            tools.sort(key=lambda t: (-t["cost_usd"], -t["wall_seconds"]))
+            by_agent.append({
+                "agent": agent,
+                "wall_seconds": round(self.agent_seconds.get(agent, 0.0), 3),
+                "runs": self.agent_runs.get(agent, 0),
+                **_rounded(entry["usage"]),
+                "cost_share": round(entry["usage"]["cost_usd"] / total_cost, 3) if total_cost else 0.0,
+                "tools": tools,
+            })
+        by_agent.sort(key=lambda a: (-a["cost_usd"], -a["wall_seconds"]))
+
+        return {
+            "run_id": self.run_id,
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "finished": self.end is not None,
+            "wall_seconds": round(end - self.start, 3) if self.start is not None else 0.0,
+            "errors": self.errors,
+            "totals": _rounded(totals),
+            "by_agent": by_agent,
+            "by_model": {model: _rounded(usage) for model, usage in sorted(by_model.items())},
+        }
+
+
+_runs: "OrderedDict[str, _RunAccount]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def observe_span(s: "tracing.Span"):
+    """Charge a finished span to its run (registered as a tracing listener)."""
+    agent = tool = None
+    root = s
+    agents = []
+    for parent in s.ancestors():
+        root = parent
+        if parent.kind in ("node", "task"):
+            agents.append(parent)
+        if agent is None and parent.kind in ("node", "task"):
+            agent = parent
+        elif agent is None and tool is None and parent.kind == "tool":
+            tool = parent
+    with _lock:
+        if s.kind == "llm" and not (s.attributes.get("cache_hit") or s.attributes.get("coalesced")):
+            tokens = (s.attributes.get("prompt_tokens") or 0) + (s.attributes.get("completion_tokens") or 0)
+            for a in agents:
+                a.attributes["llm_tokens"] = a.attributes.get("llm_tokens", 0) + tokens
+        if root.kind != "run":
+            return
+        account = _runs.get(s.trace_id)
+        if account is None:
+            account = _runs[s.trace_id] = _RunAccount(s.trace_id)
+            while len(_runs) > MAX_RUNS:
+                _runs.popitem(last=False)
+        else:
+            _runs.move_to_end(s.trace_id)
+        account.add(s, root, agent, tool)
+
+
+tracing.add_listener(observe_span)
+
+
+def span_tokens(s: "tracing.Span") -> int:
+    """Tokens of the uncached LLM calls made under a task/node span so far."""
+    with _lock:
+        return s.attributes.get("llm_tokens", 0)
+
+
+def report(run_id: Optional[str] = None) -> Optional[dict]:
+    """
+    Token, latency and cost breakdown of a run (default: the run in scope).
+    Can be called while the run is still going; "finished" tells which.
+    """
+    run_id = run_id or tracing.current_run_id()
+    if not run_id:
+        return None
+    with _lock:
+        account = _runs.get(tracing.trace_id_for(run_id))
+        return account.report() if account is not None else None
+
+
+def summary(breakdown: Optional[dict]) -> str:
+    """One-line-per-agent text rendering of report()."""
+    if not breakdown:
+        return "No accounting recorded for this run."
+    t = breakdown["totals"]
+    lines = [f"run {breakdown['run_id']}: {breakdown['wall_seconds']:.2f}s wall, {t['calls']} LLM calls "
+             f"({t['cache_hits']} cached), {t['prompt_tokens']}+{t['completion_tokens']} tokens, "
+             f"${t['cost_usd']:.4f}"]
+    for a in breakdown["by_agent"]:
+        lines.append(f"  {a['agent']:<28} {a['wall_seconds']:>8.2f}s {a['calls']:>4} calls {a['tokens']:>8} tok "
+                     f"${a['cost_usd']:.4f}")
+        for tool in a["tools"]:
+            if tool["tool"] != NO_TOOL or len(a["tools"]) > 1:
+                lines.append(f"    {tool['tool']:<26} {tool['wall_seconds']:>8.2f}s {tool['calls']:>4} calls "
+                             f"{tool['tokens']:>8} tok ${tool['cost_usd']:.4f}")
+    return "\n".join(lines)
+
+
+__all__ = ["report", "summary", "observe_span", "span_tokens", "MAX_RUNS"]
@@ -0,0 +1,249 @@
+# utils/cassette.py
+"""
+Record/replay cassettes for external traffic (LLM completions and web fetches).
+
+In record mode every completion that goes through utils.llm_gateway and
+every fetch made with `http_get` (traced as an "http" span) is appended to a gzip-compressed JSONL
+cassette, together with how long it took. In replay mode the same
+requests are answered from the cassette without touching the network:
+
+    CASSETTE_PATH=runs/slow_day.jsonl.gz CASSETTE_MODE=record python main.py
+    CASSETTE_PATH=runs/slow_day.jsonl.gz CASSETTE_MODE=replay CASSETTE_SPEED=10 python main.py
+
+Requests are matched by a hash of their content (model, messages and
+parameters; method and URL). Repeats of the same request are replayed in
+the order they were recorded, and the last answer is reused once they run
+out. A request that was never recorded raises CassetteMiss. Replay
+reproduces the recorded latency divided by CASSETTE_SPEED (default 1 =
+original timing; 0 = no delay). Responses served from the gateway's
+cache are not recorded, so record with LLM_CACHE_DISABLED=1 unless the
+replay will use the same cache.
+
+Environment:
+    CASSETTE_PATH   cassette file (enables the feature)
+    CASSETTE_MODE   "record" or "replay" (default: replay)
+    CASSETTE_SPEED  timing factor for replay (default: 1)
+"""
+
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from utils import tracing
+
+RECORD, REPLAY = "record", "replay"
+# Requests that differ only in these fields are the same recorded exchange
+_IGNORED_PARAMS = {"stream", "stream_options"}
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def request_key(kind: str, request: Dict) -> str:
+    canonical = {k: v for k, v in request.items() if k not in _IGNORED_PARAMS}
+    blob = json.dumps([kind, canonical], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = REPLAY, speed: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stats = {"recorded": 0, "replayed": 0, "misses": 0, "replayed_seconds": 0.0}
+        self._tracks: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, dict] = {}
+        self._fh = None
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    # --- Storage ---
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line from an interrupted recording
+                    self._tracks[rec["key"]].append(rec)
+            except EOFError:
+                pass  # recording was not closed cleanly; everything flushed is usable
+
+    def _append(self, record: Dict):
+        record["t"] = round(time.time() - self.started, 4)
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                # Appending to an existing cassette adds a gzip member; readers see one stream
+                self._fh = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._fh.write(line)
+            # Sync flush keeps the compression window but makes every record readable
+            self._fh.flush()
+            self.stats["recorded"] += 1
+
+    def close(self):
+        with self.lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _next(self, key: str, what: str) -> Dict:
+        with self.lock:
+            track = self._tracks.get(key)
+            if track:
+                rec = self._last[key] = track.popleft()
+            elif key in self._last:
+                rec = self._last[key]
+            else:
+                self.stats["misses"] += 1
+                raise CassetteMiss(f"No recorded exchange for {what} in {self.path}")
+            self.stats["replayed"] += 1
+            self.stats["replayed_seconds"] += rec.get("latency_s", 0.0)
+        return rec
+
+    def _sleep(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    # --- LLM ---
+    def record_llm(self, request: Dict, text: str, usage: Optional[Dict], latency_s: float,
+                   ttft_s: Optional[float] = None):
+        messages = request.get("messages") or []
+        self._append({
+            "kind": "llm",
+            "key": request_key("llm", request),
+            "model": request.get("model"),
+            "preview": str(messages[-1].get("content", ""))[:80] if messages else "",
+            "text": text,
+            "usage": usage,
+            "latency_s": round(latency_s, 4),
+            "ttft_s": round(ttft_s, 4) if ttft_s is not None else None,
+        })
+
+    def replay_llm(self, request: Dict) -> str:
+        rec = self._next(request_key("llm", request), f"{request.get('model')} completion")
+        self._sleep(rec.get("latency_s", 0.0))
+        return rec["text"]
+
+    def replay_llm_stream(self, request: Dict, pieces: int = 20) -> Iterator[str]:
+        """Yield the recorded text in chunks, spread over the recorded timing."""
+        rec = self._next(request_key("llm", request), f"{request.get('model')} completion")
+        text, total = rec["text"], rec.get("latency_s", 0.0)
+        ttft = rec.get("ttft_s") if rec.get("ttft_s") is not None else total
+        self._sleep(ttft)
+        size = max(1, -(-len(text) // pieces))
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        for chunk in chunks:
+            yield chunk
+            self._sleep(max(0.0, total - ttft) / len(chunks))
+
+    # --- HTTP ---
+    def record_http(self, method: str, url: str, params: Optional[Dict], status: int, headers: Dict,
+                    body: bytes, latency_s: float):
+        self._append({
+            "kind": "http",
+            "key": request_key("http", {"method": method, "url": url, "params": params}),
+            "method": method,
+            "url": url,
+            "status": status,
+            # The body is stored decoded, so only the content type is kept
+            "headers": {k: v for k, v in headers.items() if k.lower() == "content-type"},
+            "body": base64.b64encode(body).decode("ascii"),
+            "latency_s": round(latency_s, 4),
+        })
+
+    def replay_http(self, method: str, url: str, params: Optional[Dict] = None) -> Dict:
+        """{"status", "headers", "body": bytes} for a recorded request."""
+        rec = self._next(request_key("http", {"method": method, "url": url, "params": params}), f"{method} {url}")
+        self._sleep(rec.get("latency_s", 0.0))
+        return {"status": rec["status"], "headers": rec.get("headers") or {}, "body": base64.b64decode(rec["body"])}
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {"path": self.path, "mode": self.mode, "speed": self.speed, **self.stats}
+
+
+_active: Optional[Cassette] = None
+_active_lock = threading.Lock()
+_env_checked = False
+
+
+def active() -> Optional[Cassette]:
+    """The cassette in use: set by use_cassette(), else from CASSETTE_PATH on first use."""
+    global _active, _env_checked
+    if _active is None and not _env_checked:
+        with _active_lock:
+            if not _env_checked:
+                _env_checked = True
+                path = os.getenv("CASSETTE_PATH")
+                if path:
+                    _active = Cassette(path, os.getenv("CASSETTE_MODE", REPLAY),
+                                       float(os.getenv("CASSETTE_SPEED", "1")))
+    return _active
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = REPLAY, speed: float = 1.0):
+    """Record or replay external traffic inside a block."""
+    global _active
+    previous, _active = _active, Cassette(path, mode, speed)
+    try:
+        yield _active
+    finally:
+        _active.close()
+        _active = previous
+
+
+def http_get(url: str, params: Optional[Dict] = None, **kwargs):
+    """
+    requests.get that goes through the active cassette. Returns a
+    requests.Response either way (rebuilt from the cassette on replay).
+    """
+    import requests
+
+    with tracing.span("http.get", "http", url=url) as span:
+        tape = active()
+        if tape is not None and tape.replaying:
+            rec = tape.replay_http("GET", url, params)
+            resp = requests.Response()
+            resp.status_code = rec["status"]
+            resp._content = rec["body"]
+            resp.headers.update(rec["headers"])
+            resp.url = url
+            span.set(status=resp.status_code, bytes=len(resp.content), replayed=True)
+            return resp
+
+        started = time.perf_counter()
+        resp = requests.get(url, params=params, **kwargs)
+        if tape is not None:
+            tape.record_http("GET", url, params, resp.status_code, dict(resp.headers), resp.content,
+                             time.perf_counter() - started)
+        span.set(status=resp.status_code, bytes=len(resp.content))
+        return resp
+
+
+__all__ = ["Cassette", "CassetteMiss", "active", "use_cassette", "http_get", "request_key", "RECORD", "REPLAY"]
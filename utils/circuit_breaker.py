@@ -0,0 +1,109 @@
+# utils/circuit_breaker.py
+"""
+Per-endpoint circuit breakers and latency tracking for agent RPC.
+
+A breaker opens after `failure_threshold` consecutive failures and rejects
+calls immediately for `reset_timeout` seconds; after that one probe call
+is let through (half-open) and its outcome closes or re-opens the breaker.
+A probe that ends without an outcome (cancelled) is released, and one that
+has not reported back within `probe_timeout` seconds is written off, so
+the breaker can never stay half-open for good.
+LatencyTracker keeps a sliding window of successful call latencies and
+provides the percentile used as the hedging delay.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 10.0,
+                 probe_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started_at = 0.0
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == CLOSED:
+                self.stats["calls"] += 1
+                return True
+            if self.state == HALF_OPEN and self.probe_in_flight and now - self.probe_started_at >= self.probe_timeout:
+                # The probe never reported back; let another one through
+                self.probe_in_flight = False
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.probe_started_at = now
+                self.stats["calls"] += 1
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = CLOSED
+            self.probe_in_flight = False
+
+    def release(self):
+        """A call ended without an outcome (e.g. cancelled): free the probe slot if it held it."""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probe_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.stats["failures"] += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """pct in [0, 100]; None until `min_samples` latencies have been seen."""
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+__all__ = ["CircuitBreaker", "CircuitOpenError", "LatencyTracker", "CLOSED", "OPEN", "HALF_OPEN"]
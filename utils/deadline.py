@@ -0,0 +1,103 @@
+# utils/deadline.py
+"""
+Request deadlines shared across agents.
+
+A deadline is an absolute Unix timestamp carried in the X-Request-Deadline
+header. The RPC client sets it on every outgoing call (the tighter of the
+call timeout and any deadline already in scope), and downstream agents read
+it back so they can stop work nobody is waiting for any more:
+
+    with deadline_scope(seconds=10):
+        ...                       # outgoing RPC/LLM calls inherit the deadline
+        check("before rerank")    # raises DeadlineExceeded once it has passed
+
+DeadlineMiddleware does the same for an ASGI app (utils.server installs it
+on every agent server): an expired request is answered 504 straight away;
+otherwise the deadline is in scope for the handler.
+"""
+
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def current() -> Optional[float]:
+    """Absolute deadline in scope, or None."""
+    return _deadline.get()
+
+
+def remaining(at: Optional[float] = None) -> Optional[float]:
+    """Seconds left before `at` (default: the deadline in scope); None if there is none."""
+    at = current() if at is None else at
+    return None if at is None else at - time.time()
+
+
+def expired(at: Optional[float] = None) -> bool:
+    left = remaining(at)
+    return left is not None and left <= 0
+
+
+def check(what: str = "request", at: Optional[float] = None):
+    if expired(at):
+        raise DeadlineExceeded(f"Deadline passed before {what}")
+
+
+def from_headers(headers) -> Optional[float]:
+    if not headers:
+        return None
+    value = headers.get(DEADLINE_HEADER) or headers.get(DEADLINE_HEADER.lower())
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None, at: Optional[float] = None):
+    """Put a deadline in scope; an outer, tighter deadline always wins."""
+    new = at if at is not None else (time.time() + seconds if seconds is not None else None)
+    outer = current()
+    if new is None or (outer is not None and outer < new):
+        new = outer
+    token = _deadline.set(new)
+    try:
+        yield new
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware: reject expired requests, scope the deadline for the rest."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        at = from_headers(headers)
+        if expired(at):
+            body = json.dumps({"error": "request deadline already passed"}).encode("utf-8")
+            await send({"type": "http.response.start", "status": 504,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        with deadline_scope(at=at):
+            await self.app(scope, receive, send)
+
+
+__all__ = [
+    "DEADLINE_HEADER", "DeadlineExceeded", "DeadlineMiddleware",
+    "current", "remaining", "expired", "check", "from_headers", "deadline_scope",
+]
@@ -11,9 +11,10 @@ Important notes:
 - Adapt the URL/path logic if your agent services expose different routes.
 """
 
-import requests
+import httpx
 from typing import Any, Dict
 from utils.logger import get_logger
+from utils.rpc_client import get_client, run_sync
 
 logger = get_logger("http_client")
 
@@ -21,20 +22,15 @@ def call_remote_tool(url: str, payload: Dict[str, Any], timeout: int = 30) -> An
     """
     Call a remote tool via HTTP POST, expecting JSON response.
     Returns the parsed JSON response, or raises on network errors.
+
+    Thin blocking wrapper over utils.rpc_client, so repeated calls reuse
+    pooled keep-alive connections. Use AsyncRPCClient.gather directly to
+    call several agents at once.
     """
-    headers = {"Content-Type": "application/json"}
     try:
-        logger.info(f"POST {url} payload keys: {list(payload.keys())}")
-        resp = requests.post(url, json=payload, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        try:
-            data = resp.json()
-            logger.info(f"Received JSON response from {url}")
-            return data
-        except ValueError:
-            # not JSON — return raw text
-            logger.warning(f"Non-JSON response from {url}: returning raw text")
-            return resp.text
-    except requests.RequestException as e:
+        data = run_sync(get_client().call(url, payload, timeout=timeout))
+        logger.debug(f"Received response from {url}")
+        return data
+    except httpx.HTTPError as e:
         logger.exception(f"HTTP call to {url} failed: {e}")
         raise
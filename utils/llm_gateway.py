@@ -0,0 +1,376 @@
+# utils/llm_gateway.py
+"""
+Shared LLM gateway.
+
+Every agent calls the model through `chat()` (or `stream_chat()`) instead of
+building its own OpenAI client. The gateway keeps one client per API key and
+a persistent exact-match response cache in SQLite, keyed on
+(model, messages, temperature, extra params). Entries expire after a TTL and
+the store is bounded by LLM_CACHE_MAX_ENTRIES (least recently used rows are
+evicted first), so identical routing, decomposition and formatting prompts
+are answered locally.
+
+Concurrent identical cacheable requests are coalesced: one goes to the
+provider and the others wait for its answer. Requests that miss the cache
+go through utils.llm_scheduler, which keeps
+each model within its RPM/TPM quota and owns 429 handling (the OpenAI
+client's own retries are disabled so backoff is coordinated). With a
+cassette active (utils.cassette) completions are recorded to it or
+replayed from it instead of calling the provider. Every call is traced as
+an "llm" span (model, tokens, cache hit, coalesced) in the current run.
+
+Environment:
+    LLM_CACHE_PATH         SQLite file (default: <repo>/storage/llm_cache.sqlite)
+    LLM_CACHE_TTL          default entry lifetime in seconds (default: 7 days)
+    LLM_CACHE_MAX_ENTRIES  maximum cached responses (default: 10000)
+    LLM_CACHE_DISABLED     set to "1" to bypass the cache entirely
+    LLM_MAX_RETRIES        retries after a 429 (default: 3)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from utils import cassette, deadline, metrics, tracing
+from utils.llm_scheduler import CHARS_PER_TOKEN, scheduler, estimate_tokens
+from utils.single_flight import SingleFlight
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(_REPO_ROOT, "storage", "llm_cache.sqlite"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "0") == "1"
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+# OpenAI-compatible endpoint override, e.g. the offline stand-in in loadtest/fake_llm.py
+LLM_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Eviction is checked once every this many writes rather than on each one
+_EVICT_EVERY = 50
+
+
+# --- Clients ---
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: Optional[str] = None):
+    """Return a shared OpenAI client (one per API key, reusing its connection pool)."""
+    key = api_key or os.getenv("OPENAI_API_KEY") or ""
+    with _clients_lock:
+        if key not in _clients:
+            from openai import OpenAI
+            # A local endpoint needs no real key, but the SDK insists on one
+            _clients[key] = OpenAI(api_key=key or ("offline" if LLM_BASE_URL else None),
+                                   base_url=LLM_BASE_URL, max_retries=0)
+        return _clients[key]
+
+
+# --- Cache ---
+class ResponseCache:
+    """SQLite-backed exact-match cache with TTL and an LRU size bound."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "saved_ms": 0.0}
+        self._conn = None
+        self._writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT,
+                    latency_ms REAL,
+                    created_at REAL,
+                    expires_at REAL,
+                    last_access REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict], temperature, params: dict) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "params": params},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT response, latency_ms, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            response, latency_ms, expires_at = row
+            if expires_at is not None and expires_at < now:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                db.commit()
+                self.stats["misses"] += 1
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            db.commit()
+            self.stats["hits"] += 1
+            self.stats["saved_ms"] += latency_ms or 0.0
+            return response
+
+    def put(self, key: str, model: str, response: str, latency_ms: float, ttl: Optional[int] = None):
+        now = time.time()
+        ttl = LLM_CACHE_TTL if ttl is None else ttl
+        with self.lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, latency_ms, now, now + ttl if ttl > 0 else None, now),
+            )
+            self.stats["stores"] += 1
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        expired = db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)).rowcount
+        count = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+        self.stats["evictions"] += expired + max(0, overflow)
+
+    def clear(self):
+        with self.lock:
+            self._db().execute("DELETE FROM responses")
+            self._db().commit()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            size = self._db().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "saved_ms": round(self.stats["saved_ms"], 2),
+                "size": size,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = ResponseCache()
+_llm_flight = SingleFlight("llm")
+
+
+def _create(request: dict, priority: str, api_key: Optional[str]):
+    """Send one completion request through the rate-limit scheduler, retrying on 429."""
+    model = request["model"]
+    tokens = estimate_tokens(request["messages"], request.get("max_tokens"))
+    completions = get_client(api_key).chat.completions
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        # Don't queue for (or spend) quota on an answer nobody will wait for
+        deadline.check(f"{model} completion")
+        left = deadline.remaining()
+        scheduler.acquire(model, tokens, priority, timeout=left)
+        # A failed or rejected attempt used no tokens: its whole estimate goes back
+        used = 0
+        try:
+            try:
+                raw = completions.with_raw_response.create(**request)
+            except Exception as e:
+                if getattr(e, "status_code", None) == 429 and attempt < LLM_MAX_RETRIES:
+                    scheduler.on_rate_limited(model, getattr(getattr(e, "response", None), "headers", None))
+                    continue
+                raise
+            scheduler.observe_headers(model, raw.headers)
+            response = raw.parse()
+            usage = getattr(response, "usage", None)
+            # Unknown usage (None) leaves the estimate charged
+            used = getattr(usage, "total_tokens", None)
+            return response
+        finally:
+            scheduler.settle(model, tokens, used)
+
+
+# --- Public API ---
+def chat(
+    messages: List[dict],
+    model: str = DEFAULT_MODEL,
+    temperature: Optional[float] = None,
+    ttl: Optional[int] = None,
+    use_cache: bool = True,
+    api_key: Optional[str] = None,
+    priority: str = "interactive",
+    **params,
+) -> str:
+    """
+    Run a chat completion and return the message text.
+
+    Identical (model, messages, temperature, params) requests are served from
+    the cache until their TTL runs out. `params` are passed through to the
+    API (max_tokens, top_p, ...). `priority` ("interactive" or "batch")
+    orders requests waiting on the rate limiter. Errors propagate and are
+    never cached.
+    """
+    with tracing.span("llm.chat", "llm", model=model, priority=priority) as span:
+        caching = use_cache and not LLM_CACHE_DISABLED
+        key = ResponseCache.make_key(model, messages, temperature, params) if caching else None
+        if caching:
+            cached = _cache.get(key)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+        request = {"model": model, "messages": messages, **params}
+        if temperature is not None:
+            request["temperature"] = temperature
+        called = []
+
+        def _call() -> str:
+            called.append(True)
+            started = time.perf_counter()
+            tape = cassette.active()
+            if tape is not None and tape.replaying:
+                text = tape.replay_llm(request)
+                span.set(replayed=True)
+            else:
+                response = _create(request, priority, api_key)
+                text = response.choices[0].message.content or ""
+                usage = getattr(response, "usage", None)
+                if usage is not None:
+                    span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+                if tape is not None:
+                    tape.record_llm(request, text, usage.model_dump() if usage is not None else None,
+                                    time.perf_counter() - started)
+            latency_ms = (time.perf_counter() - started) * 1000
+            if caching:
+                _cache.put(key, model, text, latency_ms, ttl)
+            return text
+
+        text = _llm_flight.do(key, _call) if caching else _call()
+        span.set(cache_hit=False, coalesced=not called)
+        return text
+
+
+def complete(prompt: str, model: str = DEFAULT_MODEL, system: Optional[str] = None, **kwargs) -> str:
+    """Single-prompt convenience wrapper around `chat()`."""
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return chat(messages, model=model, **kwargs)
+
+
+def stream_chat(
+    messages: List[dict],
+    model: str = DEFAULT_MODEL,
+    temperature: Optional[float] = None,
+    ttl: Optional[int] = None,
+    use_cache: bool = True,
+    api_key: Optional[str] = None,
+    priority: str = "interactive",
+    **params,
+) -> Iterator[str]:
+    """
+    Stream a chat completion as text deltas.
+
+    A cached response is replayed as a single delta. A stream is only cached
+    once it has been consumed to the end; abandoned (e.g. paused) streams are not.
+    """
+    caching = use_cache and not LLM_CACHE_DISABLED
+    key = ResponseCache.make_key(model, messages, temperature, params) if caching else None
+    if caching:
+        cached = _cache.get(key)
+        if cached is not None:
+            tracing.open_span("llm.stream", "llm", model=model, priority=priority, cache_hit=True).finish()
+            yield cached
+            return
+
+    request = {"model": model, "messages": messages, "stream": True, **params}
+    if temperature is not None:
+        request["temperature"] = temperature
+
+    started = time.perf_counter()
+    parts = []
+    # Not made current: the generator's context would leak into the consumer between yields
+    span = tracing.open_span("llm.stream", "llm", model=model, priority=priority, cache_hit=False,
+                             tokens_estimated=True,
+                             prompt_tokens=sum(len(str(m.get("content") or "")) for m in messages) // CHARS_PER_TOKEN)
+    error = None
+    try:
+        tape = cassette.active()
+        if tape is not None and tape.replaying:
+            span.set(replayed=True)
+            for delta in tape.replay_llm_stream(request):
+                parts.append(delta)
+                yield delta
+        else:
+            ttft = None
+            for chunk in _create(request, priority, api_key):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                        span.set(ttft_ms=round(ttft * 1000, 1))
+                    parts.append(delta)
+                    yield delta
+            if tape is not None:
+                tape.record_llm(request, "".join(parts), None, time.perf_counter() - started, ttft)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        # Streams carry no usage block, so both counts are estimated
+        span.set(completion_tokens=len("".join(parts)) // CHARS_PER_TOKEN + 1)
+        span.finish(error)
+
+    if caching:
+        _cache.put(key, model, "".join(parts), (time.perf_counter() - started) * 1000, ttl)
+
+
+metrics.Gauge("llm_cache_hit_ratio", "Share of LLM cache lookups that hit.", fn=lambda: _cache.snapshot()["hit_rate"])
+metrics.Gauge("llm_cache_entries", "Responses in the LLM cache.", fn=lambda: _cache.snapshot()["size"])
+metrics.Gauge(
+    "llm_queue_depth", "LLM requests waiting on the rate limiter.", ["model", "priority"],
+    fn=lambda: {(m, p): n for m, s in scheduler.metrics().items() for p, n in s["queue_depth"].items()},
+)
+metrics.Counter(
+    "llm_rate_limited_total", "429 responses from the provider.", ["model"],
+    fn=lambda: {(m,): s["rate_limited"] for m, s in scheduler.metrics().items()},
+)
+
+
+def cache_stats() -> dict:
+    return {**_cache.snapshot(), "coalesced": _llm_flight.get_stats()["followers"]}
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def scheduler_metrics() -> dict:
+    """Per-model admissions, 429s, queue depth by priority and wait times."""
+    return scheduler.metrics()
+
+
+__all__ = ["chat", "complete", "stream_chat", "get_client", "cache_stats", "clear_cache", "scheduler_metrics", "ResponseCache"]
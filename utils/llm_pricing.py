@@ -0,0 +1,47 @@
+# utils/llm_pricing.py
+"""
+Per-model LLM prices, used to turn token counts into dollars.
+
+Prices are USD per 1K tokens as (prompt, completion). LLM_PRICES (a JSON
+object of model -> [prompt, completion]) overrides or extends the table;
+models that are not listed cost LLM_DEFAULT_PRICE (default: the
+gpt-4o-mini rate). Dated model names ("gpt-4o-2024-08-06") use the price
+of their base name.
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+PRICES_PER_1K = {
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4.1-nano": (0.0001, 0.0004),
+    "gpt-4.1-mini": (0.0004, 0.0016),
+    "gpt-4.1": (0.002, 0.008),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "o3-mini": (0.0011, 0.0044),
+}
+PRICES_PER_1K.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES", "{}")).items()})
+DEFAULT_PRICE = tuple(json.loads(os.getenv("LLM_DEFAULT_PRICE", "[0.00015, 0.0006]")))
+
+
+def price(model: Optional[str]) -> Tuple[float, float]:
+    """(prompt, completion) USD per 1K tokens for a model."""
+    model = model or ""
+    if model in PRICES_PER_1K:
+        return PRICES_PER_1K[model]
+    # Longest matching base name, so "gpt-4o-mini-2024-07-18" is not priced as "gpt-4o"
+    for name in sorted(PRICES_PER_1K, key=len, reverse=True):
+        if model.startswith(name + "-"):
+            return PRICES_PER_1K[name]
+    return DEFAULT_PRICE
+
+
+def cost_usd(model: Optional[str], prompt_tokens: int = 0, completion_tokens: int = 0) -> float:
+    prompt_rate, completion_rate = price(model)
+    return (prompt_tokens or 0) / 1000 * prompt_rate + (completion_tokens or 0) / 1000 * completion_rate
+
+
+__all__ = ["PRICES_PER_1K", "price", "cost_usd"]
@@ -0,0 +1,232 @@
+# utils/llm_scheduler.py
+"""
+Rate-limit-aware scheduler for LLM calls.
+
+Every request through utils.llm_gateway asks the scheduler for a slot
+before it is sent. Each model has a request bucket (RPM) and a token bucket
+(TPM) that refill continuously; a request is admitted only when both have
+room for it, so throughput tracks the quota without exceeding it.
+Waiting requests are served by priority ("interactive" before "batch"),
+then first come first served.
+
+Limits come from LLM_RATE_LIMITS (JSON, e.g. {"gpt-4": {"rpm": 500, "tpm": 30000}},
+"*" is the default) and are corrected from the provider's x-ratelimit-*
+response headers. A 429 pauses the model for its Retry-After interval, so
+queued callers back off together instead of retrying in a storm.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+DEFAULT_LIMITS = {"*": {"rpm": 500, "tpm": 200000}}
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Completion size assumed when the caller does not pass max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
+CHARS_PER_TOKEN = 4
+
+
+def _configured_limits() -> Dict[str, dict]:
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if raw:
+        try:
+            limits.update(json.loads(raw))
+        except ValueError:
+            print("[WARN] LLM_RATE_LIMITS is not valid JSON; using defaults.")
+    return limits
+
+
+def estimate_tokens(messages: List[dict], max_tokens: Optional[int] = None) -> int:
+    """Rough prompt + completion token estimate (~4 characters per token)."""
+    chars = sum(len(str(m.get("content") or "")) + 8 for m in messages)
+    return chars // CHARS_PER_TOKEN + 1 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations such as '1s', '6m0s', '250ms' or plain seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, num = 0.0, ""
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch.isdigit() or ch == ".":
+            num += ch
+        elif value.startswith("ms", i):
+            total += float(num or 0) / 1000
+            num = ""
+            i += 1
+        elif ch in "hms":
+            total += float(num or 0) * {"h": 3600, "m": 60, "s": 1}[ch]
+            num = ""
+        i += 1
+    return total
+
+
+class _Bucket:
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def set_capacity(self, capacity: float):
+        if capacity > 0 and capacity != self.capacity:
+            self.capacity = float(capacity)
+            self.rate = self.capacity / 60.0
+            self.level = min(self.level, self.capacity)
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.paused_until = 0.0
+        self.queue = []  # heap of (priority, seq, tokens)
+        self.waits = deque(maxlen=1000)
+        self.stats = {"admitted": 0, "rate_limited": 0, "tokens_estimated": 0, "tokens_used": 0}
+
+
+class LLMScheduler:
+    def __init__(self, limits: Optional[Dict[str, dict]] = None):
+        self.limits = limits or _configured_limits()
+        self.cond = threading.Condition()
+        self.models: Dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self.models.get(model)
+        if limiter is None:
+            conf = self.limits.get(model) or self.limits.get("*") or DEFAULT_LIMITS["*"]
+            limiter = self.models[model] = _ModelLimiter(conf["rpm"], conf["tpm"])
+        return limiter
+
+    def acquire(self, model: str, tokens: int, priority: str = "interactive", timeout: Optional[float] = None) -> float:
+        """Block until a request of `tokens` may be sent; returns seconds waited."""
+        entry = (PRIORITIES.get(priority, 0), next(self._seq), tokens)
+        started = time.monotonic()
+        with self.cond:
+            limiter = self._limiter(model)
+            heapq.heappush(limiter.queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    limiter.requests.refill(now)
+                    limiter.tokens.refill(now)
+                    delay = max(
+                        limiter.paused_until - now,
+                        limiter.requests.wait_for(1),
+                        limiter.tokens.wait_for(tokens),
+                    )
+                    if limiter.queue[0] is entry and delay <= 0:
+                        heapq.heappop(limiter.queue)
+                        limiter.requests.level -= 1
+                        limiter.tokens.level -= min(tokens, limiter.tokens.capacity)
+                        limiter.stats["admitted"] += 1
+                        limiter.stats["tokens_estimated"] += tokens
+                        waited = now - started
+                        limiter.waits.append(waited)
+                        self.cond.notify_all()
+                        return waited
+                    if timeout is not None and now - started >= timeout:
+                        raise TimeoutError(f"LLM scheduler: no {model} capacity within {timeout}s")
+                    # Not at the head: wake when someone ahead is admitted
+                    self.cond.wait(timeout=max(delay, 0.01) if limiter.queue[0] is entry else 1.0)
+            except BaseException:
+                if entry in limiter.queue:
+                    limiter.queue.remove(entry)
+                    heapq.heapify(limiter.queue)
+                    self.cond.notify_all()
+                raise
+
+    def settle(self, model: str, estimated: int, actual: Optional[int]):
+        """Refund (or charge) the difference between estimated and actual token usage."""
+        if actual is None:
+            return
+        with self.cond:
+            limiter = self._limiter(model)
+            limiter.tokens.level = min(limiter.tokens.capacity, limiter.tokens.level + estimated - actual)
+            limiter.stats["tokens_used"] += actual
+            self.cond.notify_all()
+
+    def observe_headers(self, model: str, headers) -> None:
+        """Sync bucket capacity and level with x-ratelimit-* response headers."""
+        if not headers:
+            return
+        get = headers.get
+        with self.cond:
+            limiter = self._limiter(model)
+            for bucket, kind in ((limiter.requests, "requests"), (limiter.tokens, "tokens")):
+                try:
+                    limit = get(f"x-ratelimit-limit-{kind}")
+                    remaining = get(f"x-ratelimit-remaining-{kind}")
+                    if limit:
+                        bucket.set_capacity(float(limit))
+                    if remaining is not None:
+                        bucket.refill(time.monotonic())
+                        bucket.level = min(bucket.level, float(remaining))
+                except ValueError:
+                    continue
+
+    def on_rate_limited(self, model: str, headers=None) -> float:
+        """Pause `model` after a 429; returns the pause in seconds."""
+        get = headers.get if headers else (lambda _k: None)
+        retry_ms = _parse_reset(get("retry-after-ms"))
+        pause = (
+            (retry_ms / 1000 if retry_ms else None)
+            or _parse_reset(get("retry-after"))
+            or max(_parse_reset(get("x-ratelimit-reset-requests")) or 0,
+                   _parse_reset(get("x-ratelimit-reset-tokens")) or 0)
+            or 1.0
+        )
+        with self.cond:
+            limiter = self._limiter(model)
+            limiter.stats["rate_limited"] += 1
+            limiter.paused_until = max(limiter.paused_until, time.monotonic() + pause)
+            limiter.tokens.level = min(limiter.tokens.level, 0)
+            self.cond.notify_all()
+        return pause
+
+    def metrics(self) -> dict:
+        with self.cond:
+            out = {}
+            now = time.monotonic()
+            for model, limiter in self.models.items():
+                waits = sorted(limiter.waits)
+                depth = {name: sum(1 for e in limiter.queue if e[0] == level) for name, level in PRIORITIES.items()}
+                out[model] = {
+                    **limiter.stats,
+                    "queue_depth": depth,
+                    "wait_avg_s": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                    "wait_p95_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4) if waits else 0.0,
+                    "wait_max_s": round(waits[-1], 4) if waits else 0.0,
+                    "rpm_limit": limiter.requests.capacity,
+                    "tpm_limit": limiter.tokens.capacity,
+                    "paused_for_s": round(max(0.0, limiter.paused_until - now), 3),
+                }
+            return out
+
+
+scheduler = LLMScheduler()
+
+__all__ = ["LLMScheduler", "scheduler", "estimate_tokens", "PRIORITIES"]
@@ -1,13 +1,207 @@
 # utils/logger.py
+"""
+Process-wide structured logging.
+
+`configure_logging()` is called once at process start (main.py, the agent
+servers and the FinalAssesment API). After it, every logger (ours, the
+FinalAssesment services' logging.getLogger(...) loggers and third-party
+ones) hands records to a bounded queue. A single listener thread formats
+and writes them, so concurrent workers never serialize on console I/O. When
+the queue is full, records are dropped and counted instead of blocking the
+caller.
+
+Records are JSON lines carrying the run id, trace id and span id in scope
+(utils.tracing), so the lines of one run can be pulled out of interleaved
+output:
+
+    {"ts": "...", "level": "INFO", "logger": "rpc_client", "message": "...",
+     "run_id": "3f2a9c1d7e4b", "trace_id": "...", "span_id": "..."}
+
+Keyword data passed with `extra={...}` becomes extra JSON fields.
+High-volume records below WARNING can be sampled per level or per logger
+name. A kept record carries "sample_rate", so counts can be scaled back up.
+
+Environment:
+    LOG_LEVEL         root level (default: INFO)
+    LOG_FORMAT        "json" (default) or "text"
+    LOG_FILE          also write to this file
+    LOG_SAMPLE_RATES  e.g. "DEBUG=0.05,rpc_client=0.1" (default: "DEBUG=0.1")
+    LOG_QUEUE_SIZE    records buffered before dropping (default: 10000)
+"""
+
+import atexit
+import json
 import logging
-from typing import Optional
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from utils import metrics, tracing
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "DEBUG=0.1")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "run_id", "trace_id",
+                                                                       "span_id", "sample_rate"}
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["_QueueHandler"] = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, value = part.partition("=")
+        rates[key.strip()] = float(value)
+    return rates
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp records with the run/trace/span in scope where they were logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = tracing.current_span()
+        record.run_id = tracing.current_run_id()
+        record.trace_id = span.trace_id if span is not None else None
+        record.span_id = span.span_id if span is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of records below WARNING. A logger-name rate (longest
+    matching prefix) wins over a level rate; warnings and errors are
+    always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.levels = {k.upper(): v for k, v in rates.items() if k.upper() in logging._nameToLevel}
+        self.loggers = sorted(((k, v) for k, v in rates.items() if k.upper() not in logging._nameToLevel),
+                              key=lambda kv: -len(kv[0]))
+
+    def rate_for(self, record: logging.LogRecord) -> float:
+        if record.levelno >= logging.WARNING:
+            return 1.0
+        for prefix, rate in self.loggers:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate
+        return self.levels.get(record.levelname, 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rate_for(record)
+        if rate >= 1.0:
+            return True
+        record.sample_rate = rate
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("run_id", "trace_id", "span_id", "sample_rate"):
+            value = getattr(record, key, None)
+            if value is not None:
+                out[key] = value
+        out.update({k: v for k, v in vars(record).items() if k not in _RESERVED and not k.startswith("_")})
+        if record.exc_text:
+            out["exception"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render arguments and tracebacks here (the objects may change once we return),
+        # but leave formatting to the listener thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None, sample_rates: Optional[str] = None):
+    """Route all logging through the queue and listener thread (idempotent)."""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+        formatter = JsonFormatter() if (fmt or LOG_FORMAT) == "json" else logging.Formatter(TEXT_FORMAT)
+        outputs = [logging.StreamHandler(sys.stderr)]
+        if LOG_FILE:
+            outputs.append(logging.FileHandler(LOG_FILE))
+        for handler in outputs:
+            handler.setFormatter(formatter)
+
+        _queue_handler = _QueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _queue_handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates or LOG_SAMPLE_RATES)))
+        _queue_handler.addFilter(CorrelationFilter())
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(level or LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, *outputs)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+    if dropped_records():
+        sys.stderr.write(f"[WARN] {dropped_records()} log records were dropped (queue full)\n")
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+metrics.Counter("log_records_dropped_total", "Log records dropped because the log queue was full.",
+                fn=dropped_records)
+
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
-    logger = logging.getLogger(name or __name__)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
-    return logger
+    # Loggers have no handlers of their own; records propagate to the root queue handler
+    configure_logging()
+    return logging.getLogger(name or __name__)
+
+
+__all__ = [
+    "configure_logging", "shutdown_logging", "get_logger", "dropped_records",
+    "JsonFormatter", "SamplingFilter", "CorrelationFilter", "parse_sample_rates",
+]
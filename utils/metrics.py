@@ -0,0 +1,247 @@
+# utils/metrics.py
+"""
+Process-wide metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in one registry and are rendered by
+`render()`; `mount(app)` adds a GET /metrics route to a FastMCP server
+(FinalAssesment serves it through api/metrics_route.py).
+
+Most series come from trace spans (utils.tracing): every finished span
+is turned into a sample, so tool latency, LLM requests/tokens/cost,
+fetch bytes and DB time are measured wherever those spans are emitted,
+without separate instrumentation:
+
+    tool_duration_seconds{tool}              graph_node_duration_seconds{node}
+    dag_task_duration_seconds{agent}         rpc_duration_seconds{target}
+    llm_request_duration_seconds{model,cache}  llm_requests_total{model,cache}
+    llm_tokens_total{model,type}             llm_cost_usd_total{model}
+    fetch_duration_seconds                   fetch_bytes_total{status}
+    db_query_duration_seconds{db}            span_errors_total{kind}
+
+Modules that own queues and caches register gauges computed on scrape
+(`Gauge(..., fn=...)`), e.g. scheduler queue depth or cache hit ratios.
+"""
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from utils import single_flight, tracing
+from utils.llm_pricing import cost_usd
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, "_Metric"] = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric: "_Metric") -> "_Metric":
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), fn: Optional[Callable] = None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        # fn() -> number, or {label values tuple: number}; read at scrape time
+        self.fn = fn
+        self.values: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def _collected(self) -> Dict[Tuple, float]:
+        if self.fn is None:
+            with self.lock:
+                return dict(self.values)
+        try:
+            value = self.fn()
+        except Exception as e:
+            print(f"[WARN] Metric {self.name} could not be collected: {e}")
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self):
+        for key, value in sorted(self._collected().items()):
+            yield f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series: Dict[Tuple, list] = {}   # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self.lock:
+            series = {k: list(v) for k, v in self.series.items()}
+        for key, counts in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {_number(counts[-2])}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {counts[-1]}"
+
+
+# --- Series fed by trace spans ---
+tool_duration = Histogram("tool_duration_seconds", "MCP tool call latency.", ["tool"])
+node_duration = Histogram("graph_node_duration_seconds", "Graph node latency.", ["node"])
+task_duration = Histogram("dag_task_duration_seconds", "DAG subtask latency by agent.", ["agent"])
+rpc_duration = Histogram("rpc_duration_seconds", "Agent-to-agent RPC latency.", ["target"])
+llm_duration = Histogram("llm_request_duration_seconds", "LLM call latency (cache hits included).",
+                         ["model", "cache"])
+llm_requests = Counter("llm_requests_total", "LLM calls by cache outcome (hit, miss, coalesced).", ["model", "cache"])
+llm_tokens = Counter("llm_tokens_total", "Tokens sent to and generated by the provider.", ["model", "type"])
+llm_cost = Counter("llm_cost_usd_total", "Estimated provider spend in USD.", ["model"])
+fetch_duration = Histogram("fetch_duration_seconds", "Web fetch latency.")
+fetch_bytes = Counter("fetch_bytes_total", "Bytes received from web fetches.", ["status"])
+db_duration = Histogram("db_query_duration_seconds", "Database statement latency.", ["db"])
+span_errors = Counter("span_errors_total", "Failed spans by kind.", ["kind"])
+dag_inflight = Gauge("dag_tasks_in_flight", "DAG subtasks currently running.")
+Gauge("single_flight_in_flight", "Distinct calls in flight per coalescing group.", ["group"],
+      fn=lambda: {(sf.name,): len(sf.inflight) for sf in single_flight.instances()})
+Counter("trace_spans_dropped_total", "Finished spans the trace exporter had to drop.", fn=tracing.dropped_spans)
+Counter("single_flight_coalesced_total", "Callers that joined an identical call in flight.", ["group"],
+        fn=lambda: {(sf.name,): sf.stats["followers"] for sf in single_flight.instances()})
+
+
+def observe_span(span: "tracing.Span"):
+    """Turn a finished span into metric samples."""
+    seconds = (span.end or span.start) - span.start
+    a = span.attributes
+    if span.status == "error":
+        span_errors.inc(kind=span.kind)
+    if span.kind == "tool":
+        tool_duration.observe(seconds, tool=span.name)
+    elif span.kind == "node":
+        node_duration.observe(seconds, node=span.name)
+    elif span.kind == "task":
+        task_duration.observe(seconds, agent=span.name.split(":", 1)[-1])
+    elif span.kind == "rpc":
+        rpc_duration.observe(seconds, target=span.name)
+    elif span.kind == "llm":
+        model = a.get("model", "")
+        cache = "hit" if a.get("cache_hit") else "coalesced" if a.get("coalesced") else "miss"
+        llm_duration.observe(seconds, model=model, cache=cache)
+        llm_requests.inc(model=model, cache=cache)
+        prompt, completion = a.get("prompt_tokens") or 0, a.get("completion_tokens") or 0
+        # Only the caller that actually reached the provider carries token counts
+        if cache == "miss" and not a.get("replayed") and (prompt or completion):
+            llm_tokens.inc(prompt, model=model, type="prompt")
+            llm_tokens.inc(completion, model=model, type="completion")
+            llm_cost.inc(cost_usd(model, prompt, completion), model=model)
+    elif span.kind == "http":
+        fetch_duration.observe(seconds)
+        fetch_bytes.inc(a.get("bytes") or 0, status=a.get("status", "error"))
+    elif span.kind == "db":
+        db_duration.observe(seconds, db=a.get("db", ""))
+
+
+tracing.add_listener(observe_span)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def metrics_response():
+    from starlette.responses import Response
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+def mount(app, path: str = "/metrics"):
+    """Serve the registry at `path` on a FastMCP server."""
+    @app.custom_route(path, methods=["GET"])
+    async def _metrics(request):
+        return metrics_response()
+    return app
+
+
+__all__ = [
+    "Counter", "Gauge", "Histogram", "Registry", "REGISTRY", "render", "metrics_response", "mount",
+    "observe_span", "CONTENT_TYPE", "dag_inflight",
+]
@@ -0,0 +1,334 @@
+# utils/rpc_client.py
+"""
+Async RPC client for agent-to-agent tool calls.
+
+- One pooled httpx.AsyncClient per base URL, so connections stay alive
+  between calls (HTTP/2 when the `h2` package is installed).
+- `gather()` fans calls out concurrently; every call has its own timeout
+  and the whole batch can share an overall deadline. Slow or failed calls
+  come back as error entries instead of failing the batch.
+- Payloads are JSON by default. With encoding="msgpack" (and `msgpack`
+  installed) requests are sent as application/msgpack; responses are
+  decoded by their Content-Type, so servers may answer either way.
+- Each origin has a circuit breaker: after repeated failures calls fail
+  fast with CircuitOpenError instead of waiting out the timeout.
+- Idempotent calls can be hedged (hedge=True): if no answer arrives within
+  the origin's p95 latency, a duplicate is sent and the first answer wins.
+- Every request carries an X-Request-Deadline header (see utils.deadline)
+  and its timeout never outlives the deadline already in scope.
+- Every call is an "rpc" span and sends a W3C traceparent header, so the
+  remote agent's spans join the caller's trace (utils.tracing).
+
+`utils.http_client.call_remote_tool` is a blocking wrapper around this client.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils import deadline, metrics, tracing
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, LatencyTracker
+from utils.logger import get_logger
+
+try:
+    import msgpack
+except ImportError:  # compact encoding is optional; JSON is always available
+    msgpack = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+logger = get_logger("rpc_client")
+
+MSGPACK_TYPE = "application/msgpack"
+
+# Breaker and hedging defaults
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 10.0
+BREAKER_PROBE_SECONDS = 30.0
+HEDGE_PERCENTILE = 95
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def encode_payload(payload: Any, encoding: str = "json"):
+    """Return (body_bytes, content_type) for the requested encoding."""
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack encoding requested but the msgpack package is not installed")
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_TYPE
+    return json.dumps(payload).encode("utf-8"), "application/json"
+
+
+def decode_response(resp: httpx.Response) -> Any:
+    ctype = resp.headers.get("content-type", "")
+    if MSGPACK_TYPE in ctype and msgpack is not None:
+        return msgpack.unpackb(resp.content, raw=False)
+    try:
+        return resp.json()
+    except ValueError:
+        logger.warning(f"Non-JSON response from {resp.request.url}: returning raw text")
+        return resp.text
+
+
+class AsyncRPCClient:
+    def __init__(
+        self,
+        timeout: float = 30,
+        encoding: str = "json",
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        hedge_percentile: float = HEDGE_PERCENTILE,
+    ):
+        self.timeout = timeout
+        self.encoding = encoding
+        self.hedge_percentile = hedge_percentile
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.hedge_stats: Dict[str, Dict[str, int]] = {}
+
+    def _breaker(self, origin: str) -> CircuitBreaker:
+        if origin not in self.breakers:
+            self.breakers[origin] = CircuitBreaker(origin, BREAKER_FAILURES, BREAKER_RESET_SECONDS,
+                                                   BREAKER_PROBE_SECONDS)
+            self.latency[origin] = LatencyTracker()
+            self.hedge_stats[origin] = {"hedged": 0, "hedge_wins": 0}
+        return self.breakers[origin]
+
+    def _client(self, url: str) -> httpx.AsyncClient:
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._clients[origin] = httpx.AsyncClient(
+                base_url=origin, http2=HTTP2, limits=self.limits, timeout=self.timeout
+            )
+        return client
+
+    async def call(
+        self,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+        encoding: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        hedge: bool = False,
+    ) -> Any:
+        """
+        POST `payload` to `url` and return the decoded response. Raises on
+        HTTP errors, CircuitOpenError when the endpoint's breaker is open and
+        DeadlineExceeded when the deadline in scope has already passed.
+        Only set hedge=True for idempotent calls.
+        """
+        origin = _origin(url)
+        breaker = self._breaker(origin)
+        timeout = timeout if timeout is not None else self.timeout
+        left = deadline.remaining()
+        if left is not None:
+            if left <= 0:
+                raise deadline.DeadlineExceeded(f"Deadline passed before POST {url}")
+            timeout = min(timeout, left)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {origin}; failing fast")
+
+        body, content_type = encode_payload(payload, encoding or self.encoding)
+        req_headers = {
+            "Content-Type": content_type,
+            "Accept": f"application/json, {MSGPACK_TYPE}",
+            deadline.DEADLINE_HEADER: f"{time.time() + timeout:.3f}",
+        }
+        req_headers.update(headers or {})
+        # Per-request detail: DEBUG, so it is sampled (see utils.logger)
+        logger.debug(f"POST {url} payload keys: {list(payload.keys())}")
+        with tracing.span(f"POST {urlsplit(url).path}", "rpc", url=url, hedge=hedge) as span:
+            tracing.inject_headers(req_headers)
+            resp = await self._post(url, body, req_headers, timeout, breaker, origin, hedge)
+            span.set(status=resp.status_code, bytes=len(resp.content))
+        return decode_response(resp)
+
+    async def _post(self, url, body, req_headers, timeout, breaker, origin, hedge) -> httpx.Response:
+        async def _send():
+            resp = await self._client(url).post(url, content=body, headers=req_headers, timeout=timeout)
+            resp.raise_for_status()
+            return resp
+
+        started = time.monotonic()
+        try:
+            resp = await (self._hedged(origin, _send) if hedge else _send())
+        except httpx.HTTPStatusError as e:
+            # Only server-side errors count against the endpoint
+            if e.response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (speculative call dropped, wait_for timeout): says nothing about the
+            # endpoint, but a half-open probe must give its slot back
+            breaker.release()
+            raise
+        breaker.record_success()
+        self.latency[origin].observe(time.monotonic() - started)
+        return resp
+
+    async def _hedged(self, origin: str, send):
+        """Send once; if still waiting after the origin's latency percentile, send a duplicate."""
+        delay = self.latency[origin].percentile(self.hedge_percentile)
+        first = asyncio.ensure_future(send())
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedge_stats[origin]["hedged"] += 1
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_stats[origin]["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def resilience_stats(self) -> Dict[str, dict]:
+        """Per-origin breaker state, latency percentiles and hedge win rates."""
+        out = {}
+        for origin, breaker in self.breakers.items():
+            hedges = self.hedge_stats[origin]
+            tracker = self.latency[origin]
+            out[origin] = {
+                "breaker": breaker.snapshot(),
+                "p50_s": tracker.percentile(50),
+                "p95_s": tracker.percentile(95),
+                **hedges,
+                "hedge_win_rate": round(hedges["hedge_wins"] / hedges["hedged"], 4) if hedges["hedged"] else 0.0,
+            }
+        return out
+
+    async def gather(
+        self,
+        calls: List[Dict[str, Any]],
+        deadline: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run calls concurrently. Each call is {"url", "payload", "timeout"?, "id"?, "hedge"?};
+        `deadline` (seconds) caps the whole fan-out. Returns, in input order,
+        {"id", "url", "result" | "error", "elapsed_ms"} per call.
+        """
+        started = time.monotonic()
+
+        async def _one(call: Dict[str, Any]) -> Dict[str, Any]:
+            out = {"id": call.get("id"), "url": call["url"]}
+            t0 = time.monotonic()
+            limit = call.get("timeout", self.timeout)
+            if deadline is not None:
+                limit = min(limit, max(0.0, deadline - (t0 - started)))
+            try:
+                out["result"] = await asyncio.wait_for(
+                    self.call(call["url"], call.get("payload") or {}, timeout=limit,
+                              encoding=call.get("encoding"), headers=call.get("headers"),
+                              hedge=call.get("hedge", False)),
+                    timeout=limit,
+                )
+            except asyncio.TimeoutError:
+                out["error"] = f"timed out after {limit:.2f}s"
+            except Exception as e:
+                out["error"] = str(e) or e.__class__.__name__
+            out["elapsed_ms"] = round((time.monotonic() - t0) * 1000, 2)
+            return out
+
+        return list(await asyncio.gather(*(_one(c) for c in calls)))
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+# --- Shared background loop for synchronous callers ---
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_default_client: Optional[AsyncRPCClient] = None
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="rpc-client-loop", daemon=True).start()
+        return _loop
+
+
+def get_client() -> AsyncRPCClient:
+    """
+    Process-wide client used by the sync wrappers (its pools live on the
+    background loop). Code already running in its own event loop should
+    create its own AsyncRPCClient.
+    """
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncRPCClient()
+    return _default_client
+
+
+def _breaker_states() -> Dict[tuple, int]:
+    client = _default_client
+    if client is None:
+        return {}
+    return {(origin,): int(b.snapshot()["state"] == "open") for origin, b in list(client.breakers.items())}
+
+
+metrics.Gauge("rpc_circuit_open", "1 while an agent endpoint's circuit breaker is open.", ["origin"],
+              fn=_breaker_states)
+
+
+def submit(coro) -> "concurrent.futures.Future":
+    """
+    Start a coroutine on the shared background loop without waiting for it.
+    The caller's deadline and trace span (if any) stay in scope for the
+    coroutine; cancelling the returned future cancels the coroutine.
+    """
+    at = deadline.current()
+    parent = tracing.current_span()
+
+    async def _scoped():
+        with deadline.deadline_scope(at=at), tracing.use_span(parent):
+            return await coro
+
+    return asyncio.run_coroutine_threadsafe(_scoped(), _background_loop())
+
+
+def run_sync(coro):
+    """Run a coroutine on the shared background loop and wait for its result."""
+    return submit(coro).result()
+
+
+__all__ = [
+    "AsyncRPCClient", "CircuitOpenError", "get_client", "submit", "run_sync", "encode_payload", "decode_response",
+]
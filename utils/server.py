@@ -0,0 +1,90 @@
+# utils/server.py
+"""
+Serve an agent's FastMCP server over HTTP with the cross-agent middleware.
+
+    serve(app, host="0.0.0.0", port=8002)
+
+`http_app(app)` builds the server's ASGI app (works with both the `fastmcp`
+package and the MCP SDK's mcp.server.fastmcp) and installs:
+
+    TraceMiddleware     one "server" span per request, joined to the caller's
+                        trace through its traceparent header
+    DeadlineMiddleware  answers requests whose X-Request-Deadline has passed
+                        with 504 and puts the deadline in scope for the
+                        handler, so its own RPC/LLM calls inherit it
+
+Custom routes (/metrics, SSE endpoints) are part of the same app.
+
+`mount_tools(app, {"name": fn, ...})` adds POST /tools/{tool}, the plain
+HTTP route agents call each other through (agents.coordinator.tools.agent_rpc):
+the body holds the tool's keyword arguments as JSON or msgpack and the
+result comes back in the same encoding.
+"""
+
+import asyncio
+import inspect
+import json
+from typing import Callable, Dict
+
+from utils.deadline import DeadlineMiddleware
+from utils.tracing import TraceMiddleware
+
+
+def middleware(app) -> list:
+    """(class, options) pairs, outermost first (requests rejected for their deadline still get a span)."""
+    return [(TraceMiddleware, {"service": getattr(app, "name", "") or ""}), (DeadlineMiddleware, {})]
+
+
+def http_app(app):
+    """ASGI app of a FastMCP server with the middleware installed."""
+    if hasattr(app, "http_app"):
+        # fastmcp
+        from starlette.middleware import Middleware
+        return app.http_app(middleware=[Middleware(cls, **options) for cls, options in middleware(app)])
+    # MCP SDK: add_middleware() wraps the stack, so add innermost first
+    asgi = app.streamable_http_app()
+    for cls, options in reversed(middleware(app)):
+        asgi.add_middleware(cls, **options)
+    return asgi
+
+
+def mount_tools(app, tools: Dict[str, Callable], path: str = "/tools/{tool}"):
+    """Serve `tools` (name -> callable taking keyword arguments) at `path` on a FastMCP server."""
+    from starlette.responses import JSONResponse, Response
+    from utils.rpc_client import MSGPACK_TYPE, encode_payload, msgpack
+
+    @app.custom_route(path, methods=["POST"])
+    async def _invoke_tool(request):
+        name = request.path_params["tool"]
+        fn = tools.get(name)
+        if fn is None:
+            return JSONResponse({"error": f"Unknown tool '{name}'. Available: {', '.join(tools)}"}, status_code=404)
+        binary = MSGPACK_TYPE in request.headers.get("content-type", "") and msgpack is not None
+        body = await request.body()
+        try:
+            payload = (msgpack.unpackb(body, raw=False) if binary else json.loads(body or b"{}")) or {}
+            if not isinstance(payload, dict):
+                raise ValueError("payload must be an object of keyword arguments")
+            inspect.signature(fn).bind(**payload)
+        except (TypeError, ValueError) as e:
+            return JSONResponse({"error": f"Bad arguments for '{name}': {e}"}, status_code=400)
+        try:
+            if inspect.iscoroutinefunction(fn):
+                result = await fn(**payload)
+            else:
+                # to_thread copies the request's context, so deadline and trace carry over
+                result = await asyncio.to_thread(fn, **payload)
+        except Exception as e:
+            return JSONResponse({"error": f"Tool '{name}' failed: {e}"}, status_code=500)
+        content, content_type = encode_payload(result, "msgpack" if binary else "json")
+        return Response(content, media_type=content_type)
+
+    return app
+
+
+def serve(app, host: str = "0.0.0.0", port: int = 8000):
+    import uvicorn
+    uvicorn.run(http_app(app), host=host, port=port)
+
+
+__all__ = ["http_app", "serve", "middleware", "mount_tools"]
@@ -0,0 +1,65 @@
+# utils/single_flight.py
+"""
+Single-flight request coalescing.
+
+`SingleFlight.do(key, fn)` runs `fn` once per key at a time: the first
+caller (the leader) computes, and concurrent callers with the same key
+attach to its Future and receive the same result or exception. Nothing is
+kept once the call finishes, so this only merges overlapping work; caching
+stays with the layers that already do it.
+"""
+
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+_instances = weakref.WeakSet()
+
+
+def instances():
+    """All live SingleFlight groups (for metrics)."""
+    return list(_instances)
+
+
+class SingleFlight:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.stats = {"leaders": 0, "followers": 0}
+        _instances.add(self)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self.lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["followers"] += 1
+
+        if leader:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    self.inflight.pop(key, None)
+        return future.result()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            total = self.stats["leaders"] + self.stats["followers"]
+            return {
+                "name": self.name,
+                **self.stats,
+                "in_flight": len(self.inflight),
+                "coalesced_rate": round(self.stats["followers"] / total, 4) if total else 0.0,
+            }
+
+
+__all__ = ["SingleFlight", "instances"]
@@ -0,0 +1,183 @@
+# utils/tool_router.py
+"""
+Local tool router.
+
+Picks a tool name for a query without an LLM round trip:
+  1. keyword rules  - a route wins outright when it matches strictly more
+                      of its keywords, as whole words, than any other
+                      route (microseconds)
+  2. nearest centroid - the query embedding is compared with the mean
+                      embedding of each route's example queries; accepted
+                      when the best score clears `min_similarity` and beats
+                      the runner-up by `min_margin`
+  3. LLM fallback   - the caller's original LLM chooser, only when neither
+                      local stage is confident
+
+Stats are kept per route and stage: decisions, average latency and, where
+the LLM was also consulted, how often the local prediction agreed with it.
+A `shadow_rate` share of locally routed queries (ROUTER_SHADOW_RATE,
+default 5%) is also sent to the LLM chooser in the background for that
+check; the query itself is not held up by it.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+ROUTER_EMBED_MODEL = os.getenv("ROUTER_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+ROUTER_SHADOW_RATE = float(os.getenv("ROUTER_SHADOW_RATE", "0.05"))
+
+_model = None
+_model_lock = threading.Lock()
+_model_failed = False
+
+
+def _load_model():
+    global _model, _model_failed
+    with _model_lock:
+        if _model is None and not _model_failed:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(ROUTER_EMBED_MODEL)
+            except Exception as e:
+                print(f"[WARN] Tool router centroid stage disabled: {e}")
+                _model_failed = True
+        return _model
+
+
+def _keyword_pattern(keyword: str) -> "re.Pattern":
+    """Whole-word match: "rate" does not fire on "generate" or "rated" (edges that are not word characters match as is)."""
+    k = keyword.lower()
+    left = r"\b" if re.match(r"\w", k) else ""
+    right = r"\b" if re.search(r"\w$", k) else ""
+    return re.compile(left + re.escape(k) + right)
+
+
+class ToolRouter:
+    def __init__(
+        self,
+        name: str,
+        routes: Dict[str, dict],
+        llm_fallback: Optional[Callable[[str], str]] = None,
+        min_similarity: float = 0.35,
+        min_margin: float = 0.05,
+        shadow_rate: Optional[float] = None,
+    ):
+        """
+        routes: {tool_name: {"keywords": [...], "examples": [...]}}
+        llm_fallback: query -> tool name, used when local stages are unsure
+        shadow_rate: share of local decisions checked against llm_fallback
+                     (default ROUTER_SHADOW_RATE)
+        """
+        self.name = name
+        self.routes = routes
+        self.llm_fallback = llm_fallback
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.shadow_rate = ROUTER_SHADOW_RATE if shadow_rate is None else shadow_rate
+        self._patterns = {
+            tool: [_keyword_pattern(k) for k in spec.get("keywords", [])]
+            for tool, spec in routes.items()
+        }
+        self._centroids = None
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"count": 0, "latency_ms": 0.0, "checked": 0, "agreed": 0})
+
+    # --- Stages ---
+    def _keyword_route(self, query: str) -> Optional[str]:
+        ql = query.lower()
+        scores = {tool: sum(1 for p in pats if p.search(ql)) for tool, pats in self._patterns.items()}
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked or ranked[0][1] == 0:
+            return None
+        if len(ranked) > 1 and ranked[1][1] == ranked[0][1]:
+            return None
+        return ranked[0][0]
+
+    def _build_centroids(self):
+        model = _load_model()
+        if model is None:
+            return {}
+        import numpy as np
+
+        centroids = {}
+        for tool, spec in self.routes.items():
+            examples = spec.get("examples") or []
+            if examples:
+                vecs = model.encode(examples, normalize_embeddings=True)
+                c = np.mean(vecs, axis=0)
+                centroids[tool] = c / (np.linalg.norm(c) or 1.0)
+        return centroids
+
+    def _centroid_route(self, query: str) -> Optional[str]:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self._build_centroids()
+        if not self._centroids:
+            return None
+        vec = _load_model().encode([query], normalize_embeddings=True)[0]
+        ranked = sorted(((float(vec @ c), tool) for tool, c in self._centroids.items()), reverse=True)
+        best_sim, best = ranked[0]
+        runner_up = ranked[1][0] if len(ranked) > 1 else -1.0
+        if best_sim >= self.min_similarity and best_sim - runner_up >= self.min_margin:
+            return best
+        return None
+
+    # --- Public API ---
+    def route(self, query: str) -> str:
+        """Return the tool name for `query`."""
+        started = time.perf_counter()
+        stage, tool = "keyword", self._keyword_route(query)
+        if tool is None:
+            stage, tool = "centroid", self._centroid_route(query)
+
+        if tool is None:
+            if self.llm_fallback is None:
+                stage, tool = "default", next(iter(self.routes))
+            else:
+                stage, tool = "llm", self.llm_fallback(query).strip()
+        elif self.llm_fallback and random.random() < self.shadow_rate:
+            threading.Thread(target=self._shadow_check, args=(query, tool, stage), daemon=True).start()
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            s = self._stats[(tool, stage)]
+            s["count"] += 1
+            s["latency_ms"] += latency_ms
+        return tool
+
+    def _shadow_check(self, query: str, tool: str, stage: str):
+        """Ask the LLM chooser too and record whether the local stage agreed."""
+        try:
+            llm_tool = self.llm_fallback(query).strip()
+        except Exception as e:
+            print(f"[WARN] Router shadow check failed: {e}")
+            return
+        self.record_feedback(tool, stage, llm_tool == tool)
+
+    def record_feedback(self, tool: str, stage: str, correct: bool):
+        """Record an externally verified routing outcome."""
+        with self._lock:
+            s = self._stats[(tool, stage)]
+            s["checked"] += 1
+            s["agreed"] += int(correct)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for (tool, stage), s in self._stats.items():
+                out.setdefault(tool, {})[stage] = {
+                    "count": s["count"],
+                    "avg_latency_ms": round(s["latency_ms"] / s["count"], 4) if s["count"] else 0.0,
+                    "accuracy": round(s["agreed"] / s["checked"], 4) if s["checked"] else None,
+                    "checked": s["checked"],
+                }
+            return {"router": self.name, "routes": out}
+
+
+__all__ = ["ToolRouter", "ROUTER_SHADOW_RATE"]
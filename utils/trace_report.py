@@ -0,0 +1,206 @@
+# utils/trace_report.py
+"""
+Inspect exported traces (see utils/tracing.py).
+
+    python -m utils.trace_report runs                 # recent runs
+    python -m utils.trace_report show <run_id>        # waterfall of one run
+    python -m utils.trace_report collect --port 4318  # local OTLP/HTTP collector
+
+`show` accepts a run id or a trace id and prints every span as a bar on
+the run's timeline, indented under its parent, followed by the time spent
+per span kind (llm, tool, http, db, ...). `collect` stands in for an
+OTLP collector: it accepts OTLP/HTTP JSON on /v1/traces and appends the
+spans to the trace file, so agents started with TRACE_EXPORT=otlp end up
+in the same place the waterfall reads from.
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+from utils.tracing import TRACE_FILE, trace_id_for
+
+
+def iter_spans(path: str = TRACE_FILE) -> Iterator[dict]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def load_trace(run_id: str, path: str = TRACE_FILE) -> List[dict]:
+    """All spans of one run (by run id or trace id), ordered by start time."""
+    trace_id = trace_id_for(run_id)
+    return sorted((s for s in iter_spans(path) if s["trace_id"] == trace_id), key=lambda s: s["start"])
+
+
+def list_runs(path: str = TRACE_FILE, limit: int = 20) -> List[dict]:
+    """Most recent root spans with their span and error counts."""
+    roots: Dict[str, dict] = {}
+    counts: Dict[str, int] = defaultdict(int)
+    errors: Dict[str, int] = defaultdict(int)
+    for s in iter_spans(path):
+        counts[s["trace_id"]] += 1
+        errors[s["trace_id"]] += s.get("status") == "error"
+        if s.get("parent_id") is None:
+            roots[s["trace_id"]] = s
+    runs = sorted(roots.values(), key=lambda s: s["start"], reverse=True)[:limit]
+    return [{
+        "run_id": s["attributes"].get("run_id") or s["trace_id"], "trace_id": s["trace_id"], "name": s["name"],
+        "start": s["start"], "duration_ms": s["duration_ms"], "spans": counts[s["trace_id"]],
+        "errors": errors[s["trace_id"]],
+    } for s in runs]
+
+
+def _label(s: dict) -> str:
+    a = s.get("attributes") or {}
+    extra = []
+    if s["kind"] == "llm":
+        extra.append(a.get("model", ""))
+        if a.get("cache_hit"):
+            extra.append("cache hit")
+        if a.get("coalesced"):
+            extra.append("coalesced")
+        if a.get("prompt_tokens") is not None or a.get("completion_tokens") is not None:
+            extra.append(f"{a.get('prompt_tokens', '?')}+{a.get('completion_tokens', '?')} tok")
+    elif s["kind"] in ("http", "rpc", "server"):
+        extra.append(str(a.get("status", "")))
+    elif s["kind"] == "db":
+        extra.append(a.get("statement", "")[:40])
+    if s.get("status") == "error":
+        extra.append("ERROR")
+    detail = ", ".join(x for x in extra if x)
+    return f"{s['name']} ({detail})" if detail else s["name"]
+
+
+def waterfall(spans: List[dict], width: int = 40) -> str:
+    """Text waterfall: one line per span, children indented under their parents."""
+    if not spans:
+        return "No spans recorded for this run."
+    ids = {s["span_id"] for s in spans}
+    children: Dict[Optional[str], List[dict]] = defaultdict(list)
+    for s in spans:
+        # Spans whose parent lives in another process's file still show up, at the top level
+        children[s["parent_id"] if s["parent_id"] in ids else None].append(s)
+    t0 = min(s["start"] for s in spans)
+    total = max((s["end"] or s["start"]) for s in spans) - t0 or 1e-9
+
+    lines = [f"{'span':<58} {'kind':<9} {'start':>9} {'dur':>9}  timeline"]
+
+    def _walk(parent: Optional[str], depth: int):
+        for s in sorted(children.get(parent, []), key=lambda x: x["start"]):
+            offset = s["start"] - t0
+            duration = s["duration_ms"] / 1000
+            lead = int(offset / total * width)
+            bar = "█" * max(1, int(duration / total * width))
+            name = ("  " * depth + _label(s))[:58]
+            lines.append(f"{name:<58} {s['kind']:<9} {offset * 1000:>7.0f}ms {s['duration_ms']:>7.0f}ms  "
+                         f"|{(' ' * lead + bar)[:width]:<{width}}|")
+            _walk(s["span_id"], depth + 1)
+
+    _walk(None, 0)
+
+    by_kind: Dict[str, List[float]] = defaultdict(list)
+    for s in spans:
+        by_kind[s["kind"]].append(s["duration_ms"])
+    lines.append("")
+    lines.append(f"total {total * 1000:.0f}ms, {len(spans)} spans; by kind:")
+    for kind, durations in sorted(by_kind.items(), key=lambda kv: -sum(kv[1])):
+        lines.append(f"  {kind:<9} {len(durations):>4} spans {sum(durations):>9.0f}ms")
+    return "\n".join(lines)
+
+
+# --- OTLP collector stand-in ---
+def _from_otlp(payload: dict) -> List[dict]:
+    def _value(v: dict):
+        for key in ("stringValue", "boolValue", "doubleValue"):
+            if key in v:
+                return v[key]
+        return int(v["intValue"]) if "intValue" in v else None
+
+    spans = []
+    for rs in payload.get("resourceSpans", []):
+        for ss in rs.get("scopeSpans", []):
+            for s in ss.get("spans", []):
+                attrs = {a["key"]: _value(a.get("value", {})) for a in s.get("attributes", [])}
+                start, end = int(s["startTimeUnixNano"]) / 1e9, int(s["endTimeUnixNano"]) / 1e9
+                status = s.get("status") or {}
+                spans.append({
+                    "trace_id": s["traceId"], "span_id": s["spanId"], "parent_id": s.get("parentSpanId") or None,
+                    "name": s["name"], "kind": attrs.pop("span.kind", "internal"), "start": start, "end": end,
+                    "duration_ms": round((end - start) * 1000, 3), "attributes": attrs,
+                    "status": "error" if status.get("code") == 2 else "ok", "error": status.get("message"),
+                })
+    return spans
+
+
+def collect(host: str = "127.0.0.1", port: int = 4318, path: str = TRACE_FILE):
+    """Serve POST /v1/traces (OTLP/HTTP JSON) and append received spans to `path`."""
+    lock = threading.Lock()
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.rstrip("/") != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            try:
+                spans = _from_otlp(json.loads(body))
+            except (ValueError, KeyError) as e:
+                self.send_error(400, f"Invalid OTLP JSON: {e}")
+                return
+            with lock:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a") as f:
+                    f.write("".join(json.dumps(s) + "\n" for s in spans))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    print(f"[INFO] Collecting OTLP traces on http://{host}:{port}/v1/traces -> {path}")
+    server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file", default=TRACE_FILE, help="trace file (default: TRACE_FILE)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    runs = sub.add_parser("runs", help="list recent runs")
+    runs.add_argument("--limit", type=int, default=20)
+    show = sub.add_parser("show", help="waterfall of one run")
+    show.add_argument("run_id")
+    show.add_argument("--width", type=int, default=40)
+    show.add_argument("--json", action="store_true", help="print the raw spans instead")
+    coll = sub.add_parser("collect", help="run a local OTLP/HTTP collector")
+    coll.add_argument("--host", default="127.0.0.1")
+    coll.add_argument("--port", type=int, default=4318)
+    args = parser.parse_args(argv)
+
+    if args.command == "runs":
+        for r in list_runs(args.file, args.limit):
+            print(f"{r['run_id']:<34} {r['name']:<20} {r['duration_ms']:>9.0f}ms {r['spans']:>5} spans"
+                  f"{'  ' + str(r['errors']) + ' errors' if r['errors'] else ''}")
+    elif args.command == "show":
+        spans = load_trace(args.run_id, args.file)
+        print(json.dumps(spans, indent=2) if args.json else waterfall(spans, args.width))
+    else:
+        collect(args.host, args.port, args.file)
+
+
+__all__ = ["iter_spans", "load_trace", "list_runs", "waterfall", "collect", "main"]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+# utils/tracing.py
+"""
+Lightweight tracing for research runs.
+
+A trace is one run (its id is the run id); spans nest through a context
+variable, so any code called inside `span(...)` becomes a child without
+passing anything around:
+
+    with start_trace("research", run_id=run_id):
+        with span("query_decomposer", kind="node"):
+            ...                                  # LLM/HTTP/DB spans nest here
+
+`traced()` does the same as a decorator. Worker threads do not inherit
+context variables, so submit work with `bind(fn)`; across agents the
+W3C `traceparent` header carries the trace (the RPC client sends it and
+TraceMiddleware picks it up on the server side).
+
+Finished spans are batched by a background thread and exported to a JSONL
+file (default) or an OTLP/HTTP JSON endpoint; see utils/trace_report.py
+for the waterfall CLI and a local collector stand-in.
+
+Environment:
+    TRACE_EXPORT         "file" (default), "otlp" or "none"
+    TRACE_FILE           JSONL span file (default: <repo>/storage/traces.jsonl)
+    TRACE_OTLP_ENDPOINT  OTLP/HTTP traces URL (default: http://localhost:4318/v1/traces)
+    TRACE_QUEUE_SIZE     finished spans buffered before new ones are dropped (default: 50000)
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "file")
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(_REPO_ROOT, "storage", "traces.jsonl"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "50000"))
+TRACEPARENT_HEADER = "traceparent"
+
+_BATCH_SIZE = 256
+_FLUSH_SECONDS = 1.0
+_HEX32 = re.compile(r"^[0-9a-f]{32}$")
+
+_current: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+_run_id: contextvars.ContextVar = contextvars.ContextVar("trace_run_id", default=None)
+# Called with every finished span, whatever TRACE_EXPORT is (utils.metrics uses this)
+_listeners: List = []
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "parent", "name", "kind", "start", "end", "attributes", "status",
+                 "error")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any],
+                 parent: Optional["Span"] = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        # In-process parent (None for roots and remote parents), for listeners that need the ancestry
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def ancestors(self):
+        """Parent, grandparent, ... up to the root (in this process)."""
+        s = self.parent
+        while s is not None:
+            yield s
+            s = s.parent
+
+    def set(self, **attributes):
+        """Add attributes (token counts, cache hits, ...) while the span is open."""
+        self.attributes.update(attributes)
+
+    def finish(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.status = "error"
+            self.error = f"{error.__class__.__name__}: {error}"
+        self.end = time.time()
+        for listener in _listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                print(f"[WARN] Span listener failed: {e}")
+        _exporter.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "kind": self.kind, "start": self.start, "end": self.end,
+            "duration_ms": round(((self.end or time.time()) - self.start) * 1000, 3),
+            "attributes": self.attributes, "status": self.status, "error": self.error,
+        }
+
+
+def trace_id_for(run_id: Optional[str]) -> str:
+    """Trace id of a run: the run id itself when it is 32 hex digits, else a hash of it."""
+    if not run_id:
+        return uuid.uuid4().hex
+    if _HEX32.match(run_id):
+        return run_id
+    return hashlib.sha256(run_id.encode("utf-8")).hexdigest()[:32]
+
+
+def add_listener(fn):
+    """Call fn(span) for every span as it finishes."""
+    _listeners.append(fn)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_run_id() -> Optional[str]:
+    """Run id given to the enclosing start_trace(), if any (used as the log correlation id)."""
+    return _run_id.get()
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current.get()
+    return s.trace_id if s is not None else None
+
+
+def open_span(name: str, kind: str = "internal", **attributes) -> Span:
+    """
+    Child span of the current one that is NOT made current; call finish()
+    on it. For work that outlives the caller's frame, e.g. a generator.
+    """
+    parent = _current.get()
+    return Span(name, kind, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None,
+                attributes, parent)
+
+
+@contextmanager
+def _activate(s: Span):
+    token = _current.set(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        s.finish(error)
+
+
+def span(name: str, kind: str = "internal", **attributes):
+    """Open a child span of the current one (or a new trace if there is none)."""
+    return _activate(open_span(name, kind, **attributes))
+
+
+@contextmanager
+def start_trace(name: str, run_id: Optional[str] = None, **attributes):
+    """Root span of a run; the trace id is derived from `run_id` when given."""
+    if run_id:
+        attributes["run_id"] = run_id
+    token = _run_id.set(run_id)
+    try:
+        with _activate(Span(name, "run", trace_id_for(run_id), None, attributes)) as s:
+            yield s
+    finally:
+        _run_id.reset(token)
+
+
+def traced(name: Optional[str] = None, kind: str = "internal"):
+    """Decorator form of span() for sync and async functions."""
+
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def use_span(s: Optional[Span]):
+    """Make an existing span current (e.g. inside a coroutine started on another loop)."""
+    token = _current.set(s)
+    try:
+        yield s
+    finally:
+        _current.reset(token)
+
+
+def bind(fn):
+    """Run `fn` later (e.g. in a worker thread) inside the caller's current context."""
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return ctx.copy().run(fn, *args, **kwargs)
+    return wrapper
+
+
+# --- Propagation across agents ---
+def inject_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    s = _current.get()
+    if s is not None:
+        headers[TRACEPARENT_HEADER] = f"00-{s.trace_id}-{s.span_id}-01"
+    return headers
+
+
+def parse_traceparent(value: Optional[str]):
+    """(trace_id, parent_span_id) from a W3C traceparent header, or None."""
+    parts = (value or "").split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None
+
+
+@contextmanager
+def continue_trace(traceparent: Optional[str], name: str, kind: str = "server", **attributes):
+    """Server-side span joined to the caller's trace when a traceparent is present."""
+    parsed = parse_traceparent(traceparent)
+    if parsed is None:
+        with span(name, kind, **attributes) as s:
+            yield s
+        return
+    s = Span(name, kind, parsed[0], parsed[1], attributes)
+    with _activate(s):
+        yield s
+
+
+class TraceMiddleware:
+    """ASGI middleware: one server span per HTTP request, joined to the caller's trace."""
+
+    def __init__(self, app, service: str = ""):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        name = f"{scope.get('method', 'GET')} {scope.get('path', '')}"
+        with continue_trace(headers.get(TRACEPARENT_HEADER), name, "server", service=self.service) as s:
+            async def _send(message):
+                if message["type"] == "http.response.start":
+                    s.set(status=message["status"])
+                await send(message)
+            await self.app(scope, receive, _send)
+
+
+# --- Database ---
+def instrument_sqlalchemy(engine, db: str = ""):
+    """Emit a "db" span for every statement executed on `engine`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        s = open_span("db.query", "db", db=db or engine.dialect.name, statement=" ".join(statement.split())[:200])
+        conn.info.setdefault("_trace_spans", []).append(s)
+
+    def _finish(conn, exc=None):
+        stack = conn.info.get("_trace_spans")
+        if stack:
+            stack.pop().finish(exc)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        _finish(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        if context.connection is not None:
+            _finish(context.connection, context.original_exception)
+
+    return engine
+
+
+# --- Export ---
+def _otlp_payload(spans: List[dict]) -> dict:
+    def _value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "research-agents"}}]},
+        "scopeSpans": [{"scope": {"name": "utils.tracing"}, "spans": [{
+            "traceId": s["trace_id"], "spanId": s["span_id"], "parentSpanId": s["parent_id"] or "",
+            "name": s["name"], "kind": 1,
+            "startTimeUnixNano": str(int(s["start"] * 1e9)), "endTimeUnixNano": str(int(s["end"] * 1e9)),
+            "attributes": [{"key": k, "value": _value(v)} for k, v in
+                           {"span.kind": s["kind"], **s["attributes"]}.items() if v is not None],
+            "status": {"code": 2, "message": s["error"]} if s["status"] == "error" else {"code": 1},
+        } for s in spans]}],
+    }]}
+
+
+class _Exporter:
+    def __init__(self, mode: str = TRACE_EXPORT):
+        self.mode = mode
+        self.queue: "queue.Queue" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, s: Span):
+        if self.mode == "none":
+            return
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self.thread.start()
+                    atexit.register(self.flush)
+        try:
+            self.queue.put_nowait(s.to_dict())
+        except queue.Full:
+            # The exporter cannot keep up; drop rather than grow without bound
+            self.dropped += 1
+
+    def _drain(self) -> List[dict]:
+        batch = []
+        while len(batch) < _BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[dict]):
+        if not batch:
+            return
+        try:
+            if self.mode == "otlp":
+                import httpx
+                httpx.post(TRACE_OTLP_ENDPOINT, json=_otlp_payload(batch), timeout=5).raise_for_status()
+            else:
+                os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+                with open(TRACE_FILE, "a") as f:
+                    f.write("".join(json.dumps(s, default=str) + "\n" for s in batch))
+        except Exception as e:
+            # Tracing must never break a run
+            self.dropped += len(batch)
+            print(f"[WARN] Dropped {len(batch)} trace spans: {e}")
+
+    def _export_all(self):
+        # Batches of _BATCH_SIZE until the queue is empty, so export keeps up with any span rate
+        with self.lock:
+            batch = self._drain()
+            while batch:
+                self._write(batch)
+                batch = self._drain()
+
+    def _run(self):
+        while True:
+            time.sleep(_FLUSH_SECONDS)
+            self._export_all()
+
+    def flush(self):
+        self._export_all()
+
+
+_exporter = _Exporter()
+
+
+def flush():
+    """Export all finished spans now (e.g. before reading the trace file)."""
+    _exporter.flush()
+
+
+def dropped_spans() -> int:
+    """Spans lost because the export queue was full or the export failed."""
+    return _exporter.dropped
+
+
+__all__ = [
+    "Span", "span", "open_span", "start_trace", "trace_id_for", "traced", "use_span", "bind",
+    "current_span", "current_run_id", "current_trace_id", "add_listener",
+    "inject_headers", "parse_traceparent", "continue_trace", "TraceMiddleware",
+    "instrument_sqlalchemy", "flush", "dropped_spans", "TRACEPARENT_HEADER",
+]